@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from shared.services.ledger_service import LedgerService
+
+
+class Command(BaseCommand):
+    help = 'Create daily ledger balance checkpoints up to the given date (default: yesterday)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Last day to checkpoint (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            period_end = parse_date(options['date'])
+            if not period_end:
+                raise CommandError('Invalid date, expected YYYY-MM-DD')
+            # Balances read on from a checkpoint skip everything up to its day's end,
+            # so only days that are over can be checkpointed
+            if period_end >= timezone.localdate():
+                raise CommandError('Only days before today can be checkpointed')
+        else:
+            period_end = timezone.localdate() - timedelta(days=1)
+
+        created = LedgerService.create_checkpoints_through(period_end)
+        self.stdout.write(self.style.SUCCESS(f"Created checkpoints for {created} day(s) up to {period_end}"))
@@ -0,0 +1,66 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.ledger.services.export_service import LedgerExportService
+
+
+class Command(BaseCommand):
+    help = 'Export the general ledger to gzip CSV or Parquet in constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Destination file')
+        parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+        parser.add_argument('--account-code')
+        parser.add_argument('--start-date', help='YYYY-MM-DD (inclusive)')
+        parser.add_argument('--end-date', help='YYYY-MM-DD (inclusive)')
+        parser.add_argument(
+            '--after-id',
+            type=int,
+            help='Resume after this ledger entry id; the rest goes to a new file of its own'
+        )
+
+    def handle(self, *args, **options):
+        dates = {}
+        for option in ('start_date', 'end_date'):
+            if options[option]:
+                dates[option] = parse_date(options[option])
+                if not dates[option]:
+                    raise CommandError(f"Invalid {option.replace('_', '-')}, expected YYYY-MM-DD")
+
+        output = options['output']
+        if os.path.exists(output):
+            raise CommandError(f"{output} already exists; resume an interrupted export into a new file")
+
+        rows = LedgerExportService.get_rows(
+            account_code=options['account_code'],
+            after_id=options['after_id'],
+            **dates
+        )
+        progress = {}
+        if options['format'] == 'csv':
+            chunks = LedgerExportService.iter_csv_gzip(rows, progress=progress)
+        else:
+            chunks = LedgerExportService.iter_parquet(rows, progress=progress)
+
+        # Written under a temporary name, so a file at output is always a complete export
+        partial = f"{output}.part"
+        try:
+            with open(partial, 'wb') as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    file.flush()
+        except ValueError as e:
+            os.remove(partial)
+            raise CommandError(str(e))
+        except BaseException:
+            if progress.get('last_id'):
+                self.stderr.write(
+                    f"Export interrupted after writing the entries through id {progress['last_id']} to {partial}; "
+                    f"resume into a new file with --after-id {progress['last_id']}"
+                )
+            raise
+        os.replace(partial, output)
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {progress.get('rows', 0)} ledger entries to {output}"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.ledger.services.partition_service import LedgerPartitionService
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly LedgerEntry partitions and detach or archive old ones (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3, help='Future months to pre-create')
+        parser.add_argument('--detach-before', help='Detach partitions for months before this date (YYYY-MM-DD)')
+        parser.add_argument('--archive-schema', help='Move detached partitions into this schema')
+
+    def handle(self, *args, **options):
+        if not LedgerPartitionService.is_supported():
+            self.stdout.write(self.style.WARNING('Ledger partitioning requires PostgreSQL; nothing to do'))
+            return
+
+        for name in LedgerPartitionService.ensure_partitions(options['months_ahead']):
+            self.stdout.write(f"Created partition {name}")
+
+        if options['detach_before']:
+            cutoff = parse_date(options['detach_before'])
+            if not cutoff:
+                raise CommandError('Invalid date, expected YYYY-MM-DD')
+            try:
+                detached = LedgerPartitionService.detach_before(cutoff, options['archive_schema'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            for name in detached:
+                self.stdout.write(f"Detached partition {name}")
+
+        self.stdout.write(self.style.SUCCESS('Ledger partitions up to date'))
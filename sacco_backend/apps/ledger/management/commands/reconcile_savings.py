@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.ledger.services.reconciliation_service import ReconciliationService
+
+
+class Command(BaseCommand):
+    help = 'Reconcile the savings control account in the ledger with the savings accounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--show', type=int, default=20, help='Number of breaks to print')
+
+    def handle(self, *args, **options):
+        run = ReconciliationService.run()
+
+        self.stdout.write(f"Ledger balance (running):      {run.ledger_balance}")
+        self.stdout.write(f"Ledger balance (from entries): {run.ledger_entries_balance}")
+        self.stdout.write(f"Savings accounts total:        {run.savings_total}")
+        self.stdout.write(f"Difference:                    {run.difference}")
+
+        for item in run.breaks.order_by('id')[:options['show']]:
+            self.stdout.write(self.style.WARNING(
+                f"{item.break_type}: {item.description} (expected {item.expected}, actual {item.actual})"
+            ))
+
+        message = f"Reconciliation run {run.id}: {run.break_count} break(s)"
+        self.stdout.write(self.style.SUCCESS(message) if run.status == 'BALANCED' else self.style.ERROR(message))
@@ -0,0 +1,36 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ledger.services.integrity_service import LedgerIntegrityService
+
+
+class Command(BaseCommand):
+    help = 'Verify the ledger hash chains and that every transaction balances'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes (default: number of CPUs; 1 runs in-process)'
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        report = LedgerIntegrityService.verify(workers=options['workers'])
+
+        for anchor in report['anchors']:
+            self.stdout.write(
+                f"Chain of {anchor['account_code']}/{anchor['bucket']} starts at entry {anchor['entry_id']} "
+                f"(earlier history detached)"
+            )
+        for error in report['errors']:
+            self.stdout.write(self.style.ERROR(', '.join(f"{key}={value}" for key, value in error.items())))
+
+        summary = f"Checked {report['entries']} ledger entries in {report['chunks']} chunks"
+        if report['errors']:
+            raise CommandError(f"{summary}: {len(report['errors'])} integrity error(s)")
+        self.stdout.write(self.style.SUCCESS(f"{summary}: no integrity errors"))
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.26 on 2026-10-16 20:55
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def seed_account_balances(apps, schema_editor):
+    LedgerEntry = apps.get_model('ledger', 'LedgerEntry')
+    AccountBalance = apps.get_model('ledger', 'AccountBalance')
+
+    totals = LedgerEntry.objects.values('account_code').annotate(
+        debits=Sum('amount', filter=Q(entry_type='DEBIT')),
+        credits=Sum('amount', filter=Q(entry_type='CREDIT'))
+    )
+
+    balances = []
+    for row in totals:
+        debits = row['debits'] or Decimal('0')
+        credits = row['credits'] or Decimal('0')
+        # Assets (1xxx) and expenses (5xxx) carry debit balances, everything else credit balances
+        debit_normal = row['account_code'].startswith(('1', '5'))
+        balances.append(AccountBalance(
+            account_code=row['account_code'],
+            debit_total=debits,
+            credit_total=credits,
+            balance=debits - credits if debit_normal else credits - debits
+        ))
+
+    AccountBalance.objects.bulk_create(balances)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_code', models.CharField(max_length=20, unique=True)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['account_code', 'created_at'], name='ledger_ledg_account_39f1ff_idx'),
+        ),
+        migrations.RunPython(seed_account_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.26 on 2026-10-16 20:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0003_account_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountBalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_code', models.CharField(max_length=20)),
+                ('period_end', models.DateField()),
+                ('debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period_end'], name='ledger_acco_period__15bd80_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='accountbalancecheckpoint',
+            constraint=models.UniqueConstraint(fields=('account_code', 'period_end'), name='unique_account_checkpoint'),
+        ),
+    ]
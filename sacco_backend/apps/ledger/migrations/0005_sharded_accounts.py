@@ -0,0 +1,32 @@
+# Generated by Django 4.2.26 on 2026-10-16 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0004_account_balance_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountbalance',
+            name='bucket',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ledgerentry',
+            name='bucket',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='accountbalance',
+            name='account_code',
+            field=models.CharField(max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='accountbalance',
+            constraint=models.UniqueConstraint(fields=('account_code', 'bucket'), name='unique_account_bucket'),
+        ),
+    ]
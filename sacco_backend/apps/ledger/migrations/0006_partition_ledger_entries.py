@@ -0,0 +1,91 @@
+# Converts ledger_ledgerentry into a table range-partitioned by month on created_at.
+# PostgreSQL only; other backends keep the plain table.
+
+from datetime import date, datetime, time
+
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = 'ledger_ledgerentry'
+MONTHS_AHEAD = 3
+
+
+def _month_start(day, offset=0):
+    years, month_index = divmod(day.month - 1 + offset, 12)
+    return date(day.year + years, month_index + 1, 1)
+
+
+def _bound(day):
+    return timezone.make_aware(datetime.combine(day, time.min)).isoformat()
+
+
+def _rebuild_table(cursor, partitioned):
+    # Remember secondary indexes and foreign keys so they can be recreated on the new table
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+        [TABLE, f'{TABLE}_pkey']
+    )
+    index_definitions = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [TABLE]
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(f'SELECT min(created_at), max(id) FROM "{TABLE}"')
+    first_created, max_id = cursor.fetchone()
+
+    cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{TABLE}_old"')
+    cursor.execute(
+        f'CREATE TABLE "{TABLE}" (LIKE "{TABLE}_old" INCLUDING DEFAULTS INCLUDING IDENTITY)'
+        + (' PARTITION BY RANGE (created_at)' if partitioned else '')
+    )
+
+    if partitioned:
+        month = _month_start(timezone.localtime(first_created).date() if first_created else timezone.localdate())
+        last_month = _month_start(timezone.localdate(), MONTHS_AHEAD)
+        while month <= last_month:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_p{month.year}_{month.month:02d}" PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(_month_start(month, 1))}')"
+            )
+            month = _month_start(month, 1)
+        # Catches rows outside the pre-created months; manage_ledger_partitions moves them into
+        # each month partition it creates later
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+    cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{TABLE}_old"')
+    cursor.execute(f'DROP TABLE "{TABLE}_old"')
+    if max_id:
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), %s)", [max_id])
+
+    # A partitioned table's primary key has to include the partition key
+    primary_key = '(id, created_at)' if partitioned else '(id)'
+    cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY {primary_key}')
+    for definition in index_definitions:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+
+def partition_ledger_entries(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        with schema_editor.connection.cursor() as cursor:
+            _rebuild_table(cursor, partitioned=True)
+
+
+def unpartition_ledger_entries(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        with schema_editor.connection.cursor() as cursor:
+            _rebuild_table(cursor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0005_sharded_accounts'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_ledger_entries, unpartition_ledger_entries),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.26 on 2026-10-16 21:10
+
+import hashlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def compute_entry_hash(previous_hash, transaction_id, account_code, bucket, entry_type, amount, balance_after,
+                       description):
+    # Frozen copy of apps.ledger.models.compute_entry_hash as of this migration
+    payload = '|'.join([
+        previous_hash,
+        str(transaction_id),
+        account_code,
+        str(bucket),
+        entry_type,
+        f"{amount:.2f}",
+        f"{balance_after:.2f}",
+        description
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def chain_existing_entries(apps, schema_editor):
+    """Seal the entries posted before hash chaining, in id order per (account, bucket)."""
+    LedgerEntry = apps.get_model('ledger', 'LedgerEntry')
+    AccountBalance = apps.get_model('ledger', 'AccountBalance')
+
+    heads = {}
+    pending = []
+    for entry in LedgerEntry.objects.order_by('id').iterator(chunk_size=BATCH_SIZE):
+        key = (entry.account_code, entry.bucket)
+        entry.previous_hash = heads.get(key, '')
+        entry.entry_hash = compute_entry_hash(
+            entry.previous_hash, entry.transaction_id, entry.account_code, entry.bucket,
+            entry.entry_type, entry.amount, entry.balance_after, entry.description
+        )
+        heads[key] = entry.entry_hash
+        pending.append(entry)
+        if len(pending) >= BATCH_SIZE:
+            LedgerEntry.objects.bulk_update(pending, ['previous_hash', 'entry_hash'])
+            pending = []
+    LedgerEntry.objects.bulk_update(pending, ['previous_hash', 'entry_hash'])
+
+    for (account_code, bucket), last_hash in heads.items():
+        AccountBalance.objects.filter(account_code=account_code, bucket=bucket).update(last_hash=last_hash)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0006_partition_ledger_entries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountbalance',
+            name='last_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='ledgerentry',
+            name='entry_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='ledgerentry',
+            name='previous_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.RunPython(chain_existing_entries, migrations.RunPython.noop),
+    ]
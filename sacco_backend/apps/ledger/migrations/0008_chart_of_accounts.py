@@ -0,0 +1,50 @@
+# Generated by Django 4.2.26 on 2026-10-16 21:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The accounts the posting code has always used (LedgerService.ACCOUNT_CODES)
+DEFAULT_ACCOUNTS = [
+    ('1000', 'Cash', 'ASSET', 'DEBIT'),
+    ('1100', 'Loans Receivable', 'ASSET', 'DEBIT'),
+    ('2000', 'Member Savings', 'LIABILITY', 'CREDIT'),
+    ('4000', 'Fee Income', 'INCOME', 'CREDIT'),
+    ('4100', 'Interest Income', 'INCOME', 'CREDIT'),
+]
+
+
+def seed_chart_of_accounts(apps, schema_editor):
+    ChartOfAccounts = apps.get_model('ledger', 'ChartOfAccounts')
+    ChartOfAccounts.objects.bulk_create([
+        ChartOfAccounts(code=code, name=name, account_type=account_type, normal_balance=normal_balance)
+        for code, name, account_type, normal_balance in DEFAULT_ACCOUNTS
+    ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0007_ledger_hash_chain'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChartOfAccounts',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('account_type', models.CharField(choices=[('ASSET', 'Asset'), ('LIABILITY', 'Liability'), ('EQUITY', 'Equity'), ('INCOME', 'Income'), ('EXPENSE', 'Expense')], max_length=10)),
+                ('normal_balance', models.CharField(choices=[('DEBIT', 'Debit'), ('CREDIT', 'Credit')], max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='ledger.chartofaccounts')),
+            ],
+            options={
+                'verbose_name_plural': 'chart of accounts',
+                'ordering': ['code'],
+            },
+        ),
+        migrations.RunPython(seed_chart_of_accounts, migrations.RunPython.noop),
+    ]
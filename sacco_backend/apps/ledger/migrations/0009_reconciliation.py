@@ -0,0 +1,45 @@
+# Generated by Django 4.2.26 on 2026-10-16 21:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0008_chart_of_accounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('BALANCED', 'Balanced'), ('BREAKS', 'Breaks Found'), ('FAILED', 'Failed')], default='RUNNING', max_length=10)),
+                ('ledger_balance', models.DecimalField(decimal_places=2, max_digits=16, null=True)),
+                ('ledger_entries_balance', models.DecimalField(decimal_places=2, max_digits=16, null=True)),
+                ('savings_total', models.DecimalField(decimal_places=2, max_digits=16, null=True)),
+                ('difference', models.DecimalField(decimal_places=2, max_digits=16, null=True)),
+                ('break_count', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReconciliationBreak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('break_type', models.CharField(choices=[('CONTROL_TOTAL', 'Control Total'), ('CHAIN', 'Balance Chain'), ('ACCOUNT_BALANCE', 'Account Balance')], max_length=20)),
+                ('savings_account_id', models.BigIntegerField(null=True)),
+                ('savings_transaction_id', models.BigIntegerField(null=True)),
+                ('expected', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('actual', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('description', models.CharField(max_length=255)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='breaks', to='ledger.reconciliationrun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['run', 'break_type'], name='ledger_reco_run_id_7200b6_idx')],
+            },
+        ),
+    ]
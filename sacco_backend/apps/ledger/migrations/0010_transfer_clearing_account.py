@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def add_transfer_clearing_account(apps, schema_editor):
+    ChartOfAccounts = apps.get_model('ledger', 'ChartOfAccounts')
+    ChartOfAccounts.objects.get_or_create(
+        code='2900',
+        defaults={'name': 'Transfers Clearing', 'account_type': 'LIABILITY', 'normal_balance': 'CREDIT'}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0009_reconciliation'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_transfer_clearing_account, migrations.RunPython.noop),
+    ]
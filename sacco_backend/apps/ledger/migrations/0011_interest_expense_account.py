@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def add_interest_expense_account(apps, schema_editor):
+    ChartOfAccounts = apps.get_model('ledger', 'ChartOfAccounts')
+    ChartOfAccounts.objects.get_or_create(
+        code='5100',
+        defaults={'name': 'Interest Expense', 'account_type': 'EXPENSE', 'normal_balance': 'DEBIT'}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0010_transfer_clearing_account'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_interest_expense_account, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,40 @@
+import hashlib
+
 from django.db import models
 
 from apps.transactions.models import Transaction
 
 
+class ChartOfAccounts(models.Model):
+    ACCOUNT_TYPES = [
+        ('ASSET', 'Asset'),
+        ('LIABILITY', 'Liability'),
+        ('EQUITY', 'Equity'),
+        ('INCOME', 'Income'),
+        ('EXPENSE', 'Expense')
+    ]
+    NORMAL_BALANCES = [
+        ('DEBIT', 'Debit'),
+        ('CREDIT', 'Credit')
+    ]
+
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=100)
+    account_type = models.CharField(max_length=10, choices=ACCOUNT_TYPES)
+    normal_balance = models.CharField(max_length=10, choices=NORMAL_BALANCES)
+    parent = models.ForeignKey('self', on_delete=models.PROTECT, null=True, blank=True, related_name='children')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['code']
+        verbose_name_plural = 'chart of accounts'
+
+    def __str__(self):
+        return f"{self.code} - {self.name}"
+
+
 class LedgerEntry(models.Model):
     ENTRY_TYPES = [
         ('DEBIT', 'Debit'),
@@ -14,8 +46,149 @@ class LedgerEntry(models.Model):
     entry_type = models.CharField(max_length=10, choices=ENTRY_TYPES)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    # Sub-ledger bucket of a sharded account; balance_after is the running balance of that bucket
+    bucket = models.PositiveSmallIntegerField(default=0)
     description = models.TextField()
+    # Hash chain per (account_code, bucket): entry_hash covers previous_hash and the entry's content
+    previous_hash = models.CharField(max_length=64, blank=True, default='')
+    entry_hash = models.CharField(max_length=64, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['account_code', 'created_at'])
+        ]
+
+    def compute_hash(self) -> str:
+        return compute_entry_hash(
+            self.previous_hash, self.transaction_id, self.account_code, self.bucket,
+            self.entry_type, self.amount, self.balance_after, self.description
+        )
+
+    def __str__(self):
+        return f"{self.transaction.transaction_ref} - {self.entry_type}"
+
+
+def compute_entry_hash(previous_hash, transaction_id, account_code, bucket, entry_type, amount, balance_after,
+                       description) -> str:
+    """SHA-256 over an entry's content and its predecessor's hash.
+
+    Ids and timestamps are left out because they are only assigned on insert.
+    """
+    payload = '|'.join([
+        previous_hash,
+        str(transaction_id),
+        account_code,
+        str(bucket),
+        entry_type,
+        f"{amount:.2f}",
+        f"{balance_after:.2f}",
+        description
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class AccountBalance(models.Model):
+    """Running balance per ledger account, updated in the same transaction as each posting.
+
+    ``balance`` is kept on the account's normal side (debit-normal for assets,
+    credit-normal for liabilities and income), matching ``LedgerEntry.balance_after``.
+    Accounts listed in ``LEDGER_SHARDED_ACCOUNTS`` have one row per bucket; their
+    balance is the sum of the buckets.
+    """
+    account_code = models.CharField(max_length=20)
+    bucket = models.PositiveSmallIntegerField(default=0)
+    balance = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    debit_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    credit_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    # entry_hash of the latest entry in this bucket, i.e. the head of its hash chain
+    last_hash = models.CharField(max_length=64, blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account_code', 'bucket'], name='unique_account_bucket')
+        ]
+
+    def __str__(self):
+        return f"{self.account_code}/{self.bucket} - {self.balance}"
+
+
+class AccountBalanceCheckpoint(models.Model):
+    """Cumulative debit and credit totals of a ledger account at the close of a day.
+
+    An as-of balance starts from the nearest checkpoint and only sums the entries
+    posted after it.
+    """
+    account_code = models.CharField(max_length=20)
+    period_end = models.DateField()
+    debit_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    credit_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account_code', 'period_end'], name='unique_account_checkpoint')
+        ]
+        indexes = [
+            models.Index(fields=['period_end'])
+        ]
+
+    @property
+    def closing_balance(self):
+        return self.debit_total - self.credit_total
+
+    def __str__(self):
+        return f"{self.account_code} @ {self.period_end}"
+
+
+class ReconciliationRun(models.Model):
+    """One ledger-to-savings reconciliation: control totals plus the number of breaks found."""
+    STATUS_CHOICES = [
+        ('RUNNING', 'Running'),
+        ('BALANCED', 'Balanced'),
+        ('BREAKS', 'Breaks Found'),
+        ('FAILED', 'Failed')
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='RUNNING')
+    # Savings control account as held in AccountBalance and as re-summed from LedgerEntry
+    ledger_balance = models.DecimalField(max_digits=16, decimal_places=2, null=True)
+    ledger_entries_balance = models.DecimalField(max_digits=16, decimal_places=2, null=True)
+    savings_total = models.DecimalField(max_digits=16, decimal_places=2, null=True)
+    difference = models.DecimalField(max_digits=16, decimal_places=2, null=True)
+    break_count = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"Reconciliation {self.started_at:%Y-%m-%d %H:%M} - {self.status}"
+
+
+class ReconciliationBreak(models.Model):
+    BREAK_TYPES = [
+        ('CONTROL_TOTAL', 'Control Total'),
+        ('CHAIN', 'Balance Chain'),
+        ('ACCOUNT_BALANCE', 'Account Balance')
+    ]
+
+    run = models.ForeignKey(ReconciliationRun, on_delete=models.CASCADE, related_name='breaks')
+    break_type = models.CharField(max_length=20, choices=BREAK_TYPES)
+    savings_account_id = models.BigIntegerField(null=True)
+    savings_transaction_id = models.BigIntegerField(null=True)
+    expected = models.DecimalField(max_digits=16, decimal_places=2)
+    actual = models.DecimalField(max_digits=16, decimal_places=2)
+    description = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['run', 'break_type'])
+        ]
+
+    @property
+    def difference(self):
+        return self.actual - self.expected
+
     def __str__(self):
-        return f"{self.transaction.transaction_ref} - {self.entry_type}"
\ No newline at end of file
+        return f"{self.break_type} - {self.description}"
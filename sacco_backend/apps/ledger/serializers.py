@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from apps.ledger.models import LedgerEntry
+from apps.ledger.models import AccountBalance, AccountBalanceCheckpoint, ChartOfAccounts, LedgerEntry
 
 
 class LedgerEntrySerializer(serializers.ModelSerializer):
@@ -22,6 +22,49 @@ class LedgerEntrySerializer(serializers.ModelSerializer):
 class TrialBalanceSerializer(serializers.Serializer):
     account_code = serializers.CharField()
     account_name = serializers.CharField()
+    parent_code = serializers.CharField(allow_null=True, required=False)
     debit_total = serializers.DecimalField(max_digits=12, decimal_places=2)
     credit_total = serializers.DecimalField(max_digits=12, decimal_places=2)
-    net_balance = serializers.DecimalField(max_digits=12, decimal_places=2)
\ No newline at end of file
+    net_balance = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class ChartOfAccountsSerializer(serializers.ModelSerializer):
+    parent = serializers.SlugRelatedField(
+        slug_field='code', queryset=ChartOfAccounts.objects.all(), required=False, allow_null=True
+    )
+
+    class Meta:
+        model = ChartOfAccounts
+        fields = ['id', 'code', 'name', 'account_type', 'normal_balance', 'parent', 'is_active',
+                  'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+    # Postings, balances and checkpoints are keyed by code and signed by normal balance
+    POSTED_LOCKED_FIELDS = ('code', 'normal_balance')
+
+    def validate(self, data):
+        if self.instance:
+            changed = [
+                field for field in self.POSTED_LOCKED_FIELDS
+                if field in data and data[field] != getattr(self.instance, field)
+            ]
+            if changed and self._has_postings(self.instance.code):
+                raise serializers.ValidationError(
+                    {field: "Cannot be changed once the account has postings" for field in changed}
+                )
+
+        parent = data.get('parent')
+        ancestor = parent
+        while ancestor:
+            if self.instance and ancestor.pk == self.instance.pk:
+                raise serializers.ValidationError("An account cannot be its own ancestor")
+            ancestor = ancestor.parent
+
+        return data
+
+    @staticmethod
+    def _has_postings(code: str) -> bool:
+        return any(
+            model.objects.filter(account_code=code).exists()
+            for model in (LedgerEntry, AccountBalance, AccountBalanceCheckpoint)
+        )
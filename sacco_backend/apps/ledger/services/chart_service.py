@@ -0,0 +1,90 @@
+# apps/ledger/services/chart_service.py
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db.models import F
+
+from apps.ledger.models import ChartOfAccounts
+from shared.utils.versioned_cache import VersionedCache
+
+
+def _load_chart() -> Dict[str, dict]:
+    chart = {
+        account['code']: account
+        for account in ChartOfAccounts.objects.values(
+            'code', 'name', 'account_type', 'normal_balance', 'is_active', parent_code=F('parent__code')
+        )
+    }
+    for account in chart.values():
+        account['children'] = []
+    for account in chart.values():
+        if account['parent_code'] in chart:
+            chart[account['parent_code']]['children'].append(account['code'])
+    return chart
+
+
+class ChartOfAccountsService:
+    """Resolves ledger accounts from a process-local copy of the chart of accounts.
+
+    The chart is reloaded only after a ChartOfAccounts row changes, so posting and
+    reporting look up names, normal balances and hierarchies without querying.
+    """
+
+    # Codes not (yet) in the chart fall back to the numbering convention:
+    # assets (1xxx) and expenses (5xxx) carry debit balances, everything else credit balances
+    DEBIT_NORMAL_PREFIXES = ('1', '5')
+
+    _cache = VersionedCache('chart_of_accounts', _load_chart)
+
+    @staticmethod
+    def get_chart() -> Dict[str, dict]:
+        return ChartOfAccountsService._cache.get()
+
+    @staticmethod
+    def get_account(code: str) -> Optional[dict]:
+        return ChartOfAccountsService.get_chart().get(code)
+
+    @staticmethod
+    def get_account_name(code: str) -> str:
+        account = ChartOfAccountsService.get_account(code)
+        return account['name'] if account else 'Unknown'
+
+    @staticmethod
+    def is_debit_normal(code: str) -> bool:
+        account = ChartOfAccountsService.get_account(code)
+        if account:
+            return account['normal_balance'] == 'DEBIT'
+        return code.startswith(ChartOfAccountsService.DEBIT_NORMAL_PREFIXES)
+
+    @staticmethod
+    def get_descendants(code: str) -> List[str]:
+        chart = ChartOfAccountsService.get_chart()
+        descendants = []
+        pending = list(chart[code]['children']) if code in chart else []
+        while pending:
+            child = pending.pop()
+            descendants.append(child)
+            pending.extend(chart[child]['children'])
+        return sorted(descendants)
+
+    @staticmethod
+    def rollup(totals: Dict[str, List[Decimal]]) -> Dict[str, List[Decimal]]:
+        """Add each account's [debits, credits] into all of its ancestors.
+
+        Returns totals for every account that has movements itself or below it.
+        """
+        chart = ChartOfAccountsService.get_chart()
+        rolled = {}
+        for code, (debits, credits) in totals.items():
+            seen = set()
+            while code and code not in seen:
+                seen.add(code)
+                current = rolled.setdefault(code, [Decimal('0'), Decimal('0')])
+                current[0] += debits
+                current[1] += credits
+                code = chart[code]['parent_code'] if code in chart else None
+        return rolled
+
+    @staticmethod
+    def invalidate() -> None:
+        ChartOfAccountsService._cache.invalidate()
@@ -0,0 +1,170 @@
+# apps/ledger/services/export_service.py
+import csv
+import io
+import zlib
+from datetime import date, datetime, time
+from typing import Iterator, Optional
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from apps.ledger.models import LedgerEntry
+from shared.services.ledger_service import LedgerService
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class _ProgressTracker:
+    """Moves ``progress`` to the rows of a chunk once the caller has come back for the next one."""
+
+    def __init__(self, progress: Optional[dict]):
+        self.progress = progress if progress is not None else {}
+        self.progress.setdefault('rows', 0)
+        self.progress.setdefault('last_id', None)
+        self.pending_rows = 0
+        self.pending_id = None
+
+    def add(self, row_id: int) -> None:
+        self.pending_rows += 1
+        self.pending_id = row_id
+
+    def written(self) -> None:
+        if self.pending_rows:
+            self.progress['rows'] += self.pending_rows
+            self.progress['last_id'] = self.pending_id
+            self.pending_rows = 0
+
+
+class LedgerExportService:
+    """Streams general-ledger rows to gzip CSV or Parquet in constant memory.
+
+    Rows are read in id order through a server-side cursor. ``progress`` records the
+    count and last id of the rows in the chunks the caller has taken and written (it
+    moves when the caller asks for the next chunk), so an interrupted export can resume
+    from there into a new file. Every gzip chunk ends on a full flush, so the rows it
+    counts can be decompressed from what was written.
+    """
+
+    FIELDS = [
+        'id', 'transaction_id', 'transaction__transaction_ref', 'account_code', 'bucket',
+        'entry_type', 'amount', 'balance_after', 'description', 'created_at'
+    ]
+    HEADER = [
+        'id', 'transaction_id', 'transaction_ref', 'account_code', 'bucket',
+        'entry_type', 'amount', 'balance_after', 'description', 'created_at'
+    ]
+    CHUNK_SIZE = 5000
+    CSV_FLUSH_BYTES = 256 * 1024
+
+    @staticmethod
+    def get_rows(
+            account_code: Optional[str] = None,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            after_id: Optional[int] = None
+    ) -> QuerySet:
+        queryset = LedgerEntry.objects.order_by('id')
+
+        if account_code:
+            queryset = queryset.filter(account_code=account_code)
+        if start_date:
+            queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(start_date, time.min)))
+        if end_date:
+            queryset = queryset.filter(created_at__lt=LedgerService._day_end(end_date))
+        if after_id:
+            queryset = queryset.filter(id__gt=after_id)
+
+        return queryset.values_list(*LedgerExportService.FIELDS)
+
+    @staticmethod
+    def iter_csv_gzip(rows: QuerySet, include_header: bool = True, progress: Optional[dict] = None) -> Iterator[bytes]:
+        compressor = zlib.compressobj(wbits=31)  # gzip container
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        tracker = _ProgressTracker(progress)
+
+        if include_header:
+            writer.writerow(LedgerExportService.HEADER)
+
+        for row in rows.iterator(chunk_size=LedgerExportService.CHUNK_SIZE):
+            writer.writerow(row[:-1] + (row[-1].isoformat(),))
+            tracker.add(row[0])
+            if buffer.tell() >= LedgerExportService.CSV_FLUSH_BYTES:
+                yield compressor.compress(buffer.getvalue().encode()) + compressor.flush(zlib.Z_FULL_FLUSH)
+                tracker.written()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield compressor.compress(buffer.getvalue().encode()) + compressor.flush()
+        tracker.written()
+
+    @staticmethod
+    def iter_parquet(rows: QuerySet, progress: Optional[dict] = None) -> Iterator[bytes]:
+        """Parquet bytes, one row group per chunk of ledger rows. Requires pyarrow."""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet export requires the pyarrow package")
+
+        schema = pa.schema([
+            ('id', pa.int64()),
+            ('transaction_id', pa.int64()),
+            ('transaction_ref', pa.string()),
+            ('account_code', pa.string()),
+            ('bucket', pa.int16()),
+            ('entry_type', pa.string()),
+            ('amount', pa.decimal128(12, 2)),
+            ('balance_after', pa.decimal128(12, 2)),
+            ('description', pa.string()),
+            ('created_at', pa.timestamp('us', tz='UTC')),
+        ])
+
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression='snappy')
+        tracker = _ProgressTracker(progress)
+        chunk = []
+        for row in rows.iterator(chunk_size=LedgerExportService.CHUNK_SIZE):
+            chunk.append(row)
+            tracker.add(row[0])
+            if len(chunk) >= LedgerExportService.CHUNK_SIZE:
+                writer.write_table(pa.Table.from_pylist(
+                    [dict(zip(LedgerExportService.HEADER, values)) for values in chunk], schema=schema
+                ))
+                chunk = []
+                yield sink.drain()
+                tracker.written()
+
+        if chunk:
+            writer.write_table(pa.Table.from_pylist(
+                [dict(zip(LedgerExportService.HEADER, values)) for values in chunk], schema=schema
+            ))
+        writer.close()
+        yield sink.drain()
+        tracker.written()
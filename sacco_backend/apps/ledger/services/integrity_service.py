@@ -0,0 +1,199 @@
+# apps/ledger/services/integrity_service.py
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connections
+from django.db.models import DecimalField, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.ledger.models import AccountBalance, LedgerEntry
+from shared.utils.date_utils import month_start
+
+
+def _month_bounds(month: date) -> Tuple[datetime, datetime]:
+    # Same monthly boundaries as the PostgreSQL partitions, so each chunk reads a single partition
+    return (
+        timezone.make_aware(datetime.combine(month, time.min)),
+        timezone.make_aware(datetime.combine(month_start(month, 1), time.min))
+    )
+
+
+def verify_chain_chunk(account_code: str, bucket: int, month: date, max_id: int) -> dict:
+    """Check the hash chain of one account bucket within one month.
+
+    Links inside the chunk are checked here; the chunk's first ``previous_hash`` and its
+    last ``entry_hash`` are returned so the caller can stitch consecutive chunks together.
+    """
+    start, end = _month_bounds(month)
+    entries = LedgerEntry.objects.filter(
+        account_code=account_code, bucket=bucket, created_at__gte=start, created_at__lt=end, id__lte=max_id
+    ).order_by('id')
+
+    result = {
+        'account_code': account_code,
+        'bucket': bucket,
+        'month': month,
+        'entries': 0,
+        'first_id': None,
+        'first_previous_hash': None,
+        'last_hash': None,
+        'errors': []
+    }
+    for entry in entries.iterator(chunk_size=5000):
+        result['entries'] += 1
+        if not entry.entry_hash:
+            result['errors'].append(_error('unsealed_entry', entry.id, account_code, bucket))
+            continue
+
+        if result['first_id'] is None:
+            result['first_id'] = entry.id
+            result['first_previous_hash'] = entry.previous_hash
+        elif entry.previous_hash != result['last_hash']:
+            result['errors'].append(_error('broken_link', entry.id, account_code, bucket))
+
+        if entry.compute_hash() != entry.entry_hash:
+            result['errors'].append(_error('hash_mismatch', entry.id, account_code, bucket))
+        result['last_hash'] = entry.entry_hash
+
+    return result
+
+
+def unbalanced_transactions(month: date, max_id: int) -> Dict[int, List[Decimal]]:
+    """Debit and credit totals of the transactions whose legs in ``month`` do not balance.
+
+    A transaction posted across midnight at a month end shows up unbalanced in both months;
+    the caller adds the months together before reporting it.
+    """
+    start, end = _month_bounds(month)
+    zero = Value(Decimal('0'), output_field=DecimalField(max_digits=16, decimal_places=2))
+    totals = LedgerEntry.objects.filter(
+        created_at__gte=start, created_at__lt=end, id__lte=max_id
+    ).values('transaction_id').annotate(
+        debits=Coalesce(Sum('amount', filter=Q(entry_type='DEBIT')), zero),
+        credits=Coalesce(Sum('amount', filter=Q(entry_type='CREDIT')), zero)
+    ).filter(~Q(debits=F('credits')))
+
+    return {row['transaction_id']: [row['debits'], row['credits']] for row in totals}
+
+
+def _error(error_type: str, entry_id: Optional[int], account_code: str, bucket: int) -> dict:
+    return {'type': error_type, 'entry_id': entry_id, 'account_code': account_code, 'bucket': bucket}
+
+
+class LedgerIntegrityService:
+    """Verifies the ledger's per-account hash chains and that every transaction balances.
+
+    Work is split into (account bucket, month) chunks for the chains and month chunks for the
+    transaction totals, optionally spread over a process pool. Everything is read-only and
+    bounded by the highest entry id at the start of the run, so postings carry on meanwhile.
+    """
+
+    @staticmethod
+    def verify(workers: int = 1) -> dict:
+        max_id = LedgerEntry.objects.aggregate(max_id=Max('id'))['max_id']
+        report = {'entries': 0, 'chunks': 0, 'errors': [], 'anchors': []}
+        if max_id is None:
+            return report
+
+        chain_jobs, months = LedgerIntegrityService._plan(max_id)
+        balance_jobs = [(month, max_id) for month in months]
+
+        if workers > 1:
+            # Forked workers must open their own database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                chunks = list(pool.map(verify_chain_chunk, *zip(*chain_jobs)))
+                month_totals = list(pool.map(unbalanced_transactions, *zip(*balance_jobs)))
+        else:
+            chunks = [verify_chain_chunk(*job) for job in chain_jobs]
+            month_totals = [unbalanced_transactions(*job) for job in balance_jobs]
+
+        report['chunks'] = len(chunks)
+        LedgerIntegrityService._stitch_chains(chunks, max_id, report)
+        LedgerIntegrityService._check_transaction_totals(month_totals, report)
+        return report
+
+    @staticmethod
+    def _plan(max_id: int) -> Tuple[List[tuple], List[date]]:
+        spans = LedgerEntry.objects.filter(id__lte=max_id).values('account_code', 'bucket').annotate(
+            first=Min('created_at'), last=Max('created_at')
+        ).order_by('account_code', 'bucket')
+
+        jobs = []
+        months = set()
+        for span in spans:
+            month = month_start(timezone.localtime(span['first']).date())
+            last_month = month_start(timezone.localtime(span['last']).date())
+            while month <= last_month:
+                jobs.append((span['account_code'], span['bucket'], month, max_id))
+                months.add(month)
+                month = month_start(month, 1)
+
+        return jobs, sorted(months)
+
+    @staticmethod
+    def _stitch_chains(chunks: List[dict], max_id: int, report: dict) -> None:
+        by_account = defaultdict(list)
+        for chunk in chunks:
+            report['entries'] += chunk['entries']
+            report['errors'].extend(chunk['errors'])
+            if chunk['first_id'] is not None:
+                by_account[(chunk['account_code'], chunk['bucket'])].append(chunk)
+
+        heads = {
+            (balance.account_code, balance.bucket): balance.last_hash
+            for balance in AccountBalance.objects.all()
+        }
+
+        for (account_code, bucket), account_chunks in by_account.items():
+            account_chunks.sort(key=lambda chunk: chunk['first_id'])
+
+            # History before the oldest attached partition may have been detached
+            if account_chunks[0]['first_previous_hash']:
+                report['anchors'].append({
+                    'account_code': account_code,
+                    'bucket': bucket,
+                    'entry_id': account_chunks[0]['first_id']
+                })
+
+            for previous, chunk in zip(account_chunks, account_chunks[1:]):
+                if chunk['first_previous_hash'] != previous['last_hash']:
+                    report['errors'].append(_error('broken_link', chunk['first_id'], account_code, bucket))
+
+            # A missing tail shows up as a chain that stops short of the balance row's head
+            tail = account_chunks[-1]['last_hash']
+            if tail != heads.get((account_code, bucket)) and not LedgerEntry.objects.filter(
+                    account_code=account_code, bucket=bucket, id__gt=max_id
+            ).exists():
+                report['errors'].append(_error('head_mismatch', None, account_code, bucket))
+
+    @staticmethod
+    def _check_transaction_totals(month_totals: List[Dict[int, List[Decimal]]], report: dict) -> None:
+        candidates = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+        for totals in month_totals:
+            for transaction_id, (debits, credits) in totals.items():
+                candidates[transaction_id][0] += debits
+                candidates[transaction_id][1] += credits
+
+        # Balanced portions of a transaction add nothing to its difference, so summing the
+        # unbalanced month portions is enough to tell whether the whole transaction balances
+        unbalanced = [transaction_id for transaction_id, (debits, credits) in candidates.items() if debits != credits]
+        if not unbalanced:
+            return
+
+        totals = LedgerEntry.objects.filter(transaction_id__in=unbalanced).values('transaction_id').annotate(
+            debits=Sum('amount', filter=Q(entry_type='DEBIT')),
+            credits=Sum('amount', filter=Q(entry_type='CREDIT'))
+        ).order_by('transaction_id')
+        for row in totals:
+            report['errors'].append({
+                'type': 'unbalanced_transaction',
+                'transaction_id': row['transaction_id'],
+                'debits': row['debits'] or Decimal('0'),
+                'credits': row['credits'] or Decimal('0')
+            })
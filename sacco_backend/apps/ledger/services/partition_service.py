@@ -0,0 +1,143 @@
+# apps/ledger/services/partition_service.py
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.ledger.models import AccountBalanceCheckpoint, LedgerEntry
+from shared.utils.date_utils import month_start
+
+
+class LedgerPartitionService:
+    """Manages the monthly range partitions of the LedgerEntry table (PostgreSQL only)."""
+
+    TABLE = LedgerEntry._meta.db_table
+    DEFAULT_PARTITION = f"{TABLE}_default"
+
+    @staticmethod
+    def is_supported() -> bool:
+        return connection.vendor == 'postgresql'
+
+    @staticmethod
+    def partition_name(month: date) -> str:
+        return f"{LedgerPartitionService.TABLE}_p{month.year}_{month.month:02d}"
+
+    @staticmethod
+    def partition_bounds(day: date) -> Tuple[datetime, datetime]:
+        """[start, end) of the partition holding ``day``, at midnight in the project time zone."""
+        start = month_start(day)
+        return (
+            timezone.make_aware(datetime.combine(start, time.min)),
+            timezone.make_aware(datetime.combine(month_start(start, 1), time.min))
+        )
+
+    @staticmethod
+    def list_partitions() -> List[str]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+                JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+                WHERE parent.relname = %s
+                ORDER BY child.relname
+                """,
+                [LedgerPartitionService.TABLE]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def ensure_partitions(months_ahead: int = 3, from_month: Optional[date] = None) -> List[str]:
+        """Create any missing monthly partitions from ``from_month`` (default: this month) onwards.
+
+        Rows already sitting in the default partition for a new month are moved into it.
+        """
+        first = month_start(from_month or timezone.localdate())
+        existing = set(LedgerPartitionService.list_partitions())
+        created = []
+
+        for offset in range(months_ahead + 1):
+            month = month_start(first, offset)
+            name = LedgerPartitionService.partition_name(month)
+            if name in existing:
+                continue
+
+            LedgerPartitionService._create_partition(
+                name, *LedgerPartitionService.partition_bounds(month),
+                has_default=LedgerPartitionService.DEFAULT_PARTITION in existing
+            )
+            created.append(name)
+
+        return created
+
+    @staticmethod
+    def _create_partition(name: str, start: datetime, end: datetime, has_default: bool) -> None:
+        """Create the partition for [start, end).
+
+        PostgreSQL refuses a new partition while the default partition holds rows in its range,
+        so the default is detached, its rows for the range are re-inserted through the parent
+        (landing in the new partition) and it is attached again, all in one transaction.
+        """
+        table = LedgerPartitionService.TABLE
+        default = LedgerPartitionService.DEFAULT_PARTITION
+        bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        in_range = 'created_at >= %s AND created_at < %s'
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            stranded = False
+            if has_default:
+                cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE {in_range})', [start, end])
+                stranded = cursor.fetchone()[0]
+
+            if not stranded:
+                cursor.execute(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" {bounds}')
+                return
+
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{default}"')
+            cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{table}" {bounds}')
+            cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{default}" WHERE {in_range}', [start, end])
+            cursor.execute(f'DELETE FROM "{default}" WHERE {in_range}', [start, end])
+            cursor.execute(f'ALTER TABLE "{table}" ATTACH PARTITION "{default}" DEFAULT')
+
+    @staticmethod
+    def detach_before(cutoff: date, archive_schema: Optional[str] = None) -> List[str]:
+        """Detach every monthly partition for months before ``cutoff``'s month.
+
+        Detached partitions stay as standalone tables (moved to ``archive_schema`` if given).
+        Only months fully covered by a balance checkpoint may be detached, so as-of balances
+        and trial balances never need the detached rows.
+        """
+        cutoff_month = month_start(cutoff)
+        last_checkpoint = AccountBalanceCheckpoint.objects.order_by('-period_end').values_list(
+            'period_end', flat=True
+        ).first()
+        if not last_checkpoint or last_checkpoint < cutoff_month - timedelta(days=1):
+            raise ValueError("Partitions can only be detached up to the latest balance checkpoint")
+
+        detached = []
+        with connection.cursor() as cursor:
+            if archive_schema:
+                cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"')
+
+            for name in LedgerPartitionService.list_partitions():
+                month = LedgerPartitionService._partition_month(name)
+                if month is None or month >= cutoff_month:
+                    continue
+
+                cursor.execute(f'ALTER TABLE "{LedgerPartitionService.TABLE}" DETACH PARTITION "{name}"')
+                if archive_schema:
+                    cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{archive_schema}"')
+                detached.append(name)
+
+        return detached
+
+    @staticmethod
+    def _partition_month(name: str) -> Optional[date]:
+        suffix = name[len(LedgerPartitionService.TABLE) + 2:]
+        try:
+            year, month = suffix.split('_')
+            return date(int(year), int(month), 1)
+        except ValueError:
+            return None
@@ -0,0 +1,132 @@
+# apps/ledger/services/reconciliation_service.py
+from decimal import Decimal
+from typing import Iterable, Iterator
+
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Coalesce, Lag
+from django.utils import timezone
+
+from apps.ledger.models import LedgerEntry, ReconciliationBreak, ReconciliationRun
+from apps.savings.models import SavingsAccount, SavingsTransaction
+from shared.services.ledger_service import LedgerService
+
+MONEY = DecimalField(max_digits=16, decimal_places=2)
+ZERO = Value(Decimal('0'), output_field=MONEY)
+
+
+class ReconciliationService:
+    """Reconciles the savings control account in the ledger with the savings sub-ledger.
+
+    Every check is a single grouped or windowed query, so the database does the work in
+    one pass per check however many accounts there are; only the breaks come back to Python.
+    """
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def run() -> ReconciliationRun:
+        run = ReconciliationRun.objects.create()
+        try:
+            ReconciliationService._reconcile(run)
+        except Exception as e:
+            run.status = 'FAILED'
+            run.error_message = str(e)
+            run.completed_at = timezone.now()
+            run.save()
+            raise
+        return run
+
+    @staticmethod
+    def _reconcile(run: ReconciliationRun) -> None:
+        savings_code = LedgerService.ACCOUNT_CODES['SAVINGS']
+
+        # Savings is credit-normal, so its balance is credits less debits
+        entry_totals = LedgerEntry.objects.filter(account_code=savings_code).aggregate(
+            credits=Coalesce(Sum('amount', filter=Q(entry_type='CREDIT')), ZERO),
+            debits=Coalesce(Sum('amount', filter=Q(entry_type='DEBIT')), ZERO)
+        )
+        run.ledger_entries_balance = entry_totals['credits'] - entry_totals['debits']
+        run.ledger_balance = LedgerService.get_current_balance(savings_code)
+        run.savings_total = SavingsAccount.objects.aggregate(total=Coalesce(Sum('balance'), ZERO))['total']
+        run.difference = run.ledger_balance - run.savings_total
+
+        breaks = []
+        if run.ledger_balance != run.ledger_entries_balance:
+            breaks.append(ReconciliationBreak(
+                run=run,
+                break_type='CONTROL_TOTAL',
+                expected=run.ledger_entries_balance,
+                actual=run.ledger_balance,
+                description=f"Running balance of account {savings_code} differs from its ledger entries"
+            ))
+        if run.difference:
+            breaks.append(ReconciliationBreak(
+                run=run,
+                break_type='CONTROL_TOTAL',
+                expected=run.savings_total,
+                actual=run.ledger_balance,
+                description=f"Account {savings_code} differs from the sum of savings account balances"
+            ))
+
+        run.break_count = ReconciliationService._save_breaks(run, breaks)
+        run.break_count += ReconciliationService._save_breaks(run, ReconciliationService._chain_breaks(run))
+        run.break_count += ReconciliationService._save_breaks(run, ReconciliationService._account_breaks(run))
+
+        run.status = 'BREAKS' if run.break_count else 'BALANCED'
+        run.completed_at = timezone.now()
+        run.save()
+
+    @staticmethod
+    def _chain_breaks(run: ReconciliationRun) -> Iterator[ReconciliationBreak]:
+        """Savings transactions whose balance_after is not the previous one plus their amount."""
+        chain_order = {'partition_by': [F('account_id')], 'order_by': [F('date').asc(), F('id').asc()]}
+        signed_amount = Case(
+            When(transaction_type__in=SavingsTransaction.DEBIT_TYPES, then=-F('amount')),
+            default=F('amount'),
+            output_field=MONEY
+        )
+        rows = SavingsTransaction.objects.annotate(
+            expected=Coalesce(Window(Lag('balance_after'), **chain_order), ZERO) + signed_amount
+        ).filter(~Q(balance_after=F('expected'))).values_list('id', 'account_id', 'expected', 'balance_after')
+
+        for transaction_id, account_id, expected, actual in rows.iterator(chunk_size=ReconciliationService.BATCH_SIZE):
+            yield ReconciliationBreak(
+                run=run,
+                break_type='CHAIN',
+                savings_account_id=account_id,
+                savings_transaction_id=transaction_id,
+                expected=expected,
+                actual=actual,
+                description=f"balance_after of savings transaction {transaction_id} breaks the chain"
+            )
+
+    @staticmethod
+    def _account_breaks(run: ReconciliationRun) -> Iterator[ReconciliationBreak]:
+        """Savings accounts whose balance is not the balance_after of their latest transaction."""
+        latest = SavingsTransaction.objects.filter(account_id=OuterRef('pk')).order_by('-date', '-id')
+        rows = SavingsAccount.objects.annotate(
+            expected=Coalesce(Subquery(latest.values('balance_after')[:1]), ZERO)
+        ).filter(~Q(balance=F('expected'))).values_list('id', 'expected', 'balance')
+
+        for account_id, expected, actual in rows.iterator(chunk_size=ReconciliationService.BATCH_SIZE):
+            yield ReconciliationBreak(
+                run=run,
+                break_type='ACCOUNT_BALANCE',
+                savings_account_id=account_id,
+                expected=expected,
+                actual=actual,
+                description=f"Balance of savings account {account_id} differs from its transactions"
+            )
+
+    @staticmethod
+    def _save_breaks(run: ReconciliationRun, breaks: Iterable[ReconciliationBreak]) -> int:
+        saved = 0
+        batch = []
+        for item in breaks:
+            batch.append(item)
+            if len(batch) >= ReconciliationService.BATCH_SIZE:
+                ReconciliationBreak.objects.bulk_create(batch)
+                saved += len(batch)
+                batch = []
+        ReconciliationBreak.objects.bulk_create(batch)
+        return saved + len(batch)
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ChartOfAccounts
+from .services.chart_service import ChartOfAccountsService
+
+
+@receiver(post_save, sender=ChartOfAccounts)
+@receiver(post_delete, sender=ChartOfAccounts)
+def chart_of_accounts_changed(sender, instance, **kwargs):
+    # Other processes must not reload before the change is visible to them
+    transaction.on_commit(ChartOfAccountsService.invalidate)
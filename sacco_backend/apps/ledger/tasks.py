@@ -0,0 +1,29 @@
+# apps/ledger/tasks.py
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from apps.ledger.services.partition_service import LedgerPartitionService
+from apps.ledger.services.reconciliation_service import ReconciliationService
+from shared.services.ledger_service import LedgerService
+
+
+@shared_task
+def create_daily_balance_checkpoints():
+    # Only checkpoint closed days; today's postings are still arriving
+    yesterday = timezone.localdate() - timedelta(days=1)
+    return LedgerService.create_checkpoints_through(yesterday)
+
+
+@shared_task
+def create_ledger_partitions():
+    if LedgerPartitionService.is_supported():
+        return LedgerPartitionService.ensure_partitions()
+    return []
+
+
+@shared_task
+def reconcile_savings_ledger():
+    run = ReconciliationService.run()
+    return {'run_id': run.id, 'status': run.status, 'breaks': run.break_count}
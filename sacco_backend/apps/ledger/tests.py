@@ -1,13 +1,31 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+import csv
+import gzip
+import io
+import os
+import tempfile
+import zlib
+
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.utils import timezone
 from decimal import Decimal
-from datetime import date
+from datetime import date, timedelta
+from unittest.mock import patch
 
 from apps.authentication.models import Role
 from apps.members.models import Member
+from apps.savings.models import SavingsAccount, SavingsTransaction
+from apps.savings.services.transaction_service import SavingsTransactionService
 from apps.transactions.models import Transaction
-from apps.ledger.models import LedgerEntry
-from shared.services.ledger_service import LedgerService
+from apps.ledger.models import AccountBalance, AccountBalanceCheckpoint, ChartOfAccounts, LedgerEntry
+from apps.ledger.serializers import ChartOfAccountsSerializer
+from apps.ledger.services.chart_service import ChartOfAccountsService
+from apps.ledger.services.export_service import LedgerExportService
+from apps.ledger.services.integrity_service import LedgerIntegrityService
+from apps.ledger.services.partition_service import LedgerPartitionService
+from apps.ledger.services.reconciliation_service import ReconciliationService
+from shared.services.ledger_service import Journal, LedgerService
 
 User = get_user_model()
 
@@ -128,4 +146,377 @@ class LedgerEntryModelTest(TestCase):
         # Verify FEE credit entry
         fee_entry = entries.get(account_code=LedgerService.ACCOUNT_CODES['FEES_INCOME'])
         self.assertEqual(fee_entry.entry_type, 'CREDIT')
-        self.assertEqual(fee_entry.amount, Decimal('1000'))
\ No newline at end of file
+        self.assertEqual(fee_entry.amount, Decimal('1000'))
+
+    def test_postings_maintain_account_balances(self):
+        deposit = Transaction.objects.create(
+            transaction_ref='TXN20240101003',
+            member=self.member,
+            transaction_type='DEPOSIT',
+            amount=Decimal('50000'),
+            payment_method='CASH',
+            status='COMPLETED'
+        )
+        withdrawal = Transaction.objects.create(
+            transaction_ref='TXN20240101004',
+            member=self.member,
+            transaction_type='WITHDRAWAL',
+            amount=Decimal('20000'),
+            payment_method='CASH',
+            status='COMPLETED'
+        )
+
+        LedgerService.create_deposit_entries(deposit, Decimal('1000'))
+        LedgerService.create_withdrawal_entries(withdrawal, Decimal('500'))
+
+        cash = AccountBalance.objects.get(account_code=LedgerService.ACCOUNT_CODES['CASH'])
+        self.assertEqual(cash.balance, Decimal('30000'))
+        self.assertEqual(cash.debit_total, Decimal('50000'))
+        self.assertEqual(cash.credit_total, Decimal('20000'))
+
+        savings = AccountBalance.objects.get(account_code=LedgerService.ACCOUNT_CODES['SAVINGS'])
+        self.assertEqual(savings.balance, Decimal('28500'))  # 49000 credited, 20500 debited
+
+        fees = AccountBalance.objects.get(account_code=LedgerService.ACCOUNT_CODES['FEES_INCOME'])
+        self.assertEqual(fees.balance, Decimal('1500'))
+
+        savings_leg = LedgerEntry.objects.get(transaction=withdrawal, account_code=LedgerService.ACCOUNT_CODES['SAVINGS'])
+        self.assertEqual(savings_leg.balance_after, Decimal('28500'))
+        self.assertEqual(LedgerService.get_current_balance(LedgerService.ACCOUNT_CODES['CASH']), Decimal('30000'))
+
+    def test_balance_from_checkpoint(self):
+        two_days_ago = timezone.now() - timedelta(days=2)
+        LedgerEntry.objects.update(created_at=two_days_ago)
+        yesterday = timezone.localdate() - timedelta(days=1)
+
+        LedgerService.create_checkpoints_through(yesterday)
+
+        checkpoint = AccountBalanceCheckpoint.objects.get(account_code='1000', period_end=yesterday)
+        self.assertEqual(checkpoint.debit_total, Decimal('100000'))
+
+        LedgerEntry.objects.create(
+            transaction=self.transaction,
+            account_code='1000',
+            entry_type='CREDIT',
+            amount=Decimal('30000'),
+            balance_after=Decimal('70000'),
+            description='Cash withdrawal'
+        )
+
+        self.assertEqual(LedgerService.get_account_balance('1000'), Decimal('70000'))
+        self.assertEqual(LedgerService.get_account_balance('1000', yesterday), Decimal('100000'))
+        self.assertEqual(
+            LedgerService.get_account_balance('1000', timezone.localdate(two_days_ago) - timedelta(days=1)),
+            Decimal('0')
+        )
+
+    def test_checkpoint_command_rejects_open_days(self):
+        for day in (timezone.localdate(), timezone.localdate() + timedelta(days=1)):
+            with self.assertRaises(CommandError):
+                call_command('create_balance_checkpoints', date=day.isoformat(), stdout=io.StringIO())
+        self.assertFalse(AccountBalanceCheckpoint.objects.exists())
+
+        LedgerEntry.objects.update(created_at=timezone.now() - timedelta(days=2))
+        call_command('create_balance_checkpoints', stdout=io.StringIO())
+        self.assertTrue(AccountBalanceCheckpoint.objects.filter(
+            period_end=timezone.localdate() - timedelta(days=1)
+        ).exists())
+
+    def test_generate_trial_balance(self):
+        two_days_ago = timezone.now() - timedelta(days=2)
+        LedgerEntry.objects.filter(account_code='2000').update(created_at=two_days_ago)
+        LedgerService.create_checkpoints_through(timezone.localdate() - timedelta(days=1))
+
+        today = timezone.localdate()
+        trial_balance = LedgerService.generate_trial_balance(today, today)
+
+        accounts = {account['account_code']: account for account in trial_balance['accounts']}
+        self.assertEqual(list(accounts), ['1000'])
+        self.assertEqual(accounts['1000']['account_name'], 'Cash')
+        self.assertEqual(accounts['1000']['debit_total'], Decimal('100000'))
+
+        trial_balance = LedgerService.generate_trial_balance(today - timedelta(days=2), today)
+        accounts = {account['account_code']: account for account in trial_balance['accounts']}
+        self.assertEqual(accounts['2000']['account_name'], 'Member Savings')
+        self.assertEqual(accounts['2000']['credit_total'], Decimal('100000'))
+        self.assertEqual(trial_balance['totals']['net_balance'], Decimal('0'))
+
+    @override_settings(LEDGER_SHARDED_ACCOUNTS={'1000': 4})
+    def test_sharded_account_postings(self):
+        deposits = [
+            Transaction.objects.create(
+                transaction_ref=f'TXN2024010110{index}',
+                member=self.member,
+                transaction_type='DEPOSIT',
+                amount=Decimal('10000'),
+                payment_method='CASH',
+                status='COMPLETED'
+            )
+            for index in range(2)
+        ]
+        for deposit in deposits:
+            LedgerService.create_deposit_entries(deposit, Decimal('0'))
+
+        cash_buckets = AccountBalance.objects.filter(account_code='1000')
+        self.assertEqual(
+            sorted(cash_buckets.values_list('bucket', flat=True)),
+            sorted(deposit.id % 4 for deposit in deposits)
+        )
+        self.assertEqual(LedgerService.get_current_balance('1000'), Decimal('20000'))
+        self.assertEqual(AccountBalance.objects.get(account_code='2000').bucket, 0)
+
+        for deposit in deposits:
+            cash_leg = LedgerEntry.objects.get(transaction=deposit, account_code='1000')
+            self.assertEqual(cash_leg.bucket, deposit.id % 4)
+            self.assertEqual(cash_leg.balance_after, Decimal('10000'))
+
+    def test_journal_posts_many_transactions(self):
+        deposits = [
+            Transaction.objects.create(
+                transaction_ref=f'TXN2024010120{index}',
+                member=self.member,
+                transaction_type='DEPOSIT',
+                amount=Decimal('10000'),
+                payment_method='CASH',
+                status='COMPLETED'
+            )
+            for index in range(3)
+        ]
+
+        journal = Journal()
+        for deposit in deposits:
+            LedgerService.add_deposit_legs(journal, deposit, Decimal('100'))
+        entries = journal.post()
+
+        self.assertEqual(len(entries), 9)
+        self.assertEqual(LedgerEntry.objects.filter(transaction__in=deposits).count(), 9)
+        cash_legs = LedgerEntry.objects.filter(transaction__in=deposits, account_code='1000').order_by('id')
+        self.assertEqual(
+            [leg.balance_after for leg in cash_legs],
+            [Decimal('10000'), Decimal('20000'), Decimal('30000')]
+        )
+
+    def test_unbalanced_journal_is_rejected(self):
+        journal = Journal().debit(self.transaction, '1000', Decimal('500'), 'Cash').credit(
+            self.transaction, '2000', Decimal('400'), 'Savings'
+        )
+
+        with self.assertRaises(ValueError):
+            journal.post()
+        self.assertFalse(AccountBalance.objects.exists())
+
+    def test_export_csv_gzip_with_resume(self):
+        rows = LedgerExportService.get_rows(account_code='1000')
+        progress = {}
+        data = gzip.decompress(b''.join(LedgerExportService.iter_csv_gzip(rows, progress=progress)))
+
+        lines = list(csv.reader(io.StringIO(data.decode())))
+        self.assertEqual(lines[0], LedgerExportService.HEADER)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1][2], 'TXN20240101001')
+        self.assertEqual(progress, {'rows': 1, 'last_id': self.debit_entry.id})
+
+        resumed = LedgerExportService.get_rows(after_id=self.debit_entry.id)
+        self.assertEqual([row[0] for row in resumed], [self.credit_entry.id])
+
+    @patch.object(LedgerExportService, 'CSV_FLUSH_BYTES', 1)
+    def test_export_progress_counts_only_written_rows(self):
+        progress = {}
+        chunks = LedgerExportService.iter_csv_gzip(LedgerExportService.get_rows(), progress=progress)
+
+        first = next(chunks)
+        # Handed over but not yet written: an interruption here has exported nothing
+        self.assertEqual(progress, {'rows': 0, 'last_id': None})
+        next(chunks)
+        self.assertEqual(progress, {'rows': 1, 'last_id': self.debit_entry.id})
+        # What was written so far decompresses on its own, through the row progress names
+        lines = list(csv.reader(io.StringIO(zlib.decompressobj(wbits=31).decompress(first).decode())))
+        self.assertEqual([line[0] for line in lines], ['id', str(self.debit_entry.id)])
+
+    def test_export_command_resumes_into_a_new_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first, rest = os.path.join(directory, 'ledger.csv.gz'), os.path.join(directory, 'rest.csv.gz')
+            call_command('export_ledger', first, '--account-code', '1000', stdout=io.StringIO())
+            with self.assertRaises(CommandError):
+                call_command('export_ledger', first, '--after-id', str(self.debit_entry.id), stdout=io.StringIO())
+
+            call_command('export_ledger', rest, '--after-id', str(self.debit_entry.id), stdout=io.StringIO())
+            with gzip.open(rest, 'rt') as file:
+                self.assertEqual([line[0] for line in csv.reader(file)], ['id', str(self.credit_entry.id)])
+            self.assertEqual(sorted(os.listdir(directory)), ['ledger.csv.gz', 'rest.csv.gz'])
+
+
+    def test_integrity_verifier_detects_tampering(self):
+        # Entries created directly bypass posting and carry no hash
+        self.assertEqual(
+            {error['type'] for error in LedgerIntegrityService.verify()['errors']},
+            {'unsealed_entry'}
+        )
+        LedgerEntry.objects.all().delete()
+
+        journal = Journal()
+        for index in range(3):
+            deposit = Transaction.objects.create(
+                transaction_ref=f'TXN2024010130{index}',
+                member=self.member,
+                transaction_type='DEPOSIT',
+                amount=Decimal('10000'),
+                payment_method='CASH',
+                status='COMPLETED'
+            )
+            LedgerService.add_deposit_legs(journal, deposit, Decimal('100'))
+        entries = journal.post()
+
+        report = LedgerIntegrityService.verify()
+        self.assertEqual(report['errors'], [])
+        self.assertEqual(report['entries'], 9)
+
+        LedgerEntry.objects.filter(id=entries[0].id).update(amount=Decimal('9000'))
+        errors = LedgerIntegrityService.verify()['errors']
+        self.assertIn('hash_mismatch', [error['type'] for error in errors])
+        self.assertIn(
+            entries[0].transaction_id,
+            [error['transaction_id'] for error in errors if error['type'] == 'unbalanced_transaction']
+        )
+
+        LedgerEntry.objects.filter(id=entries[0].id).update(amount=Decimal('10000'))
+        LedgerEntry.objects.filter(id=entries[-1].id).delete()
+        errors = LedgerIntegrityService.verify()['errors']
+        self.assertIn('head_mismatch', [error['type'] for error in errors])
+
+    def test_posted_account_keeps_its_code_and_normal_balance(self):
+        cash = ChartOfAccounts.objects.get(code='1000')
+
+        def update(account, **data):
+            return ChartOfAccountsSerializer(account, data=data, partial=True)
+
+        serializer = update(cash, code='1001', normal_balance='CREDIT')
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {'code', 'normal_balance'})
+        self.assertTrue(update(cash, name='Cash at Hand', normal_balance='DEBIT').is_valid())
+
+        unused = ChartOfAccounts.objects.create(code='3060', name='Unused', account_type='ASSET', normal_balance='DEBIT')
+        self.assertTrue(update(unused, code='3061', normal_balance='CREDIT').is_valid())
+
+    def test_chart_of_accounts_cache_and_rollup(self):
+        self.addCleanup(ChartOfAccountsService.invalidate)
+        ChartOfAccountsService.get_chart()
+        with self.assertNumQueries(0):
+            self.assertEqual(ChartOfAccountsService.get_account_name('2000'), 'Member Savings')
+            self.assertFalse(ChartOfAccountsService.is_debit_normal('2000'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            assets = ChartOfAccounts.objects.create(
+                code='1', name='Assets', account_type='ASSET', normal_balance='DEBIT'
+            )
+            ChartOfAccounts.objects.filter(code__in=['1000', '1100']).update(parent=assets)
+            # A mobile-money float account outside the 1xxx range is still debit-normal
+            ChartOfAccounts.objects.create(
+                code='3050', name='Mobile Money Float', account_type='ASSET', normal_balance='DEBIT', parent=assets
+            )
+
+        self.assertEqual(ChartOfAccountsService.get_descendants('1'), ['1000', '1100', '3050'])
+        self.assertTrue(ChartOfAccountsService.is_debit_normal('3050'))
+
+        deposit = Transaction.objects.create(
+            transaction_ref='TXN20240101400',
+            member=self.member,
+            transaction_type='DEPOSIT',
+            amount=Decimal('7000'),
+            payment_method='MOBILE_MONEY',
+            status='COMPLETED'
+        )
+        Journal().debit(deposit, '3050', Decimal('7000'), 'Float').credit(
+            deposit, '2000', Decimal('7000'), 'Savings'
+        ).post()
+        self.assertEqual(AccountBalance.objects.get(account_code='3050').balance, Decimal('7000'))
+
+        today = timezone.localdate()
+        trial_balance = LedgerService.generate_trial_balance(today, today, rollup=True)
+        accounts = {acc['account_code']: acc for acc in trial_balance['accounts']}
+        self.assertEqual(accounts['1']['debit_total'], Decimal('107000'))
+        self.assertEqual(accounts['3050']['parent_code'], '1')
+        self.assertEqual(trial_balance['totals']['total_debits'], Decimal('107000'))
+
+    def test_savings_reconciliation(self):
+        LedgerEntry.objects.all().delete()
+        account = SavingsAccount.objects.create(
+            member=self.member,
+            account_number='SAV-RECON-1',
+            account_type='REGULAR',
+            interest_rate=Decimal('3.5'),
+            status='ACTIVE',
+            minimum_balance=Decimal('0')
+        )
+        for amount in (Decimal('5000'), Decimal('2000')):
+            SavingsTransactionService.process_transaction(account.id, 'DEPOSIT', amount)
+        LedgerService.create_deposit_entries(self.transaction, Decimal('93000'))  # savings leg of 7000
+
+        run = ReconciliationService.run()
+        self.assertEqual(run.status, 'BALANCED')
+        self.assertEqual(run.ledger_balance, Decimal('7000'))
+        self.assertEqual(run.savings_total, Decimal('7000'))
+
+        first = SavingsTransaction.objects.filter(account=account).order_by('id').first()
+        SavingsTransaction.objects.filter(id=first.id).update(balance_after=Decimal('4000'))
+        SavingsAccount.objects.filter(id=account.id).update(balance=Decimal('7500'))
+
+        run = ReconciliationService.run()
+        self.assertEqual(run.status, 'BREAKS')
+        self.assertEqual(run.difference, Decimal('-500'))
+        self.assertEqual(
+            sorted(run.breaks.values_list('break_type', 'savings_transaction_id')),
+            sorted([
+                ('ACCOUNT_BALANCE', None),
+                ('CHAIN', first.id),
+                ('CHAIN', first.id + 1),
+                ('CONTROL_TOTAL', None)
+            ])
+        )
+
+class LedgerPartitionServiceTest(SimpleTestCase):
+    def test_partition_naming_and_bounds(self):
+        self.assertEqual(LedgerPartitionService.partition_name(date(2024, 12, 1)), 'ledger_ledgerentry_p2024_12')
+
+        start, end = LedgerPartitionService.partition_bounds(date(2024, 12, 15))
+        self.assertEqual(timezone.localtime(start).date(), date(2024, 12, 1))
+        self.assertEqual(timezone.localtime(end).date(), date(2025, 1, 1))
+        self.assertEqual(LedgerPartitionService._partition_month('ledger_ledgerentry_p2025_01'), date(2025, 1, 1))
+        self.assertIsNone(LedgerPartitionService._partition_month('ledger_ledgerentry_default'))
+
+    def test_new_partition_takes_over_rows_from_the_default_partition(self):
+        executed = []
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql, params=None):
+                executed.append(sql)
+
+            def fetchone(self):
+                # The default partition holds rows for the first month only
+                return (len([sql for sql in executed if sql.startswith('SELECT EXISTS')]) == 1,)
+
+        existing = ['ledger_ledgerentry_default', 'ledger_ledgerentry_p2024_12']
+        with patch.object(LedgerPartitionService, 'list_partitions', return_value=existing), \
+                patch('apps.ledger.services.partition_service.connection') as connection, \
+                patch('apps.ledger.services.partition_service.transaction.atomic'):
+            connection.cursor.return_value = Cursor()
+            created = LedgerPartitionService.ensure_partitions(2, from_month=date(2024, 11, 1))
+
+        self.assertEqual(created, ['ledger_ledgerentry_p2024_11', 'ledger_ledgerentry_p2025_01'])
+        statements = [sql.split(' FOR VALUES')[0].split(' WHERE')[0] for sql in executed]
+        self.assertEqual(statements, [
+            'SELECT EXISTS (SELECT 1 FROM "ledger_ledgerentry_default"',
+            'ALTER TABLE "ledger_ledgerentry" DETACH PARTITION "ledger_ledgerentry_default"',
+            'CREATE TABLE "ledger_ledgerentry_p2024_11" PARTITION OF "ledger_ledgerentry"',
+            'INSERT INTO "ledger_ledgerentry" SELECT * FROM "ledger_ledgerentry_default"',
+            'DELETE FROM "ledger_ledgerentry_default"',
+            'ALTER TABLE "ledger_ledgerentry" ATTACH PARTITION "ledger_ledgerentry_default" DEFAULT',
+            'SELECT EXISTS (SELECT 1 FROM "ledger_ledgerentry_default"',
+            'CREATE TABLE IF NOT EXISTS "ledger_ledgerentry_p2025_01" PARTITION OF "ledger_ledgerentry"',
+        ])
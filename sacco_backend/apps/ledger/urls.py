@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import LedgerEntryViewSet
+from .views import ChartOfAccountsViewSet, LedgerEntryViewSet
 
 router = DefaultRouter()
 
 router.register(r'ledgers',LedgerEntryViewSet,basename='ledgers')
+router.register(r'chart-of-accounts', ChartOfAccountsViewSet, basename='chart-of-accounts')
 
 urlpatterns = [
     path('',include(router.urls))
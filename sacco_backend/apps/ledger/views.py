@@ -1,10 +1,15 @@
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from apps.ledger.models import LedgerEntry
-from apps.ledger.serializers import LedgerEntrySerializer
+from apps.authentication.permissions import HasRolePermission
+from apps.ledger.models import ChartOfAccounts, LedgerEntry
+from apps.ledger.serializers import ChartOfAccountsSerializer, LedgerEntrySerializer
+from apps.ledger.services.export_service import LedgerExportService
 from shared.services.ledger_service import LedgerService
 
 
@@ -37,13 +42,79 @@ class LedgerEntryViewSet(viewsets.ModelViewSet):
         if not account_code:
             return Response({'error': 'Account code is required'}, status=400)
 
-        balance = LedgerService.get_account_balance(account_code)
-        return Response({'balance': balance})
+        as_of_date = request.query_params.get('as_of_date')
+        if as_of_date:
+            as_of_date = parse_date(as_of_date)
+            if not as_of_date:
+                return Response({'error': 'as_of_date must be YYYY-MM-DD'}, status=400)
+
+        balance = LedgerService.get_account_balance(account_code, as_of_date)
+        return Response({'balance': balance, 'as_of_date': as_of_date})
 
     @action(detail=False, methods=['get'])
     def trial_balance(self, request):
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
+        start_date = parse_date(request.query_params.get('start_date') or '')
+        end_date = parse_date(request.query_params.get('end_date') or '')
+        if not start_date or not end_date:
+            return Response({'error': 'start_date and end_date (YYYY-MM-DD) are required'}, status=400)
 
-        trial_balance = LedgerService.generate_trial_balance(start_date, end_date)
+        rollup = request.query_params.get('rollup', '').lower() in ['1', 'true']
+        trial_balance = LedgerService.generate_trial_balance(start_date, end_date, rollup=rollup)
         return Response(trial_balance)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the general ledger as gzip CSV (default) or Parquet."""
+        if request.user.role.name not in ['ACCOUNTANT', 'ADMIN']:
+            return Response({'error': 'Not permitted to export the ledger'}, status=403)
+
+        # 'format' is reserved by DRF for renderer negotiation
+        export_format = request.query_params.get('format_type', 'csv')
+        if export_format not in ['csv', 'parquet']:
+            return Response({'error': 'format_type must be csv or parquet'}, status=400)
+
+        dates = {}
+        for param in ('start_date', 'end_date'):
+            value = request.query_params.get(param)
+            if value:
+                dates[param] = parse_date(value)
+                if not dates[param]:
+                    return Response({'error': f'{param} must be YYYY-MM-DD'}, status=400)
+
+        after_id = request.query_params.get('after_id')
+        if after_id and not after_id.isdigit():
+            return Response({'error': 'after_id must be an integer'}, status=400)
+
+        rows = LedgerExportService.get_rows(
+            account_code=request.query_params.get('account_code'),
+            after_id=int(after_id) if after_id else None,
+            **dates
+        )
+
+        filename = f"general_ledger_{timezone.now().strftime('%Y%m%d%H%M%S')}"
+        if export_format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return Response({'error': 'Parquet export is not available on this server'}, status=400)
+            response = StreamingHttpResponse(
+                LedgerExportService.iter_parquet(rows),
+                content_type='application/vnd.apache.parquet'
+            )
+            filename += '.parquet'
+        else:
+            response = StreamingHttpResponse(LedgerExportService.iter_csv_gzip(rows), content_type='application/gzip')
+            filename += '.csv.gz'
+
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ChartOfAccountsViewSet(viewsets.ModelViewSet):
+    queryset = ChartOfAccounts.objects.select_related('parent')
+    serializer_class = ChartOfAccountsSerializer
+    permission_classes = [IsAuthenticated, HasRolePermission]
+    required_role = 'ADMIN'
+    # Ledger entries reference account codes; retire accounts with is_active instead. The code
+    # and normal balance of an account with postings are locked (see ChartOfAccountsSerializer)
+    http_method_names = ['get', 'post', 'put', 'patch', 'head', 'options']
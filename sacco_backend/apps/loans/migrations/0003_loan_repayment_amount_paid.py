@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-16 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loanrepayment',
+            name='amount_paid',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+    ]
@@ -94,6 +94,8 @@ class LoanRepayment(models.Model):
     principal_component = models.DecimalField(max_digits=12, decimal_places=2)
     interest_component = models.DecimalField(max_digits=12, decimal_places=2)
     penalty_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Paid so far; an instalment stays PENDING until this reaches ``amount``
+    amount_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     payment_date = models.DateTimeField(null=True)
     status = models.CharField(max_length=20, choices=PAYMENT_STATUS, default='PENDING')
     payment_method = models.CharField(max_length=20, null=True)
@@ -5,16 +5,15 @@ from django.db.models import Sum
 
 from apps.loans.models import Loan
 from apps.savings.models import SavingsAccount
-from apps.transactions.models import Transaction
+from apps.transactions.services.rollup_service import TransactionRollupService
+from shared.utils.date_utils import as_date
 
 
 class ReportGenerator:
     @staticmethod
     def generate_financial_report(start_date: datetime, end_date: datetime) -> Dict[str, Any]:
-        # Query data
-        transactions = Transaction.objects.filter(
-            created_at__range=[start_date, end_date]
-        )
+        # Query data; transaction totals come from the daily rollups
+        transactions = TransactionRollupService.summarize(as_date(start_date), as_date(end_date))
         loans = Loan.objects.filter(
             created_at__range=[start_date, end_date]
         )
@@ -23,21 +22,15 @@ class ReportGenerator:
         )
 
         # Calculate metrics
-        total_deposits = transactions.filter(
-            transaction_type='DEPOSIT'
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        total_deposits = transactions.get('DEPOSIT', {}).get('total') or 0
 
-        total_withdrawals = transactions.filter(
-            transaction_type='WITHDRAWAL'
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        total_withdrawals = transactions.get('WITHDRAWAL', {}).get('total') or 0
 
         loan_disbursements = loans.filter(
             status='DISBURSED'
         ).aggregate(total=Sum('amount'))['total'] or 0
 
-        loan_repayments = transactions.filter(
-            transaction_type='LOAN_REPAYMENT'
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        loan_repayments = transactions.get('LOAN_REPAYMENT', {}).get('total') or 0
 
         # Create report data
         report_data = {
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.26 on 2026-10-16 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savingstransaction',
+            index=models.Index(fields=['account', 'date', 'id'], name='savings_sav_account_6e1b1f_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-17 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings', '0002_savings_transaction_chain_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='savingstransaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('DEPOSIT', 'Deposit'), ('WITHDRAWAL', 'Withdrawal'), ('INTEREST', 'Interest Credit'), ('CHARGE', 'Service Charge'), ('TRANSFER_IN', 'Transfer In'), ('TRANSFER_OUT', 'Transfer Out'), ('REVERSAL_CREDIT', 'Reversal Credit'), ('REVERSAL_DEBIT', 'Reversal Debit')], max_length=20),
+        ),
+    ]
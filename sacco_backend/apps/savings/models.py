@@ -32,8 +32,14 @@ class SavingsTransaction(models.Model):
         ('DEPOSIT', 'Deposit'),
         ('WITHDRAWAL', 'Withdrawal'),
         ('INTEREST', 'Interest Credit'),
-        ('CHARGE', 'Service Charge')
+        ('CHARGE', 'Service Charge'),
+        ('TRANSFER_IN', 'Transfer In'),
+        ('TRANSFER_OUT', 'Transfer Out'),
+        ('REVERSAL_CREDIT', 'Reversal Credit'),
+        ('REVERSAL_DEBIT', 'Reversal Debit')
     ]
+    # Types that reduce the account balance; the rest add to it
+    DEBIT_TYPES = ['WITHDRAWAL', 'CHARGE', 'TRANSFER_OUT', 'REVERSAL_DEBIT']
 
     account = models.ForeignKey(SavingsAccount, on_delete=models.CASCADE)
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
@@ -42,6 +48,12 @@ class SavingsTransaction(models.Model):
     date = models.DateTimeField(auto_now_add=True)
     reference = models.CharField(max_length=50, unique=True)
 
+    class Meta:
+        indexes = [
+            # Walks each account's balance_after chain in posting order
+            models.Index(fields=['account', 'date', 'id'])
+        ]
+
 
 class InterestRate(models.Model):
     account_type = models.CharField(max_length=20)
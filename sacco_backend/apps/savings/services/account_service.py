@@ -1,5 +1,4 @@
 # apps/savings/services/account_service.py
-from datetime import datetime
 from decimal import Decimal
 
 from django.db import transaction
@@ -7,6 +6,7 @@ from django.core.exceptions import ValidationError
 
 from apps.members.models import Member
 from apps.savings.models import SavingsAccount, InterestRate, SavingsTransaction
+from shared.services.reference_service import ReferenceService
 
 
 class SavingsAccountService:
@@ -62,7 +62,7 @@ class SavingsAccountService:
                 transaction_type='DEPOSIT',
                 amount=initial_deposit,
                 balance_after=initial_deposit,
-                reference=f"INIT_{account_number}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                reference=ReferenceService.generate('ACCOUNT_OPENING')
             )
 
         return account
@@ -84,7 +84,7 @@ class SavingsAccountService:
                 transaction_type='CHARGE',
                 amount=Decimal('0'),
                 balance_after=account.balance,
-                reference=f"FREEZE_{account.account_number}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                reference=ReferenceService.generate('ACCOUNT_FREEZE')
             )
         except SavingsAccount.DoesNotExist:
             raise ValueError("Account not found")
@@ -106,7 +106,7 @@ class SavingsAccountService:
                 transaction_type='CHARGE',
                 amount=Decimal('0'),
                 balance_after=account.balance,
-                reference=f"UNFREEZE_{account.account_number}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                reference=ReferenceService.generate('ACCOUNT_UNFREEZE')
             )
         except SavingsAccount.DoesNotExist:
             raise ValueError("Account not found")
@@ -130,7 +130,7 @@ class SavingsAccountService:
                     transaction_type='WITHDRAWAL',
                     amount=final_balance,
                     balance_after=Decimal('0'),
-                    reference=f"CLOSE_{account.account_number}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                    reference=ReferenceService.generate('ACCOUNT_CLOSURE')
                 )
                 account.balance = Decimal('0')
             
@@ -198,13 +198,7 @@ class SavingsAccountService:
             'CHILDREN': 'CHD',
             'GROUP': 'GRP'
         }
-        prefix = f"{prefix_map.get(account_type, 'SAV')}{datetime.now().year}"
-        
-        count = SavingsAccount.objects.filter(
-            account_number__startswith=prefix
-        ).count()
-        
-        return f"{prefix}{str(count + 1).zfill(6)}"
+        return ReferenceService.generate_account_number(prefix_map.get(account_type, 'SAV'))
 
     @staticmethod
     def get_account_summary(member_id: int) -> dict:
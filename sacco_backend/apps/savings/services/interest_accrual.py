@@ -0,0 +1,179 @@
+# apps/savings/services/interest_accrual.py
+import logging
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Callable, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, DecimalField, F, Q, Value, When
+from django.utils import timezone
+
+from apps.transactions.models import Transaction
+from apps.transactions.services.rollup_service import TransactionRollupService
+from shared.services.ledger_service import Journal, LedgerService
+from shared.services.reference_service import ReferenceService
+from shared.utils.date_utils import month_start
+from ..models import SavingsAccount, SavingsTransaction
+
+logger = logging.getLogger(__name__)
+
+# (account id, member id, account number, balance in cents, interest in cents)
+Credit = Tuple[int, int, str, int, int]
+
+
+class InterestAccrualService:
+    """Credits a month's interest to every active savings account, a chunk of accounts at a time.
+
+    Each chunk locks the next CHUNK_SIZE accounts not yet credited for the month (in id
+    order), computes their interest on whole cents, moves all their balances in one
+    UPDATE ... FROM and bulk-inserts the INTEREST transactions, savings transactions and
+    ledger legs; then it commits. The same UPDATE stamps last_interest_date with a time
+    inside the month, so a run that stops halfway picks up where it left off and never
+    credits an account twice.
+    """
+
+    CHUNK_SIZE = 5000
+    # Accounts per CASE WHEN balance update where UPDATE ... FROM isn't available
+    UPDATE_BATCH_SIZE = 200
+    # Monthly interest in cents is balance (cents) x annual rate (hundredths of a percent) / 120000
+    RATE_DIVISOR = 100 * 100 * 12
+
+    @staticmethod
+    def accrue(as_of: Optional[date] = None, progress: Optional[Callable[[dict], None]] = None) -> dict:
+        """Credit the interest of as_of's month (default: this month); returns a summary of the run."""
+        period = month_start(as_of or timezone.localdate())
+        period_start, period_end = (
+            timezone.make_aware(datetime.combine(day, time.min)) for day in (period, month_start(period, 1))
+        )
+        summary = {'period': period.isoformat(), 'accounts': 0, 'credited': 0, 'interest_cents': 0}
+        last_id = 0
+        while True:
+            last_id, scanned, credits = InterestAccrualService._accrue_chunk(last_id, period, period_start, period_end)
+            if not scanned:
+                break
+            summary['accounts'] += scanned
+            summary['credited'] += len(credits)
+            summary['interest_cents'] += sum(credit[4] for credit in credits)
+            logger.info("Interest for %s: %s", period, summary)
+            if progress is not None:
+                progress(dict(summary))
+        return summary
+
+    @staticmethod
+    def monthly_interest_cents(balances: List[int], rates: List[int]) -> List[int]:
+        """Monthly interest on each balance (cents) at its annual rate (hundredths of a percent).
+
+        Rounded half up to the cent; overdrawn balances earn nothing.
+        """
+        half = InterestAccrualService.RATE_DIVISOR // 2
+        return [
+            (balance * rate + half) // InterestAccrualService.RATE_DIVISOR if balance > 0 and rate > 0 else 0
+            for balance, rate in zip(balances, rates)
+        ]
+
+    @staticmethod
+    @transaction.atomic
+    def _accrue_chunk(
+            last_id: int,
+            period: date,
+            period_start: datetime,
+            period_end: datetime
+    ) -> Tuple[int, int, List[Credit]]:
+        """Credit the next chunk after last_id; returns (last id seen, accounts seen, credits made)."""
+        rows = list(SavingsAccount.objects.select_for_update().filter(
+            Q(last_interest_date__isnull=True) | Q(last_interest_date__lt=period_start),
+            id__gt=last_id,
+            status='ACTIVE'
+        ).order_by('id').values_list(
+            'id', 'member_id', 'account_number', 'balance', 'interest_rate'
+        )[:InterestAccrualService.CHUNK_SIZE])
+        if not rows:
+            return last_id, 0, []
+
+        ids, member_ids, account_numbers, balances, rates = zip(*rows)
+        balances = [int(balance * 100) for balance in balances]
+        interest = InterestAccrualService.monthly_interest_cents(balances, [int(rate * 100) for rate in rates])
+        credits = [row for row in zip(ids, member_ids, account_numbers, balances, interest) if row[4] > 0]
+        if credits:
+            # A month credited after it ended is stamped with its last instant, so the next month still runs
+            credited_at = min(timezone.now(), period_end - timedelta(microseconds=1))
+            InterestAccrualService._apply_balances(credits, credited_at)
+            InterestAccrualService._record(credits, period, credited_at)
+        return ids[-1], len(rows), credits
+
+    @staticmethod
+    def _apply_balances(credits: List[Credit], credited_at: datetime) -> None:
+        amounts = [(account_id, Decimal(cents) / 100) for account_id, _, _, _, cents in credits]
+        if InterestAccrualService._can_update_from():
+            InterestAccrualService._update_from(amounts, credited_at)
+            return
+        for start in range(0, len(amounts), InterestAccrualService.UPDATE_BATCH_SIZE):
+            batch = amounts[start:start + InterestAccrualService.UPDATE_BATCH_SIZE]
+            SavingsAccount.objects.filter(id__in=[account_id for account_id, _ in batch]).update(
+                balance=F('balance') + Case(
+                    *[When(id=account_id, then=Value(amount)) for account_id, amount in batch],
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                ),
+                last_interest_date=Value(credited_at, output_field=DateTimeField())
+            )
+
+    @staticmethod
+    def _can_update_from() -> bool:
+        if connection.vendor == 'postgresql':
+            return True
+        return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 33)
+
+    @staticmethod
+    def _update_from(amounts: List[Tuple[int, Decimal]], credited_at: datetime) -> None:
+        # A VALUES list joined on id: one statement for the whole chunk, whatever its size.
+        # Both backends name the VALUES columns column1, column2
+        quote = connection.ops.quote_name
+        meta = SavingsAccount._meta
+        table = quote(meta.db_table)
+        balance = quote(meta.get_field('balance').column)
+        params = [connection.ops.adapt_datetimefield_value(credited_at)]
+        for account_id, amount in amounts:
+            params += [account_id, connection.ops.adapt_decimalfield_value(amount, 12, 2)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {balance} = {table}.{balance} + v.column2, "
+                f"{quote(meta.get_field('last_interest_date').column)} = %s "
+                f"FROM (VALUES {', '.join(['(%s, %s)'] * len(amounts))}) AS v "
+                f"WHERE {table}.{quote(meta.pk.column)} = v.column1",
+                params
+            )
+
+    @staticmethod
+    def _record(credits: List[Credit], period: date, credited_at: datetime) -> None:
+        references = ReferenceService.generate_many('INTEREST', len(credits))
+        description = f"Interest for {period:%B %Y}"
+        transactions = Transaction.objects.bulk_create([
+            Transaction(
+                transaction_ref=reference,
+                member_id=member_id,
+                transaction_type='INTEREST',
+                amount=Decimal(cents) / 100,
+                payment_method='INTERNAL',
+                status='COMPLETED',
+                processed_date=credited_at,
+                destination_account=account_number,
+                description=description
+            )
+            for reference, (_, member_id, account_number, _, cents) in zip(references, credits)
+        ], batch_size=LedgerService.BULK_BATCH_SIZE)
+        SavingsTransaction.objects.bulk_create([
+            SavingsTransaction(
+                account_id=account_id,
+                transaction_type='INTEREST',
+                amount=Decimal(cents) / 100,
+                balance_after=Decimal(balance + cents) / 100,
+                reference=reference
+            )
+            for reference, (account_id, _, _, balance, cents) in zip(references, credits)
+        ], batch_size=LedgerService.BULK_BATCH_SIZE)
+
+        journal = Journal()
+        for _transaction in transactions:
+            LedgerService.add_interest_legs(journal, _transaction)
+        journal.post()
+        TransactionRollupService.record(transactions)
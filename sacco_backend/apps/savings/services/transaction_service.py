@@ -1,13 +1,19 @@
 # apps/savings/services/transaction_service.py
-import uuid
 from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
 
 from django.db import transaction
 
 from apps.savings.models import SavingsTransaction, SavingsAccount
+from shared.services.reference_service import ReferenceService
+
+# (savings account id, transaction type, amount, reference), in posting order
+Movement = Tuple[int, str, Decimal, str]
 
 
 class SavingsTransactionService:
+    BATCH_SIZE = 1000
+
     @staticmethod
     @transaction.atomic
     def process_transaction(
@@ -19,7 +25,7 @@ class SavingsTransactionService:
     ) -> SavingsTransaction:
         account = SavingsAccount.objects.select_for_update().get(id=account_id)
 
-        if transaction_type == 'WITHDRAWAL':
+        if transaction_type in SavingsTransaction.DEBIT_TYPES:
             if account.balance - amount < account.minimum_balance:
                 raise ValueError("Insufficient funds")
             new_balance = account.balance - amount
@@ -34,9 +40,37 @@ class SavingsTransactionService:
             transaction_type=transaction_type,
             amount=amount,
             balance_after=new_balance,
-            reference=reference or f"TXN_{transaction_type}_{uuid.uuid4().hex[:8]}"
+            reference=reference or ReferenceService.generate('SAVINGS_TRANSACTION')
         )
 
+    @staticmethod
+    def record_movements(
+            movements: List[Movement],
+            balances: Optional[Dict[int, Decimal]] = None
+    ) -> List[SavingsTransaction]:
+        """Write the savings transactions for balance changes already applied to the accounts.
 
+        Each account's balance_after values are chained back from its balance now, passed
+        in ``balances`` or read, so this must run in the database transaction that moved
+        the balances while it still holds their row locks.
+        """
+        movements = [movement for movement in movements if movement[2]]
+        if not movements:
+            return []
+        balances = dict(balances) if balances is not None else dict(SavingsAccount.objects.filter(
+            id__in={movement[0] for movement in movements}
+        ).values_list('id', 'balance'))
 
+        rows = []
+        for account_id, transaction_type, amount, reference in reversed(movements):
+            rows.append(SavingsTransaction(
+                account_id=account_id,
+                transaction_type=transaction_type,
+                amount=amount,
+                balance_after=balances[account_id],
+                reference=reference
+            ))
+            balances[account_id] += amount if transaction_type in SavingsTransaction.DEBIT_TYPES else -amount
+        rows.reverse()
+        return SavingsTransaction.objects.bulk_create(rows, batch_size=SavingsTransactionService.BATCH_SIZE)
 
@@ -1,21 +1,19 @@
 # apps/savings/tasks.py
-from datetime import datetime
+from datetime import date
 
 from celery import shared_task
 
-from apps.savings.models import SavingsAccount
-from apps.savings.services.transaction_service import SavingsTransactionService
+from apps.savings.services.interest_accrual import InterestAccrualService
 
 
-@shared_task
-def calculate_monthly_interest():
-    accounts = SavingsAccount.objects.filter(status='ACTIVE')
-    for account in accounts:
-        interest = (account.balance * account.interest_rate) / 1200
-        if interest > 0:
-            SavingsTransactionService.process_transaction(
-                account.id,
-                'INTEREST',
-                interest,
-                f"INT_{datetime.now().strftime('%Y%m')}"
-            )
+@shared_task(bind=True)
+def calculate_monthly_interest(self, as_of=None):
+    """Credit this month's (or as_of's month's) interest to every active savings account.
+
+    Accounts already credited for the month are skipped, so the task can simply be rerun.
+    The running summary is published as the task's PROGRESS state.
+    """
+    return InterestAccrualService.accrue(
+        as_of=as_of and date.fromisoformat(as_of),
+        progress=lambda summary: self.update_state(state='PROGRESS', meta=summary)
+    )
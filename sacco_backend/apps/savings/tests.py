@@ -7,10 +7,14 @@ from rest_framework.test import APIClient
 from rest_framework import status
 
 from apps.authentication.models import Role
+from apps.ledger.models import LedgerEntry
 from apps.members.models import Member
 from apps.savings.models import SavingsAccount, SavingsTransaction, InterestRate
 from apps.savings.services.account_service import SavingsAccountService
+from apps.savings.services.interest_accrual import InterestAccrualService
 from apps.savings.services.transaction_service import SavingsTransactionService
+from apps.transactions.models import Transaction
+from apps.transactions.services.state_service import TransactionStateService
 
 User = get_user_model()
 
@@ -219,3 +223,117 @@ class SavingsTransactionServiceTest(TestCase):
             )
         
         self.assertIn('insufficient funds', str(context.exception).lower())
+
+    def test_charge_debits_the_account(self):
+        """A service charge reduces the balance and respects the minimum balance, like a withdrawal."""
+        transaction = SavingsTransactionService.process_transaction(
+            account_id=self.savings_account.id,
+            transaction_type='CHARGE',
+            amount=Decimal('25')
+        )
+
+        self.assertEqual(transaction.balance_after, Decimal('975'))
+        self.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('975'))
+
+        with self.assertRaises(ValueError):
+            SavingsTransactionService.process_transaction(
+                account_id=self.savings_account.id,
+                transaction_type='CHARGE',
+                amount=Decimal('900')
+            )
+
+
+class InterestAccrualServiceTest(TestCase):
+    def setUp(self):
+        self.role = Role.objects.create(name='MEMBER')
+        self.user = User.objects.create_user(
+            email='member@example.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Member',
+            role=self.role,
+            phone_number='+256700000000',
+            national_id='TEST123'
+        )
+        self.member = Member.objects.create(
+            user=self.user,
+            member_number='M2024TEST001',
+            date_of_birth=date(1990, 1, 1),
+            marital_status='SINGLE',
+            employment_status='EMPLOYED',
+            occupation='Engineer',
+            monthly_income=Decimal('700000'),
+            physical_address='Test Address',
+            city='Kampala',
+            district='Central',
+            national_id='TEST123',
+            membership_number='SACCOM2024TEST001',
+            membership_type='INDIVIDUAL'
+        )
+
+    def _create_account(self, number, balance, status='ACTIVE', rate=Decimal('3.50')):
+        return SavingsAccount.objects.create(
+            member=self.member,
+            account_number=f"SAV20240000{number:02d}",
+            account_type='REGULAR',
+            balance=balance,
+            interest_rate=rate,
+            status=status,
+            minimum_balance=Decimal('100')
+        )
+
+    def test_monthly_interest_is_rounded_half_up_to_the_cent(self):
+        # 1000.00 at 3.5%: 2.9166 -> 2.92; 0.60 at 5%: 0.0025 -> 0.00; 1.20 at 5%: 0.005 -> 0.01
+        self.assertEqual(
+            InterestAccrualService.monthly_interest_cents([100000, 60, 120, -5000], [350, 500, 500, 500]),
+            [292, 0, 1, 0]
+        )
+
+    @patch.object(InterestAccrualService, 'CHUNK_SIZE', 2)
+    def test_accrue_credits_each_active_account_once(self):
+        accounts = [self._create_account(number, Decimal('1000')) for number in range(5)]
+        empty = self._create_account(5, Decimal('0'))
+        frozen = self._create_account(6, Decimal('1000'), status='FROZEN')
+
+        summary = InterestAccrualService.accrue()
+
+        self.assertEqual(summary['accounts'], 6)
+        self.assertEqual(summary['credited'], 5)
+        self.assertEqual(summary['interest_cents'], 5 * 292)
+        for account in accounts:
+            account.refresh_from_db()
+            self.assertEqual(account.balance, Decimal('1002.92'))
+            self.assertIsNotNone(account.last_interest_date)
+        for account in (empty, frozen):
+            account.refresh_from_db()
+            self.assertEqual(account.last_interest_date, None)
+
+        credits = SavingsTransaction.objects.filter(transaction_type='INTEREST')
+        self.assertEqual(len({credit.reference for credit in credits}), 5)
+        self.assertTrue(all(credit.balance_after == Decimal('1002.92') for credit in credits))
+        self.assertEqual(LedgerEntry.objects.filter(account_code='5100', entry_type='DEBIT').count(), 5)
+        self.assertEqual(LedgerEntry.objects.filter(account_code='2000', entry_type='CREDIT').count(), 5)
+
+        # Rerunning the month finds nothing left to credit
+        self.assertEqual(InterestAccrualService.accrue()['credited'], 0)
+        self.assertEqual(SavingsTransaction.objects.filter(transaction_type='INTEREST').count(), 5)
+
+    def test_interest_reversal_debits_the_credited_account(self):
+        # Neither account is the member's main one
+        reversed_account = self._create_account(1, Decimal('1000'))
+        kept_account = self._create_account(2, Decimal('1000'))
+        InterestAccrualService.accrue()
+        interest = Transaction.objects.get(destination_account=reversed_account.account_number)
+
+        TransactionStateService.transition(interest.id, 'reverse', reason='Wrong rate')
+
+        reversed_account.refresh_from_db()
+        kept_account.refresh_from_db()
+        self.assertEqual((reversed_account.balance, kept_account.balance), (Decimal('1000'), Decimal('1002.92')))
+        self.assertEqual(
+            list(SavingsTransaction.objects.filter(account=reversed_account).order_by('id').values_list(
+                'transaction_type', 'amount', 'balance_after'
+            )),
+            [('INTEREST', Decimal('2.92'), Decimal('1002.92')), ('REVERSAL_DEBIT', Decimal('2.92'), Decimal('1000'))]
+        )
@@ -0,0 +1,30 @@
+# apps/transactions/checks.py
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries live in one process only
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """The caches every worker must see the same entries in are not process-local."""
+    uses = [
+        # Version counters of the fee rules and chart of accounts copies (VersionedCache)
+        ('default', 'reference data invalidation'),
+        # Running DAILY/MONTHLY totals the limit checks reserve against (LimitCounterService)
+        (settings.TRANSACTION_LIMIT_CACHE, 'transaction limit counting'),
+    ]
+    errors = []
+    for alias, use in uses:
+        backend = settings.CACHES.get(alias, {}).get('BACKEND', LOCAL_CACHE_BACKENDS[0])
+        if backend in LOCAL_CACHE_BACKENDS:
+            errors.append(Error(
+                f"Cache '{alias}' uses {backend.rsplit('.', 1)[-1]}, so its {use} is not shared between workers",
+                hint="Point it at a shared backend such as Redis (see core/settings/production.py)",
+                id='transactions.E001'
+            ))
+    return errors
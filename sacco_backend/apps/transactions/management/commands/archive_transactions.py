@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.transactions.services.archive_service import TransactionArchiveService
+
+
+class Command(BaseCommand):
+    help = 'Sweep closed-period transactions that nothing references (leg-less fees, failed postings) to the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Stop after moving this many transactions')
+
+    def handle(self, *args, **options):
+        boundary = TransactionArchiveService.boundary()
+        moved = TransactionArchiveService.archive(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} transaction(s) created before {boundary:%Y-%m-%d}"))
@@ -0,0 +1,32 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.transactions.services.checkoff_service import CheckoffImportService
+
+
+class Command(BaseCommand):
+    help = 'Post a payroll check-off file (CSV or XLSX) and write the per-line results as CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Check-off file with member_number, savings_amount, loan_amount and '
+                                         'loan_reference columns')
+        parser.add_argument('results', help='Destination for the per-line results CSV')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['file']):
+            raise CommandError(f"No such file: {options['file']}")
+
+        with open(options['file'], 'rb') as source, open(options['results'], 'w', newline='') as results:
+            try:
+                summary = CheckoffImportService.import_file(source, options['file'], results)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{summary['lines']} line(s): {summary['posted']} posted, {summary['rejected']} rejected, "
+            f"{summary['failed']} failed"
+        )
+        self.stdout.write(f"Savings total: {summary['savings_total']}, loan repayments: {summary['loan_total']}")
+        style = self.style.SUCCESS if not summary['failed'] else self.style.ERROR
+        self.stdout.write(style(f"Results written to {options['results']}"))
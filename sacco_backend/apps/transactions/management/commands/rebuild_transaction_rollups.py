@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.transactions.services.rollup_service import TransactionRollupService
+from shared.utils.date_utils import as_date
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily transaction rollups for a date range from the transactions table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('start_date', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('end_date', nargs='?', help='Last day to rebuild (YYYY-MM-DD); defaults to today')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = as_date(options['start_date'])
+            end_date = as_date(options['end_date']) if options['end_date'] else timezone.localdate()
+        except ValueError as e:
+            raise CommandError(str(e))
+        if end_date < start_date:
+            raise CommandError("end_date is before start_date")
+
+        created = TransactionRollupService.rebuild(start_date, end_date)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} rollup row(s) for {start_date} to {end_date}"))
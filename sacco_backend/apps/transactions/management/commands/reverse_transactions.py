@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.transactions.services.reversal_service import ReversalService
+
+
+class Command(BaseCommand):
+    help = 'Reverse completed transactions in bulk, selected by id or by reference, method and time window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', type=int, nargs='+', help='Transaction ids to reverse')
+        parser.add_argument('--ref-prefix', help='Reverse transactions whose reference starts with this')
+        parser.add_argument('--external-ref', help='Reverse transactions carrying this external reference, '
+                                                   'e.g. a check-off batch reference')
+        parser.add_argument('--payment-method', help='Only transactions paid by this method')
+        parser.add_argument('--since', help='Only transactions created at or after this time (ISO 8601)')
+        parser.add_argument('--until', help='Only transactions created before this time (ISO 8601)')
+        parser.add_argument('--reason', required=True, help='Recorded on every reversal')
+
+    def handle(self, *args, **options):
+        lookups = {
+            'transaction_ref__startswith': options['ref_prefix'],
+            'external_reference': options['external_ref'],
+            'payment_method': options['payment_method'],
+            'created_at__gte': options['since'],
+            'created_at__lt': options['until'],
+        }
+        filters = {lookup: value for lookup, value in lookups.items() if value}
+
+        def report(summary):
+            self.stdout.write(
+                f"{summary['processed']}/{summary['selected']}: {summary['reversed']} reversed, "
+                f"{summary['skipped']} skipped, {summary['failed']} failed"
+            )
+
+        try:
+            summary = ReversalService.reverse_batch(
+                transaction_ids=options['ids'], filters=filters, reason=options['reason'], progress=report
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        style = self.style.SUCCESS if not summary['failed'] else self.style.ERROR
+        self.stdout.write(style(f"Reversed {summary['reversed']} of {summary['selected']} selected transaction(s)"))
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.26 on 2026-10-16 22:36
+# On PostgreSQL, references come from one database sequence per type, stepping by the
+# block size ReferenceService reserves at a time. Other backends use ReferenceSequence rows.
+
+from django.db import migrations, models
+
+SEQUENCES = ['transaction', 'fee', 'payment', 'savings_transaction', 'savings_account']
+BLOCK_SIZE = 100
+
+
+def create_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEQUENCES:
+        schema_editor.execute(f'CREATE SEQUENCE IF NOT EXISTS "reference_seq_{name}" INCREMENT BY {BLOCK_SIZE}')
+
+
+def drop_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEQUENCES:
+        schema_editor.execute(f'DROP SEQUENCE IF EXISTS "reference_seq_{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_sequences, drop_sequences),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.26 on 2026-10-16 22:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_daily_transaction_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('NOTIFICATION', 'Member Notification'), ('FRAUD_SCREENING', 'Fraud Screening'), ('AML_CHECK', 'AML Check')], max_length=20)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSED', 'Processed'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(null=True)),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_events', to='transactions.transaction')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='transaction_status_1f0442_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.26 on 2026-10-16 23:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_outbox_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='reverses',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='reversal', to='transactions.transaction'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='dailytransactionrollup',
+            name='transaction_type',
+            field=models.CharField(choices=[('DEPOSIT', 'Cash Deposit'), ('WITHDRAWAL', 'Cash Withdrawal'), ('LOAN_DISBURSEMENT', 'Loan Disbursement'), ('LOAN_REPAYMENT', 'Loan Repayment'), ('TRANSFER', 'Internal Transfer'), ('INTEREST', 'Interest Credit'), ('FEE', 'Service Fee'), ('REVERSAL', 'Reversal')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('DEPOSIT', 'Cash Deposit'), ('WITHDRAWAL', 'Cash Withdrawal'), ('LOAN_DISBURSEMENT', 'Loan Disbursement'), ('LOAN_REPAYMENT', 'Loan Repayment'), ('TRANSFER', 'Internal Transfer'), ('INTEREST', 'Interest Credit'), ('FEE', 'Service Fee'), ('REVERSAL', 'Reversal')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.26 on 2026-10-17 00:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0006_transaction_state_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transaction_ref', models.CharField(max_length=50)),
+                ('transaction_type', models.CharField(choices=[('DEPOSIT', 'Cash Deposit'), ('WITHDRAWAL', 'Cash Withdrawal'), ('LOAN_DISBURSEMENT', 'Loan Disbursement'), ('LOAN_REPAYMENT', 'Loan Repayment'), ('TRANSFER', 'Internal Transfer'), ('INTEREST', 'Interest Credit'), ('FEE', 'Service Fee'), ('REVERSAL', 'Reversal')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('payment_method', models.CharField(choices=[('CASH', 'Cash'), ('MOBILE_MONEY', 'Mobile Money'), ('BANK_TRANSFER', 'Bank Transfer'), ('CHEQUE', 'Cheque'), ('INTERNAL', 'Internal Transfer')], max_length=20)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed'), ('REVERSED', 'Reversed')], max_length=20)),
+                ('source_account', models.CharField(max_length=50, null=True)),
+                ('destination_account', models.CharField(max_length=50, null=True)),
+                ('external_reference', models.CharField(max_length=50, null=True)),
+                ('provider_reference', models.CharField(max_length=50, null=True)),
+                ('description', models.TextField(null=True)),
+                ('processed_date', models.DateTimeField(null=True)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('created_by', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('member', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='members.member')),
+                ('reverses', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='transactions.transaction')),
+                ('updated_by', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['member', '-created_at', '-id'], name='transaction_member__95f8bf_idx'), models.Index(fields=['-created_at', '-id'], name='transaction_created_d8d1d1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-17 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='resource',
+            field=models.CharField(max_length=50, null=True),
+        ),
+    ]
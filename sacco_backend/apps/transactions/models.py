@@ -1,4 +1,5 @@
 # apps/transactions/models.py
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from apps.members.models import Member
 from shared.mixins.model_mixins import AuditMixin
@@ -12,7 +13,8 @@ class Transaction(AuditMixin):
         ('LOAN_REPAYMENT', 'Loan Repayment'),
         ('TRANSFER', 'Internal Transfer'),
         ('INTEREST', 'Interest Credit'),
-        ('FEE', 'Service Fee')
+        ('FEE', 'Service Fee'),
+        ('REVERSAL', 'Reversal')
     ]
 
     PAYMENT_METHODS = [
@@ -48,12 +50,63 @@ class Transaction(AuditMixin):
     description = models.TextField(null=True)
     processed_date = models.DateTimeField(null=True)
 
+    # Bumped by every status transition; see TransactionStateService
+    version = models.PositiveIntegerField(default=0)
+    # For reversals, the transaction they compensate
+    reverses = models.OneToOneField('self', on_delete=models.PROTECT, null=True, related_name='reversal')
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['transaction_ref']),
             models.Index(fields=['member', '-created_at']),
-            models.Index(fields=['status', '-created_at'])
+            models.Index(fields=['status', '-created_at']),
+            # Unfiltered (staff) history pages
+            models.Index(fields=['-created_at', '-id'])
+        ]
+
+
+class ArchivedTransaction(models.Model):
+    """An unreferenced Transaction from a closed period (a leg-less fee or a failed posting).
+
+    Same ids and columns as Transaction, so history reads work on either; the archive
+    keeps no foreign-key constraints or unique indexes, only the two history orderings.
+    Written by TransactionArchiveService.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    transaction_ref = models.CharField(max_length=50)
+    member = models.ForeignKey(
+        Member, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+'
+    )
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    payment_method = models.CharField(max_length=20, choices=Transaction.PAYMENT_METHODS)
+    status = models.CharField(max_length=20, choices=Transaction.STATUS_CHOICES)
+    source_account = models.CharField(max_length=50, null=True)
+    destination_account = models.CharField(max_length=50, null=True)
+    external_reference = models.CharField(max_length=50, null=True)
+    provider_reference = models.CharField(max_length=50, null=True)
+    description = models.TextField(null=True)
+    processed_date = models.DateTimeField(null=True)
+    version = models.PositiveIntegerField(default=0)
+    reverses = models.ForeignKey(
+        Transaction, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True, related_name='+'
+    )
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    created_by = models.ForeignKey(
+        'authentication.User', on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True,
+        related_name='+'
+    )
+    updated_by = models.ForeignKey(
+        'authentication.User', on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True,
+        related_name='+'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['member', '-created_at', '-id']),
+            models.Index(fields=['-created_at', '-id'])
         ]
 
 
@@ -76,4 +129,101 @@ class TransactionLimit(models.Model):
     transaction_type = models.CharField(max_length=20)
     limit_type = models.CharField(max_length=20, choices=LIMIT_TYPES)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
-    member_type = models.CharField(max_length=20)  # Regular, Premium, etc.
\ No newline at end of file
+    member_type = models.CharField(max_length=20)  # Regular, Premium, etc.
+
+
+class ReferenceSequence(models.Model):
+    """Counter behind a reference type on databases without native sequences.
+
+    PostgreSQL draws references from database sequences instead; see ReferenceService.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_value}"
+
+
+class IdempotencyKey(models.Model):
+    """Claim on, and then the outcome of, a request made with a client-supplied idempotency key.
+
+    The unique key is what stops two workers from running the same request; see IdempotencyService.
+    """
+    # SHA-256 of (scope, caller, client key)
+    key = models.CharField(max_length=64, unique=True)
+    # SHA-256 of the request payload
+    fingerprint = models.CharField(max_length=64)
+    completed = models.BooleanField(default=False)
+    result = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    # Reference of what a claim committed ahead of its work is about to create, checked before it is taken over
+    resource = models.CharField(max_length=50, null=True)
+    # An unfinished claim is checked for recovery after IdempotencyService.LOCK_TIMEOUT, a stored
+    # result expires after IDEMPOTENCY_KEY_TTL
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key} ({'completed' if self.completed else 'in progress'})"
+
+
+class DailyTransactionRollup(models.Model):
+    """Count and sum of a member's transactions per local day, type, method and status.
+
+    Kept current by TransactionRollupService as transactions are written, and rebuilt
+    from Transaction for any date range by TransactionRollupService.rebuild().
+    """
+    date = models.DateField()
+    member = models.ForeignKey(Member, on_delete=models.PROTECT, related_name='+')
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES)
+    payment_method = models.CharField(max_length=20, choices=Transaction.PAYMENT_METHODS)
+    status = models.CharField(max_length=20, choices=Transaction.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'member', 'transaction_type', 'payment_method', 'status'],
+                name='unique_daily_transaction_rollup'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['member', 'date'])
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.member_id} {self.transaction_type}/{self.payment_method} {self.status}"
+
+
+class OutboxEvent(models.Model):
+    """A side effect of a posted transaction, written in the same database transaction.
+
+    Workers pick events up after commit (see OutboxService), so the posting itself never
+    waits on, or is rolled back by, notifications and screening.
+    """
+    EVENT_TYPES = [
+        ('NOTIFICATION', 'Member Notification'),
+        ('FRAUD_SCREENING', 'Fraud Screening'),
+        ('AML_CHECK', 'AML Check')
+    ]
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('PROCESSED', 'Processed'),
+        ('FAILED', 'Failed')
+    ]
+
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='outbox_events')
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'])
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} for {self.transaction_id} - {self.status}"
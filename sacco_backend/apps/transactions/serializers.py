@@ -1,16 +1,48 @@
 from decimal import Decimal
 from rest_framework import serializers
 
-from apps.transactions.models import Transaction, TransactionFee, TransactionLimit
+from apps.transactions.models import ArchivedTransaction, Transaction, TransactionFee, TransactionLimit
 
 
 class TransactionSerializer(serializers.ModelSerializer):
-    member_name = serializers.CharField(source='member.full_name', read_only=True)
+    member_name = serializers.CharField(source='member.user.get_full_name', read_only=True)
     
     class Meta:
         model = Transaction
         fields = '__all__'
-        read_only_fields = ['transaction_ref', 'status', 'processed_date', 'created_at', 'updated_at']
+        read_only_fields = [
+            'transaction_ref', 'status', 'processed_date', 'version', 'reverses', 'created_at', 'updated_at'
+        ]
+
+
+class ArchivedTransactionSerializer(serializers.ModelSerializer):
+    member_name = serializers.CharField(source='member.user.get_full_name', read_only=True)
+
+    class Meta:
+        model = ArchivedTransaction
+        fields = '__all__'
+
+
+class TransactionListSerializer(serializers.Serializer):
+    """Flat, read-only rows for transaction history, built from ``values(*LIST_FIELDS)``."""
+
+    # Columns fetched for each history row; member_name is annotated by the view
+    LIST_FIELDS = [
+        'id', 'transaction_ref', 'member_id', 'transaction_type', 'amount',
+        'payment_method', 'status', 'description', 'processed_date', 'created_at'
+    ]
+
+    id = serializers.IntegerField(read_only=True)
+    transaction_ref = serializers.CharField(read_only=True)
+    member_id = serializers.IntegerField(read_only=True)
+    member_name = serializers.CharField(read_only=True)
+    transaction_type = serializers.CharField(read_only=True)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    payment_method = serializers.CharField(read_only=True)
+    status = serializers.CharField(read_only=True)
+    description = serializers.CharField(read_only=True)
+    processed_date = serializers.DateTimeField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
 
 
 class TransactionFeeSerializer(serializers.ModelSerializer):
@@ -36,6 +68,35 @@ class TransferSerializer(serializers.Serializer):
     )
 
 
+class TransitionSerializer(serializers.Serializer):
+    reason = serializers.CharField(max_length=255, required=False)
+    # The version the client read; the transition is refused if the transaction has moved on since
+    version = serializers.IntegerField(min_value=0, required=False)
+
+
+class BulkTransitionSerializer(serializers.Serializer):
+    MAX_IDS = 10000
+
+    action = serializers.ChoiceField(choices=['approve', 'reject', 'reverse'])
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_IDS
+    )
+    reason = serializers.CharField(max_length=255, required=False)
+
+
+class FeeQuoteSerializer(serializers.Serializer):
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'))
+    transaction_type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPES)
+    payment_method = serializers.ChoiceField(choices=Transaction.PAYMENT_METHODS)
+    member_type = serializers.CharField(max_length=20, default='REGULAR')
+
+
+class FeeQuoteRequestSerializer(serializers.Serializer):
+    MAX_QUOTES = 10000
+
+    quotes = FeeQuoteSerializer(many=True, allow_empty=False, max_length=MAX_QUOTES)
+
+
 class TransactionCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
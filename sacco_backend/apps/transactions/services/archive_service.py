@@ -0,0 +1,102 @@
+# apps/transactions/services/archive_service.py
+import logging
+from datetime import datetime, time
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+
+from shared.utils.date_utils import as_date, month_start
+from ..models import ArchivedTransaction, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionArchiveService:
+    """Sweeps unreferenced closed-period rows off the Transaction table into ArchivedTransaction.
+
+    This is a clean-up of dead rows, not hot/cold tiering of transaction history. A row
+    older than the first day of the month TRANSACTION_HOT_MONTHS back moves only once it
+    is in a final status and no other row points at it. Every posted transaction keeps
+    its LedgerEntry legs, and those legs carry the hash chain, the balance checkpoints and
+    the savings reconciliation, so posted transactions stay hot for good. What moves is
+    the leg-less FEE records of deposits and withdrawals (journalled on their parent) and
+    failed or rejected postings. ArchivedTransaction is a plain, uncompressed table.
+
+    The boundary only moves forward, so a read whose range starts on or after it never
+    needs the archive.
+    """
+
+    BATCH_SIZE = 1000
+    FINAL_STATUSES = ('COMPLETED', 'FAILED', 'REVERSED')
+
+    @staticmethod
+    def boundary() -> datetime:
+        """Start of the oldest month kept hot; everything archived was created before it."""
+        first_hot_day = month_start(timezone.localdate(), -settings.TRANSACTION_HOT_MONTHS)
+        return timezone.make_aware(datetime.combine(first_hot_day, time.min))
+
+    @staticmethod
+    def covers(start_date) -> bool:
+        """Whether history from start_date on (None: all of it) may include archived rows."""
+        if not start_date:
+            return True
+        try:
+            return as_date(start_date) < TransactionArchiveService.boundary().date()
+        except ValueError:
+            return True
+
+    @staticmethod
+    def archivable(before: Optional[datetime] = None) -> QuerySet:
+        """Hot rows created before ``before`` (default: the boundary) that can move to the archive."""
+        rows = Transaction.objects.filter(
+            created_at__lt=min(before or TransactionArchiveService.boundary(), TransactionArchiveService.boundary()),
+            status__in=TransactionArchiveService.FINAL_STATUSES
+        )
+        for relation in Transaction._meta.related_objects:
+            referencing = relation.related_model._base_manager.filter(**{relation.field.attname: OuterRef('pk')})
+            rows = rows.filter(~Exists(referencing))
+        return rows
+
+    @staticmethod
+    def archive(before: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+        """Move archivable rows in committed batches of BATCH_SIZE; returns how many moved."""
+        moved = 0
+        while limit is None or moved < limit:
+            size = TransactionArchiveService.BATCH_SIZE if limit is None else min(
+                TransactionArchiveService.BATCH_SIZE, limit - moved
+            )
+            batch = TransactionArchiveService._move_batch(before, size)
+            if not batch:
+                break
+            moved += batch
+            logger.info("Archived %s transaction(s)", moved)
+        return moved
+
+    @staticmethod
+    @transaction.atomic
+    def _move_batch(before: Optional[datetime], size: int) -> int:
+        # Locked so a status change can't slip in between the copy and the delete
+        ids = list(TransactionArchiveService.archivable(before).select_for_update().order_by('id').values_list(
+            'id', flat=True
+        )[:size])
+        if not ids:
+            return 0
+        TransactionArchiveService._copy(ids)
+        Transaction.objects.filter(id__in=ids).delete()
+        return len(ids)
+
+    @staticmethod
+    def _copy(ids: List[int]) -> None:
+        # INSERT ... SELECT, so the rows never travel through Python
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(field.column) for field in ArchivedTransaction._meta.concrete_fields)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(ArchivedTransaction._meta.db_table)} ({columns}) "
+                f"SELECT {columns} FROM {quote(Transaction._meta.db_table)} "
+                f"WHERE {quote(Transaction._meta.pk.column)} IN ({', '.join(['%s'] * len(ids))})",
+                ids
+            )
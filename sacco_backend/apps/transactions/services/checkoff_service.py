@@ -0,0 +1,388 @@
+# apps/transactions/services/checkoff_service.py
+import codecs
+import csv
+import logging
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import IO, Dict, Iterator, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.loans.models import Loan, LoanRepayment
+from apps.members.models import Member
+from apps.savings.models import SavingsAccount
+from apps.savings.services.transaction_service import SavingsTransactionService
+from shared.services.ledger_service import Journal, LedgerService
+from shared.services.reference_service import ReferenceService
+from .limit_counter_service import LimitCounterService
+from .rollup_service import TransactionRollupService
+from ..models import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CheckoffLine:
+    line_number: int
+    member_number: str
+    savings_amount: Decimal = Decimal('0')
+    loan_amount: Decimal = Decimal('0')
+    loan_reference: str = ''
+    status: str = 'PENDING'
+    error: str = ''
+    savings_transaction_ref: str = ''
+    loan_transaction_ref: str = ''
+
+    def reject(self, error: str) -> None:
+        self.status = 'REJECTED'
+        self.error = error
+
+
+class CheckoffImportService:
+    """Imports employer payroll check-off files in bulk.
+
+    Each line credits a member's savings and/or repays one of their loans. The file is
+    read as a stream and posted in chunks: every chunk resolves its members, savings
+    accounts, loans and instalments with one query each, then writes all transactions,
+    balance updates, instalment allocations and ledger legs with bulk statements in one
+    atomic block. A line that fails validation is rejected on its own; a chunk that fails
+    to post is rolled back and its lines are reported as FAILED.
+    """
+
+    CHUNK_SIZE = 1000
+    # bulk_update builds one CASE WHEN per batch, which degrades quadratically with its size
+    UPDATE_BATCH_SIZE = 200
+    RESULT_HEADER = [
+        'line', 'member_number', 'savings_amount', 'loan_amount', 'loan_reference',
+        'status', 'savings_transaction_ref', 'loan_transaction_ref', 'error'
+    ]
+    # Employers remit check-off deductions by bank transfer
+    PAYMENT_METHOD = 'BANK_TRANSFER'
+
+    @staticmethod
+    def import_file(file: IO[bytes], filename: str, results: IO[str], initiated_by=None) -> dict:
+        """Post a CSV or XLSX check-off file and write one result row per line to ``results``."""
+        # Recorded as the external reference of every transaction the file posts, so the
+        # whole batch can be found (and reversed) by it
+        batch_id = ReferenceService.generate('CHECKOFF')
+        writer = csv.writer(results)
+        writer.writerow(CheckoffImportService.RESULT_HEADER)
+        summary = {
+            'batch': batch_id, 'lines': 0, 'posted': 0, 'rejected': 0, 'failed': 0,
+            'savings_total': Decimal('0'), 'loan_total': Decimal('0')
+        }
+
+        chunk = []
+        for line in CheckoffImportService._parse(file, filename):
+            chunk.append(line)
+            if len(chunk) >= CheckoffImportService.CHUNK_SIZE:
+                CheckoffImportService._process_chunk(chunk, batch_id, initiated_by)
+                CheckoffImportService._write_results(writer, chunk, summary)
+                chunk = []
+        CheckoffImportService._process_chunk(chunk, batch_id, initiated_by)
+        CheckoffImportService._write_results(writer, chunk, summary)
+        return summary
+
+    @staticmethod
+    def _parse(file: IO[bytes], filename: str) -> Iterator[CheckoffLine]:
+        rows = CheckoffImportService._read_rows(file, filename)
+        header = [str(name or '').strip().lower() for name in next(rows, [])]
+        if 'member_number' not in header:
+            raise ValueError("Check-off file must have a member_number column")
+
+        # Line 1 is the header
+        for line_number, values in enumerate(rows, start=2):
+            if not any(value not in (None, '') for value in values):
+                continue
+            row = dict(zip(header, values))
+            line = CheckoffLine(
+                line_number=line_number,
+                member_number=str(row.get('member_number') or '').strip(),
+                loan_reference=str(row.get('loan_reference') or '').strip()
+            )
+            try:
+                line.savings_amount = CheckoffImportService._parse_amount(row.get('savings_amount'))
+                line.loan_amount = CheckoffImportService._parse_amount(row.get('loan_amount'))
+            except ValueError as e:
+                line.reject(str(e))
+                yield line
+                continue
+
+            if not line.member_number:
+                line.reject("member_number is required")
+            elif not line.savings_amount and not line.loan_amount:
+                line.reject("Line has no savings or loan amount")
+            yield line
+
+    @staticmethod
+    def _read_rows(file: IO[bytes], filename: str) -> Iterator[list]:
+        if filename.lower().endswith('.xlsx'):
+            try:
+                from openpyxl import load_workbook
+            except ImportError:
+                raise ValueError("XLSX import requires the openpyxl package")
+            workbook = load_workbook(file, read_only=True, data_only=True)
+            try:
+                for row in workbook.active.iter_rows(values_only=True):
+                    yield list(row)
+            finally:
+                workbook.close()
+        else:
+            yield from csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+
+    @staticmethod
+    def _parse_amount(value) -> Decimal:
+        if value is None or str(value).strip() == '':
+            return Decimal('0')
+        try:
+            amount = Decimal(str(value).strip().replace(',', ''))
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount {value!r}")
+        if not amount.is_finite() or amount < 0:
+            raise ValueError(f"Invalid amount {value!r}")
+        if amount != amount.quantize(Decimal('0.01')):
+            raise ValueError(f"Amount {value!r} has more than two decimal places")
+        return amount.quantize(Decimal('0.01'))
+
+    @staticmethod
+    def _process_chunk(lines: List[CheckoffLine], batch_id: str, initiated_by) -> None:
+        pending = [line for line in lines if line.status == 'PENDING']
+        if not pending:
+            return
+        try:
+            with transaction.atomic():
+                CheckoffImportService._post_chunk(pending, batch_id, initiated_by)
+        except Exception as e:
+            logger.exception("Check-off chunk starting at line %s failed", pending[0].line_number)
+            for line in pending:
+                if line.status != 'REJECTED':
+                    line.status = 'FAILED'
+                    line.error = f"Chunk rolled back: {e}"
+                    line.savings_transaction_ref = line.loan_transaction_ref = ''
+
+    @staticmethod
+    def _post_chunk(lines: List[CheckoffLine], batch_id: str, initiated_by) -> None:
+        now = timezone.now()
+        members = {
+            member.member_number: member
+            for member in Member.objects.filter(
+                member_number__in={line.member_number for line in lines}
+            ).only('id', 'member_number', 'savings_account')
+        }
+        for line in lines:
+            member = members.get(line.member_number)
+            if member is None:
+                line.reject(f"Unknown member {line.member_number}")
+            elif line.savings_amount and not member.savings_account_id:
+                line.reject("Member has no savings account")
+
+        lines = [line for line in lines if line.status == 'PENDING']
+        accounts = CheckoffImportService._lock_savings_accounts(
+            members[line.member_number].savings_account_id for line in lines if line.savings_amount
+        )
+        loans = CheckoffImportService._lock_loans(
+            {members[line.member_number].id for line in lines if line.loan_amount}
+        )
+        schedules = CheckoffImportService._load_schedules(loans)
+        member_loans = {}
+        for loan in loans.values():
+            member_loans.setdefault(loan.member_id, []).append(loan)
+        # Enough for every line that may still post; those rejected below leave a gap in the sequence
+        references = iter(ReferenceService.generate_many(
+            'TRANSACTION', sum(bool(line.savings_amount) + bool(line.loan_amount) for line in lines)
+        ))
+
+        transactions = []
+        movements = []
+        allocations = []
+        touched_loans = {}
+        touched_repayments = {}
+        for line in lines:
+            member = members[line.member_number]
+            loan = None
+            if line.loan_amount:
+                loan = CheckoffImportService._select_loan(line, member_loans.get(member.id, []))
+                if loan is None:
+                    continue
+                outstanding = sum(r.amount - r.amount_paid for r in schedules.get(loan.id, []))
+                if line.loan_amount > outstanding:
+                    line.reject(
+                        f"Loan repayment of {line.loan_amount} exceeds the {outstanding} due on {loan.reference}"
+                    )
+                    continue
+
+            if line.savings_amount:
+                deposit = Transaction(
+                    transaction_ref=next(references),
+                    member_id=member.id,
+                    transaction_type='DEPOSIT',
+                    amount=line.savings_amount,
+                    payment_method=CheckoffImportService.PAYMENT_METHOD,
+                    status='COMPLETED',
+                    processed_date=now,
+                    external_reference=batch_id,
+                    description=f"Payroll check-off, line {line.line_number}",
+                    created_by=initiated_by
+                )
+                accounts[member.savings_account_id].balance += line.savings_amount
+                transactions.append(deposit)
+                movements.append((member.savings_account_id, 'DEPOSIT', line.savings_amount, deposit.transaction_ref))
+                line.savings_transaction_ref = deposit.transaction_ref
+
+            if loan is not None:
+                repayment = Transaction(
+                    transaction_ref=next(references),
+                    member_id=member.id,
+                    transaction_type='LOAN_REPAYMENT',
+                    amount=line.loan_amount,
+                    payment_method=CheckoffImportService.PAYMENT_METHOD,
+                    status='COMPLETED',
+                    processed_date=now,
+                    external_reference=batch_id,
+                    description=f"Payroll check-off repayment of {loan.reference}, line {line.line_number}",
+                    created_by=initiated_by
+                )
+                principal, interest = CheckoffImportService._allocate(
+                    loan, schedules.get(loan.id, []), line.loan_amount, repayment.transaction_ref, now,
+                    touched_repayments
+                )
+                touched_loans[loan.id] = loan
+                transactions.append(repayment)
+                allocations.append((repayment, principal, interest, loan.reference))
+                line.loan_transaction_ref = repayment.transaction_ref
+
+            line.status = 'POSTED'
+
+        if not transactions:
+            return
+
+        Transaction.objects.bulk_create(transactions, batch_size=CheckoffImportService.CHUNK_SIZE)
+        TransactionRollupService.record(transactions)
+
+        journal = Journal()
+        for _transaction in transactions:
+            if _transaction.transaction_type == 'DEPOSIT':
+                LedgerService.add_deposit_legs(journal, _transaction, Decimal('0'))
+        for _transaction, principal, interest, reference in allocations:
+            LedgerService.add_loan_repayment_legs(journal, _transaction, principal, interest, reference)
+        journal.post()
+
+        SavingsAccount.objects.bulk_update(
+            accounts.values(), ['balance'], batch_size=CheckoffImportService.UPDATE_BATCH_SIZE
+        )
+        SavingsTransactionService.record_movements(
+            movements, balances={account.id: account.balance for account in accounts.values()}
+        )
+        LoanRepayment.objects.bulk_update(
+            touched_repayments.values(),
+            ['amount_paid', 'status', 'payment_date', 'payment_method', 'receipt_number'],
+            batch_size=CheckoffImportService.UPDATE_BATCH_SIZE
+        )
+        for loan in touched_loans.values():
+            unpaid = [r for r in schedules[loan.id] if r.status != 'COMPLETED']
+            loan.last_payment_date = now.date()
+            loan.next_payment_date = unpaid[0].due_date if unpaid else None
+            if not unpaid:
+                loan.status = 'COMPLETED'
+        Loan.objects.bulk_update(
+            touched_loans.values(),
+            ['outstanding_balance', 'last_payment_date', 'next_payment_date', 'status'],
+            batch_size=CheckoffImportService.UPDATE_BATCH_SIZE
+        )
+
+        transaction.on_commit(lambda: CheckoffImportService._record_limits(transactions))
+
+    @staticmethod
+    def _lock_savings_accounts(account_ids: Iterator[int]) -> Dict[int, SavingsAccount]:
+        return {
+            account.id: account
+            for account in SavingsAccount.objects.select_for_update().filter(
+                id__in=set(account_ids)
+            ).only('id', 'balance').order_by('id')
+        }
+
+    @staticmethod
+    def _lock_loans(member_ids: set) -> Dict[int, Loan]:
+        if not member_ids:
+            return {}
+        return {
+            loan.id: loan
+            for loan in Loan.objects.select_for_update().filter(
+                member_id__in=member_ids, status='DISBURSED'
+            ).order_by('id')
+        }
+
+    @staticmethod
+    def _load_schedules(loans: Dict[int, Loan]) -> Dict[int, List[LoanRepayment]]:
+        schedules = {}
+        unpaid = LoanRepayment.objects.filter(loan_id__in=list(loans)).exclude(status='COMPLETED')
+        for repayment in unpaid.order_by('loan_id', 'due_date', 'id'):
+            schedules.setdefault(repayment.loan_id, []).append(repayment)
+        return schedules
+
+    @staticmethod
+    def _select_loan(line: CheckoffLine, member_loans: List[Loan]) -> Optional[Loan]:
+        if line.loan_reference:
+            for loan in member_loans:
+                if loan.reference == line.loan_reference:
+                    return loan
+            line.reject(f"No disbursed loan {line.loan_reference} for member {line.member_number}")
+        elif not member_loans:
+            line.reject("Member has no disbursed loan")
+        elif len(member_loans) > 1:
+            line.reject("Member has several disbursed loans; loan_reference is required")
+        else:
+            return member_loans[0]
+        return None
+
+    @staticmethod
+    def _allocate(loan: Loan, schedule: List[LoanRepayment], amount: Decimal, receipt: str, paid_at,
+                  touched: Dict[int, LoanRepayment]) -> tuple:
+        """Spread a repayment over the oldest unpaid instalments, interest before principal.
+
+        Returns the (principal, interest) paid.
+        """
+        remaining = amount
+        principal = interest = Decimal('0')
+        for repayment in schedule:
+            if remaining <= 0:
+                break
+            due = repayment.amount - repayment.amount_paid
+            if due <= 0:
+                continue
+
+            paid = min(remaining, due)
+            interest_paid = min(paid, max(repayment.interest_component - repayment.amount_paid, Decimal('0')))
+            interest += interest_paid
+            principal += paid - interest_paid
+
+            repayment.amount_paid += paid
+            repayment.payment_date = paid_at
+            repayment.payment_method = CheckoffImportService.PAYMENT_METHOD
+            repayment.receipt_number = receipt
+            if repayment.amount_paid >= repayment.amount:
+                repayment.status = 'COMPLETED'
+            touched[repayment.id] = repayment
+            remaining -= paid
+
+        loan.outstanding_balance -= amount
+        return principal, interest
+
+    @staticmethod
+    def _record_limits(transactions: List[Transaction]) -> None:
+        for _transaction in transactions:
+            LimitCounterService.record(_transaction)
+
+    @staticmethod
+    def _write_results(writer, lines: List[CheckoffLine], summary: dict) -> None:
+        for line in lines:
+            writer.writerow([
+                line.line_number, line.member_number, line.savings_amount, line.loan_amount, line.loan_reference,
+                line.status, line.savings_transaction_ref, line.loan_transaction_ref, line.error
+            ])
+            summary['lines'] += 1
+            summary[line.status.lower()] += 1
+            if line.status == 'POSTED':
+                summary['savings_total'] += line.savings_amount
+                summary['loan_total'] += line.loan_amount
@@ -1,11 +1,16 @@
 # apps/transactions/services/fees_calculator.py
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from .rules_service import TransactionRulesService
 from ..models import TransactionFee
 
 
 class FeesCalculator:
+    # Member type -> (factor, exponent) of the discounted total: PREMIUM pays x0.5 and GOLD x0.25
+    # of the fee in cents, which is exactly cents * 5 at 1e-3 and cents * 25 at 1e-4
+    DISCOUNTS = {'PREMIUM': (5, -3), 'GOLD': (25, -4)}
+
     @staticmethod
     def calculate_transaction_fee(
             transaction_type: str,
@@ -13,10 +18,9 @@ class FeesCalculator:
             amount: Decimal,
             member_type: str = 'REGULAR'
     ) -> Dict[str, Decimal]:
-        fee_structure = TransactionFee.objects.get(
-            transaction_type=transaction_type,
-            payment_method=payment_method
-        )
+        fee_structure = TransactionRulesService.get_fee_rule(transaction_type, payment_method)
+        if fee_structure is None:
+            raise TransactionFee.DoesNotExist(f"No fee defined for {transaction_type} via {payment_method}")
 
         base_fee = fee_structure.fixed_amount
         percentage_fee = (amount * fee_structure.percentage / 100).quantize(
@@ -69,4 +73,67 @@ class FeesCalculator:
             amount,
             member_type
         )
-        return fee_details['total_fee']
\ No newline at end of file
+        return fee_details['total_fee']
+
+    @staticmethod
+    def quote_fees(quotes: Sequence[Tuple[Decimal, str, str, str]]) -> List[Optional[Dict[str, Decimal]]]:
+        """Fees for many (amount, transaction_type, payment_method, member_type) tuples at once.
+
+        Works on integer cents with each fee rule converted once, and returns exactly the
+        Decimals calculate_transaction_fee would (value and exponent), or None where no fee
+        is defined. Amounts or rules not expressible in whole cents go through
+        calculate_transaction_fee itself.
+        """
+        fees = TransactionRulesService.get_table().fees
+        rules = {}
+        for key in {(transaction_type, payment_method) for _, transaction_type, payment_method, _ in quotes}:
+            rule = fees.get(key)
+            if rule is None:
+                rules[key] = None
+                continue
+            cents = [
+                FeesCalculator._to_cents(value) if value.as_tuple().exponent == -2 else None
+                for value in (rule.fixed_amount, rule.percentage, rule.min_amount, rule.max_amount or Decimal('0.00'))
+            ]
+            rules[key] = (rule, None if None in cents else cents)
+
+        results = []
+        for amount, transaction_type, payment_method, member_type in quotes:
+            entry = rules[(transaction_type, payment_method)]
+            if entry is None:
+                results.append(None)
+                continue
+            rule, cents = entry
+            amount_cents = FeesCalculator._to_cents(amount)
+            if cents is None or amount_cents is None:
+                results.append(FeesCalculator.calculate_transaction_fee(
+                    transaction_type, payment_method, amount, member_type
+                ))
+                continue
+
+            fixed, percentage, minimum, maximum = cents
+            # amount * percentage / 100 in cents is amount_cents * percentage_hundredths / 10000, rounded half up
+            product = amount_cents * percentage
+            percentage_fee = (abs(product) + 5000) // 10000 * (1 if product >= 0 else -1)
+
+            factor, exponent = FeesCalculator.DISCOUNTS.get(member_type, (1, -2))
+            coefficient = (fixed + percentage_fee) * factor
+            # Compare everything at 1e-4
+            scaled = coefficient * 10 ** (4 + exponent)
+            total_fee = None
+            if rule.max_amount and scaled > maximum * 100:
+                total_fee, scaled = rule.max_amount, maximum * 100
+            if minimum * 100 > scaled:
+                total_fee = rule.min_amount
+
+            results.append({
+                'base_fee': rule.fixed_amount,
+                'percentage_fee': Decimal(percentage_fee).scaleb(-2),
+                'total_fee': Decimal(coefficient).scaleb(exponent) if total_fee is None else total_fee
+            })
+        return results
+
+    @staticmethod
+    def _to_cents(value: Decimal) -> Optional[int]:
+        cents = value.scaleb(2)
+        return int(cents) if cents == cents.to_integral_value() else None
@@ -0,0 +1,237 @@
+# apps/transactions/services/limit_counter_service.py
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from shared.utils.date_utils import month_start
+from .rules_service import TransactionRulesService
+from ..models import Transaction, TransactionLimit
+from ...members.models import Member
+
+
+class LimitCounterService:
+    """Running per-member totals of completed transactions for the current day and month.
+
+    Each counter is kept in whole cents under a key naming the member, the transaction
+    type and the period, so a limit check is one cache increment. A posting reserves
+    its amount before it is written: the increment and the comparison with the limit
+    are one atomic step, so concurrent postings cannot both slip under it, and the
+    reservation is released if the posting fails. A counter missing from the cache is
+    seeded with one SUM over that period; reversals take their originals back out, and
+    ``reconcile()`` periodically corrects every live counter from the database.
+    """
+
+    PERIODS = ('DAILY', 'MONTHLY')
+    BATCH_SIZE = 1000
+    # Kept a little past the end of the period so late checks still hit
+    TIMEOUTS = {'DAILY': 2 * 24 * 3600, 'MONTHLY': 32 * 24 * 3600}
+
+    @staticmethod
+    def _cache():
+        return caches[settings.TRANSACTION_LIMIT_CACHE]
+
+    @staticmethod
+    def _period_start(period: str, day: date) -> date:
+        return day if period == 'DAILY' else month_start(day)
+
+    @staticmethod
+    def _period_bounds(period: str, day: date) -> Tuple[datetime, datetime]:
+        start = LimitCounterService._period_start(period, day)
+        end = start + timedelta(days=1) if period == 'DAILY' else month_start(start, 1)
+        tz = timezone.get_current_timezone()
+        return (
+            timezone.make_aware(datetime.combine(start, time.min), tz),
+            timezone.make_aware(datetime.combine(end, time.min), tz)
+        )
+
+    @staticmethod
+    def _key(member_id: int, transaction_type: str, period: str, day: date) -> str:
+        start = LimitCounterService._period_start(period, day)
+        return f"txn_limit:{member_id}:{transaction_type}:{period}:{start:%Y%m%d}"
+
+    @staticmethod
+    def _to_cents(amount: Decimal) -> int:
+        return int((amount * 100).to_integral_value())
+
+    @staticmethod
+    def _counted() -> Q:
+        """Rows that count against their member's limits.
+
+        That is every row except the credit leg of a transfer, which TransferService
+        writes as a TRANSFER of the recipient; only the sender's debit leg draws from
+        the account it names as source.
+        """
+        return ~Q(transaction_type='TRANSFER') | Q(source_account=F('member__savings_account__account_number'))
+
+    @staticmethod
+    def _load_total(member_id: int, transaction_type: str, period: str, day: date) -> Decimal:
+        start, end = LimitCounterService._period_bounds(period, day)
+        return Transaction.objects.filter(
+            LimitCounterService._counted(),
+            member_id=member_id,
+            transaction_type=transaction_type,
+            status='COMPLETED',
+            processed_date__gte=start,
+            processed_date__lt=end
+        ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+
+    @staticmethod
+    def _seed(key: str, member_id: int, transaction_type: str, period: str, day: date) -> Decimal:
+        total = LimitCounterService._load_total(member_id, transaction_type, period, day)
+        # add() so a counter another process has seeded and moved on is not overwritten
+        LimitCounterService._cache().add(key, LimitCounterService._to_cents(total), LimitCounterService.TIMEOUTS[period])
+        return total
+
+    @staticmethod
+    def _incr(key: str, cents: int) -> Optional[int]:
+        """Move a cached counter by cents; None if it is not in the cache."""
+        try:
+            return LimitCounterService._cache().incr(key, cents)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def get_total(member_id: int, transaction_type: str, period: str, day: Optional[date] = None) -> Decimal:
+        day = day or timezone.localdate()
+        key = LimitCounterService._key(member_id, transaction_type, period, day)
+        cents = LimitCounterService._cache().get(key)
+        if cents is None:
+            return LimitCounterService._seed(key, member_id, transaction_type, period, day)
+        return Decimal(cents) / 100
+
+    @staticmethod
+    def reserve(member_id: int, transaction_type: str, amount: Decimal, limits: Dict[str, Decimal]) -> List[str]:
+        """Count a posting against today's counters before it is written.
+
+        ``limits`` maps periods to their limit. Those counters are seeded if missing,
+        and the reservation is refused with a ValueError, leaving every counter as it
+        was, when it would take one past its limit. Other counters only move if they
+        are cached. Returns the keys moved, for ``release()`` should the posting fail.
+        """
+        day = timezone.localdate()
+        cents = LimitCounterService._to_cents(amount)
+        reserved = []
+        for period in LimitCounterService.PERIODS:
+            key = LimitCounterService._key(member_id, transaction_type, period, day)
+            total = LimitCounterService._incr(key, cents)
+            if total is None and period in limits:
+                seeded = LimitCounterService._seed(key, member_id, transaction_type, period, day)
+                # Evicted again straight away: check against the database total, without a counter to hold
+                total = LimitCounterService._incr(key, cents)
+                if total is None:
+                    total = LimitCounterService._to_cents(seeded) + cents
+                else:
+                    reserved.append(key)
+            elif total is not None:
+                reserved.append(key)
+            if period in limits and total > LimitCounterService._to_cents(limits[period]):
+                LimitCounterService.release(reserved, amount)
+                label = dict(TransactionLimit.LIMIT_TYPES)[period].lower()
+                raise ValueError(f"Amount exceeds {label} of {limits[period]}")
+        return reserved
+
+    @staticmethod
+    def release(keys: Iterable[str], amount: Decimal) -> None:
+        """Give back a reservation whose posting was not written."""
+        cents = LimitCounterService._to_cents(amount)
+        for key in keys:
+            LimitCounterService._incr(key, -cents)
+
+    @staticmethod
+    def _move(transactions: Iterable[Transaction], sign: int) -> None:
+        for _transaction in transactions:
+            day = timezone.localtime(_transaction.processed_date).date()
+            cents = sign * LimitCounterService._to_cents(_transaction.amount)
+            for period in LimitCounterService.PERIODS:
+                LimitCounterService._incr(
+                    LimitCounterService._key(_transaction.member_id, _transaction.transaction_type, period, day), cents
+                )
+
+    @staticmethod
+    def record(_transaction: Transaction) -> None:
+        """Add a completed transaction that reserved nothing (e.g. a check-off line) to its member's counters.
+
+        Counters not in the cache are left alone; they are seeded from the database,
+        which already includes this transaction, on their next read.
+        """
+        LimitCounterService._move([_transaction], 1)
+
+    @staticmethod
+    def remove(transactions: Iterable[Transaction]) -> None:
+        """Take reversed transactions back out of their members' counters, once the reversal has committed."""
+        transactions = {_transaction.id: _transaction for _transaction in transactions if _transaction.processed_date}
+        counted = Transaction.objects.filter(LimitCounterService._counted(), id__in=transactions).values_list(
+            'id', flat=True
+        ) if transactions else []
+        LimitCounterService._move([transactions[pk] for pk in counted], -1)
+
+    @staticmethod
+    def reconcile(day: Optional[date] = None) -> int:
+        """Correct every cached counter of the current periods from grouped database totals.
+
+        Counters are only kept for transaction types with a DAILY or MONTHLY limit, so
+        those types' keys are looked up for every member, a chunk of members at a time.
+        Each counter found is moved to its member's completed total, zero included, which
+        also clears what reversed, failed or rolled-back postings left behind. Returns
+        the number of counters corrected.
+        """
+        day = day or timezone.localdate()
+        cache = LimitCounterService._cache()
+        types = sorted({
+            transaction_type
+            for (transaction_type, _), rules in TransactionRulesService.get_table().limits.items()
+            if any(rule.limit_type in LimitCounterService.PERIODS for rule in rules)
+        })
+        if not types:
+            return 0
+
+        bounds = {period: LimitCounterService._period_bounds(period, day) for period in LimitCounterService.PERIODS}
+        members_per_chunk = max(1, LimitCounterService.BATCH_SIZE // (len(types) * len(LimitCounterService.PERIODS)))
+        member_ids = Member.objects.order_by('id').values_list('id', flat=True)
+        corrected = 0
+        chunk = []
+        for member_id in member_ids.iterator(chunk_size=members_per_chunk):
+            chunk.append(member_id)
+            if len(chunk) >= members_per_chunk:
+                corrected += LimitCounterService._reconcile_members(chunk, types, bounds, day, cache)
+                chunk = []
+        if chunk:
+            corrected += LimitCounterService._reconcile_members(chunk, types, bounds, day, cache)
+        return corrected
+
+    @staticmethod
+    def _reconcile_members(member_ids: List[int], types: List[str], bounds: dict, day: date, cache) -> int:
+        keys = {
+            LimitCounterService._key(member_id, transaction_type, period, day): (member_id, transaction_type, period)
+            for member_id in member_ids for transaction_type in types for period in LimitCounterService.PERIODS
+        }
+        cached = cache.get_many(list(keys))
+        if not cached:
+            return 0
+
+        totals: Dict[Tuple[int, str, str], int] = defaultdict(int)
+        for period, (start, end) in bounds.items():
+            rows = Transaction.objects.filter(
+                LimitCounterService._counted(),
+                member_id__in={keys[key][0] for key in cached if keys[key][2] == period},
+                transaction_type__in=types,
+                status='COMPLETED',
+                processed_date__gte=start,
+                processed_date__lt=end
+            ).values_list('member_id', 'transaction_type').annotate(total=Sum('amount')).order_by()
+            for member_id, transaction_type, total in rows:
+                totals[member_id, transaction_type, period] = LimitCounterService._to_cents(total)
+
+        corrected = 0
+        for key, cents in cached.items():
+            difference = totals[keys[key]] - cents
+            # By difference rather than set(), so postings counted since the read are kept
+            if difference and LimitCounterService._incr(key, difference) is not None:
+                corrected += 1
+        return corrected
@@ -0,0 +1,103 @@
+# apps/transactions/services/outbox_service.py
+import logging
+from datetime import timedelta
+from typing import Iterable, List, Sequence
+
+from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notifications.services.notification_service import NotificationService
+from apps.risk_management.services.compliance_service import ComplianceService
+from apps.risk_management.services.fraud_detection_service import FraudDetectionService
+from ..models import OutboxEvent, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxService:
+    """Runs the side effects of posted transactions after their database transaction commits.
+
+    ``enqueue()`` writes one OutboxEvent per side effect alongside the posting, so the
+    events commit or roll back with it, and hands their ids to a Celery worker once the
+    commit has happened. Events the worker never got (broker down, worker lost) or that
+    failed are picked up again by ``process_pending()``, up to MAX_ATTEMPTS times.
+    """
+
+    EVENT_TYPES = ('NOTIFICATION', 'FRAUD_SCREENING', 'AML_CHECK')
+    MAX_ATTEMPTS = 5
+    # Pending events younger than this are left to the worker they were dispatched to
+    RETRY_AFTER = timedelta(minutes=5)
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def enqueue(transactions: Iterable[Transaction], event_types: Sequence[str] = EVENT_TYPES) -> List[OutboxEvent]:
+        events = OutboxEvent.objects.bulk_create([
+            OutboxEvent(transaction=_transaction, event_type=event_type)
+            for _transaction in transactions
+            for event_type in event_types
+        ])
+        event_ids = [event.id for event in events if event.id is not None]
+        transaction.on_commit(lambda: OutboxService.dispatch(event_ids))
+        return events
+
+    @staticmethod
+    def dispatch(event_ids: List[int]) -> None:
+        from apps.transactions.tasks import process_outbox_events
+
+        if not event_ids:
+            return
+        try:
+            process_outbox_events.delay(event_ids)
+        except Exception:
+            # The events are committed; process_pending() will run them
+            logger.warning("Could not queue outbox events %s", event_ids, exc_info=True)
+
+    @staticmethod
+    def process(event_ids: Iterable[int]) -> int:
+        """Run the given events that are still pending; returns how many succeeded."""
+        processed = 0
+        for event_id in event_ids:
+            with transaction.atomic():
+                # The row lock keeps two workers from running the same event
+                event = OutboxEvent.objects.select_for_update(skip_locked=True).select_related(
+                    'transaction__member__user'
+                ).filter(id=event_id, status='PENDING').first()
+                if event is None:
+                    continue
+
+                event.attempts += 1
+                try:
+                    with transaction.atomic():
+                        OutboxService._handle(event)
+                except Exception as e:
+                    logger.exception("Outbox event %s (%s) failed", event.id, event.event_type)
+                    event.last_error = str(e)
+                    if event.attempts >= OutboxService.MAX_ATTEMPTS:
+                        event.status = 'FAILED'
+                else:
+                    event.status = 'PROCESSED'
+                    event.processed_at = timezone.now()
+                    processed += 1
+                event.save(update_fields=['status', 'attempts', 'last_error', 'processed_at'])
+        return processed
+
+    @staticmethod
+    def process_pending() -> int:
+        """Run pending events old enough to have been missed or to be due a retry."""
+        event_ids = list(OutboxEvent.objects.filter(
+            status='PENDING',
+            created_at__lt=timezone.now() - OutboxService.RETRY_AFTER
+        ).order_by('created_at').values_list('id', flat=True)[:OutboxService.BATCH_SIZE])
+        return OutboxService.process(event_ids)
+
+    @staticmethod
+    def _handle(event: OutboxEvent) -> None:
+        if event.event_type == 'NOTIFICATION':
+            NotificationService.send_transaction_notification(event.transaction)
+        elif event.event_type == 'FRAUD_SCREENING':
+            async_to_sync(FraudDetectionService.analyze_transaction)(event.transaction)
+        elif event.event_type == 'AML_CHECK':
+            async_to_sync(ComplianceService.check_aml_compliance)(event.transaction)
+        else:
+            raise ValueError(f"Unknown outbox event type: {event.event_type}")
@@ -0,0 +1,248 @@
+# apps/transactions/services/reversal_service.py
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, Exists, F, OuterRef, Q, Value, When
+from django.utils import timezone
+
+from apps.ledger.models import LedgerEntry
+from apps.members.models import Member
+from apps.savings.models import SavingsAccount
+from apps.savings.services.transaction_service import SavingsTransactionService
+from shared.services.ledger_service import Journal, LedgerService
+from shared.services.reference_service import ReferenceService
+from .limit_counter_service import LimitCounterService
+from .outbox_service import OutboxService
+from .rollup_service import TransactionRollupService
+from ..models import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+class ReversalService:
+    """Reverses completed transactions, one at a time or by the tens of thousands.
+
+    Each original gets a REVERSAL transaction carrying its ledger legs mirrored (debits
+    become credits and vice versa), and the members' savings balances move by the net
+    of the mirrored savings legs, each recorded in the account's history. Deposits and
+    withdrawals journal their fee on themselves, so reversing one refunds the fee too,
+    and their FEE record can't be reversed on its own. A transfer leg is always
+    reversed with its other leg and its fee, so the clearing account nets to zero.
+
+    ``reverse_batch()`` works through its selection in chunks, each committed on its
+    own: one set-based UPDATE marks the chunk's originals REVERSED, and the reversals,
+    ledger legs and balance changes are written with bulk statements.
+    """
+
+    CHUNK_SIZE = 1000
+    # Accounts per CASE WHEN balance update; the statement degrades quadratically with its size
+    UPDATE_BATCH_SIZE = 200
+    # Types whose fee is a separate FEE record but is journalled on the transaction itself
+    FEE_ON_PARENT_TYPES = ('DEPOSIT', 'WITHDRAWAL')
+    # Types posted to the savings account they name (destination or source) rather than the member's main one
+    NAMED_ACCOUNT_TYPES = ('TRANSFER', 'INTEREST')
+    # Lookups reverse_batch() accepts, e.g. a check-off batch's external reference or an outage window
+    FILTER_FIELDS = (
+        'transaction_ref__startswith', 'external_reference', 'transaction_type', 'payment_method', 'member_id',
+        'created_at__gte', 'created_at__lt'
+    )
+
+    @staticmethod
+    def reverse_batch(
+            transaction_ids: Optional[Iterable[int]] = None,
+            filters: Optional[Dict[str, object]] = None,
+            reason: Optional[str] = None,
+            user=None,
+            progress: Optional[Callable[[dict], None]] = None
+    ) -> dict:
+        """Reverse the completed transactions selected by id and/or FILTER_FIELDS lookups.
+
+        ``progress`` is called with the running summary after every chunk. A chunk that
+        fails is rolled back on its own and counted as failed; the run carries on.
+        """
+        from .state_service import TransactionStateService
+
+        if transaction_ids is None and not filters:
+            raise ValueError("Select the transactions to reverse by id or by filter")
+        unknown = set(filters or {}) - set(ReversalService.FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported reversal filter(s): {', '.join(sorted(unknown))}")
+
+        if filters:
+            rows = Transaction.objects.filter(status='COMPLETED', **filters).order_by('id')
+            ids = list(rows.values_list('id', flat=True))
+            if transaction_ids is not None:
+                selected = set(transaction_ids)
+                ids = [pk for pk in ids if pk in selected]
+        else:
+            # Ineligible ids are skipped by the conditional update, so there is no need to look them up first
+            ids = sorted(set(transaction_ids))
+
+        summary = {'selected': len(ids), 'processed': 0, 'reversed': 0, 'skipped': 0, 'failed': 0}
+        for start in range(0, len(ids), ReversalService.CHUNK_SIZE):
+            chunk = ids[start:start + ReversalService.CHUNK_SIZE]
+            try:
+                reversed_count = len(TransactionStateService.bulk_transition(chunk, 'reverse', user, reason))
+            except Exception:
+                logger.exception("Reversal chunk starting at transaction %s failed", chunk[0])
+                summary['failed'] += len(chunk)
+            else:
+                summary['reversed'] += reversed_count
+                summary['skipped'] += len(chunk) - reversed_count
+            summary['processed'] += len(chunk)
+            logger.info("Reversed %s of %s selected transaction(s)", summary['reversed'], summary['selected'])
+            if progress is not None:
+                progress(dict(summary))
+        return summary
+
+    @staticmethod
+    def journalled_on_parent() -> Q:
+        """FEE records without ledger legs of their own, i.e. deposit and withdrawal fees."""
+        return Q(transaction_type='FEE') & ~Exists(LedgerEntry.objects.filter(transaction_id=OuterRef('pk')))
+
+    @staticmethod
+    def fee_transaction_ids(transactions: Iterable[Transaction]) -> List[int]:
+        """Ids of the FEE records of deposits and withdrawals among transactions."""
+        return ReversalService._fee_ids(transactions, ReversalService.FEE_ON_PARENT_TYPES)
+
+    @staticmethod
+    def linked_transaction_ids(transactions: Iterable[Transaction]) -> List[int]:
+        """Ids of what must be reversed, from its own ledger legs, along with transactions.
+
+        That is the other leg of every transfer, so the clearing account is compensated
+        on both sides, and the transfer's FEE record.
+        """
+        transactions = list(transactions)
+        transfers = [_transaction for _transaction in transactions if _transaction.transaction_type == 'TRANSFER']
+        if not transfers:
+            return []
+        # Both legs of a transfer are written with the same time, accounts and amount, one per member
+        legs = {
+            (leg.processed_date, leg.source_account, leg.destination_account, leg.amount): leg.member_id
+            for leg in transfers
+        }
+        partners = [
+            leg for leg in Transaction.objects.filter(
+                transaction_type='TRANSFER', processed_date__in={key[0] for key in legs}
+            ).exclude(id__in=[_transaction.id for _transaction in transactions])
+            if legs.get((leg.processed_date, leg.source_account, leg.destination_account, leg.amount))
+            not in (None, leg.member_id)
+        ]
+        return [leg.id for leg in partners] + ReversalService._fee_ids(transfers + partners, ('TRANSFER',))
+
+    @staticmethod
+    def _fee_ids(transactions: Iterable[Transaction], types: Iterable[str]) -> List[int]:
+        descriptions, member_ids = [], set()
+        for _transaction in transactions:
+            if _transaction.transaction_type in types:
+                descriptions.append(f"Fee for {_transaction.transaction_type.lower()} {_transaction.transaction_ref}")
+                member_ids.add(_transaction.member_id)
+        if not descriptions:
+            return []
+        return list(Transaction.objects.filter(
+            member_id__in=member_ids, transaction_type='FEE', description__in=descriptions
+        ).values_list('id', flat=True))
+
+    @staticmethod
+    def compensate(originals: Iterable[Transaction], reason: Optional[str] = None, user=None) -> List[Transaction]:
+        """Write the reversals of originals; must run in the transaction that marked them REVERSED."""
+        originals = list(originals)
+        if not originals:
+            return []
+
+        now = timezone.now()
+        reversals: Dict[int, Transaction] = {
+            original.id: Transaction(
+                transaction_ref=ReferenceService.generate('REVERSAL'),
+                member_id=original.member_id,
+                transaction_type='REVERSAL',
+                amount=original.amount,
+                payment_method='INTERNAL',
+                status='COMPLETED',
+                processed_date=now,
+                reverses=original,
+                description=f"Reversal of {original.transaction_ref}" + (f": {reason}" if reason else ""),
+                created_by=user
+            )
+            for original in originals
+        }
+        Transaction.objects.bulk_create(reversals.values())
+
+        journal = Journal()
+        # reversal -> change to the savings balance of its original's account
+        savings_deltas: Dict[Transaction, Decimal] = defaultdict(Decimal)
+        legs = LedgerEntry.objects.filter(transaction_id__in=reversals).order_by('id').values_list(
+            'transaction_id', 'account_code', 'entry_type', 'amount'
+        )
+        for transaction_id, account_code, entry_type, amount in legs:
+            reversal = reversals[transaction_id]
+            entry_type = 'CREDIT' if entry_type == 'DEBIT' else 'DEBIT'
+            journal.add(reversal, account_code, entry_type, amount, f"Reversal {reversal.transaction_ref}")
+            if account_code == LedgerService.ACCOUNT_CODES['SAVINGS']:
+                savings_deltas[reversal] += amount if entry_type == 'CREDIT' else -amount
+        journal.post()
+
+        ReversalService._apply_savings_deltas(savings_deltas)
+        TransactionRollupService.record(reversals.values())
+        OutboxService.enqueue(reversals.values(), event_types=('NOTIFICATION',))
+        # The originals stop counting against their members' limits
+        transaction.on_commit(lambda: LimitCounterService.remove(originals))
+        return list(reversals.values())
+
+    @staticmethod
+    def _apply_savings_deltas(deltas: Dict[Transaction, Decimal]) -> None:
+        """Move the originals' savings accounts by their reversals' deltas and record each in their history."""
+        deltas = {reversal: delta for reversal, delta in deltas.items() if delta}
+        # member id -> main savings account id
+        main_accounts = dict(Member.objects.filter(
+            id__in={reversal.member_id for reversal in deltas}, savings_account__isnull=False
+        ).values_list('id', 'savings_account_id'))
+        # Accounts named by the originals of the types posted to the account they name
+        named = [
+            (reversal.member_id, number)
+            for reversal in deltas if reversal.reverses.transaction_type in ReversalService.NAMED_ACCOUNT_TYPES
+            for number in (reversal.reverses.destination_account, reversal.reverses.source_account) if number
+        ]
+        # (member id, account number) -> savings account id
+        named_accounts = {
+            (member_id, number): account_id
+            for account_id, member_id, number in SavingsAccount.objects.filter(
+                account_number__in={number for _, number in named}
+            ).values_list('id', 'member_id', 'account_number')
+        } if named else {}
+
+        def account_of(reversal: Transaction) -> Optional[int]:
+            original = reversal.reverses
+            if original.transaction_type in ReversalService.NAMED_ACCOUNT_TYPES:
+                for number in (original.destination_account, original.source_account):
+                    if (reversal.member_id, number) in named_accounts:
+                        return named_accounts[reversal.member_id, number]
+            return main_accounts.get(reversal.member_id)
+
+        movements = []
+        for reversal, delta in deltas.items():
+            account_id = account_of(reversal)
+            if account_id is None:
+                logger.warning("No savings account to apply reversal %s to", reversal.transaction_ref)
+                continue
+            movements.append((
+                account_id, 'REVERSAL_CREDIT' if delta > 0 else 'REVERSAL_DEBIT', abs(delta), reversal.transaction_ref
+            ))
+        account_deltas: Dict[int, Decimal] = defaultdict(Decimal)
+        for account_id, transaction_type, amount, _ in movements:
+            account_deltas[account_id] += -amount if transaction_type == 'REVERSAL_DEBIT' else amount
+
+        account_ids = sorted(account_deltas)
+        for start in range(0, len(account_ids), ReversalService.UPDATE_BATCH_SIZE):
+            batch = account_ids[start:start + ReversalService.UPDATE_BATCH_SIZE]
+            # Lock in id order like every other multi-account posting, then move them all in one UPDATE;
+            # a reversal may take a balance below its minimum
+            list(SavingsAccount.objects.select_for_update().filter(id__in=batch).order_by('id').values_list('id'))
+            SavingsAccount.objects.filter(id__in=batch).update(balance=F('balance') + Case(
+                *[When(id=account_id, then=Value(account_deltas[account_id])) for account_id in batch],
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ))
+        SavingsTransactionService.record_movements(movements)
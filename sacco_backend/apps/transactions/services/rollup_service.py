@@ -0,0 +1,191 @@
+# apps/transactions/services/rollup_service.py
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .archive_service import TransactionArchiveService
+from ..models import ArchivedTransaction, DailyTransactionRollup, Transaction
+
+# (date, member_id, transaction_type, payment_method, status)
+RollupKey = Tuple[date, int, str, str, str]
+
+
+class TransactionRollupService:
+    """Daily per-member transaction counts and totals, so summaries never scan Transaction.
+
+    Code that writes transactions calls ``record()`` in the same database transaction,
+    which folds them into their (day, member, type, method, status) rows. ``rebuild()``
+    recomputes any date range from Transaction and its archive, for backfills and for
+    rows written outside the services (bulk updates, admin edits).
+    """
+
+    BATCH_SIZE = 1000
+    KEY_FIELDS = ('date', 'member_id', 'transaction_type', 'payment_method', 'status')
+    # Backends whose INSERT ... ON CONFLICT DO UPDATE can add to the existing row in one statement
+    UPSERT_VENDORS = ('postgresql', 'sqlite')
+
+    @staticmethod
+    def _key(_transaction: Transaction, status: Optional[str] = None) -> RollupKey:
+        return (
+            timezone.localdate(_transaction.created_at),
+            _transaction.member_id,
+            _transaction.transaction_type,
+            _transaction.payment_method,
+            status or _transaction.status
+        )
+
+    @staticmethod
+    @transaction.atomic(savepoint=False)
+    def record(transactions: Iterable[Transaction], previous_status: Optional[str] = None) -> None:
+        """Add transactions to the rollups of their current status.
+
+        For a status change pass the status they had, and they are also taken out of
+        that status's rollups.
+        """
+        deltas: Dict[RollupKey, List] = defaultdict(lambda: [0, Decimal('0')])
+        for _transaction in transactions:
+            delta = deltas[TransactionRollupService._key(_transaction)]
+            delta[0] += 1
+            delta[1] += _transaction.amount
+            if previous_status is not None:
+                delta = deltas[TransactionRollupService._key(_transaction, previous_status)]
+                delta[0] -= 1
+                delta[1] -= _transaction.amount
+
+        TransactionRollupService._add(deltas)
+
+    @staticmethod
+    def _add(deltas: Dict[RollupKey, List]) -> None:
+        keys = sorted(key for key, (count, total) in deltas.items() if count or total)
+        # A new row can't start from a negative count, so only pure additions take the one-statement path
+        apply = (
+            TransactionRollupService._upsert
+            if connection.vendor in TransactionRollupService.UPSERT_VENDORS
+            and all(deltas[key][0] >= 0 for key in keys)
+            else TransactionRollupService._apply
+        )
+        for start in range(0, len(keys), TransactionRollupService.BATCH_SIZE):
+            apply({key: deltas[key] for key in keys[start:start + TransactionRollupService.BATCH_SIZE]})
+
+    @staticmethod
+    def _upsert(deltas: Dict[RollupKey, List]) -> None:
+        # Keys arrive sorted, so concurrent writers take the row locks in the same order
+        meta = DailyTransactionRollup._meta
+        quote = connection.ops.quote_name
+        table = quote(meta.db_table)
+        key_columns = [quote(meta.get_field(field).column) for field in TransactionRollupService.KEY_FIELDS]
+        count, total = quote('count'), quote('total')
+        params = []
+        for (day, member_id, transaction_type, payment_method, status), delta in deltas.items():
+            params += [
+                connection.ops.adapt_datefield_value(day), member_id, transaction_type, payment_method, status,
+                delta[0], connection.ops.adapt_decimalfield_value(delta[1])
+            ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(key_columns)}, {count}, {total}) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(deltas))} "
+                f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET "
+                f"{count} = {table}.{count} + EXCLUDED.{count}, {total} = {table}.{total} + EXCLUDED.{total}",
+                params
+            )
+
+    @staticmethod
+    def _apply(deltas: Dict[RollupKey, List]) -> None:
+        # Make sure every row exists, then lock them in id order so concurrent writers queue rather than deadlock
+        DailyTransactionRollup.objects.bulk_create(
+            [DailyTransactionRollup(**dict(zip(TransactionRollupService.KEY_FIELDS, key))) for key in deltas],
+            ignore_conflicts=True
+        )
+        rows = DailyTransactionRollup.objects.select_for_update().filter(
+            date__in={key[0] for key in deltas},
+            member_id__in={key[1] for key in deltas}
+        ).order_by('id')
+
+        changed = []
+        for row in rows:
+            delta = deltas.get(tuple(getattr(row, field) for field in TransactionRollupService.KEY_FIELDS))
+            if delta is None:
+                continue
+            # Transactions written outside the services were never counted; rebuild() corrects those rows
+            row.count = max(row.count + delta[0], 0)
+            row.total += delta[1]
+            changed.append(row)
+        DailyTransactionRollup.objects.bulk_update(changed, ['count', 'total'])
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(start_date: date, end_date: date) -> int:
+        """Recompute the rollups of every day from start_date to end_date inclusive; returns the row count."""
+        DailyTransactionRollup.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+
+        batch = []
+        for row in TransactionRollupService._grouped(Transaction, start_date, end_date):
+            batch.append(DailyTransactionRollup(
+                date=row['day'],
+                member_id=row['member_id'],
+                transaction_type=row['transaction_type'],
+                payment_method=row['payment_method'],
+                status=row['status'],
+                count=row['count'],
+                total=row['total']
+            ))
+            if len(batch) >= TransactionRollupService.BATCH_SIZE:
+                DailyTransactionRollup.objects.bulk_create(batch)
+                batch = []
+        DailyTransactionRollup.objects.bulk_create(batch)
+
+        if TransactionArchiveService.covers(start_date):
+            # Archived rows of the same days add onto the rows built from the hot table
+            deltas: Dict[RollupKey, List] = {}
+            for row in TransactionRollupService._grouped(ArchivedTransaction, start_date, end_date):
+                key = (row['day'], row['member_id'], row['transaction_type'], row['payment_method'], row['status'])
+                deltas[key] = [row['count'], row['total']]
+                if len(deltas) >= TransactionRollupService.BATCH_SIZE:
+                    TransactionRollupService._add(deltas)
+                    deltas = {}
+            TransactionRollupService._add(deltas)
+
+        return DailyTransactionRollup.objects.filter(date__gte=start_date, date__lte=end_date).count()
+
+    @staticmethod
+    def _grouped(model, start_date: date, end_date: date) -> Iterator[dict]:
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+        end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+        return model.objects.filter(
+            created_at__gte=start,
+            created_at__lt=end
+        ).values(
+            'member_id', 'transaction_type', 'payment_method', 'status', day=TruncDate('created_at')
+        ).annotate(count=Count('id'), total=Sum('amount')).order_by().iterator(
+            chunk_size=TransactionRollupService.BATCH_SIZE
+        )
+
+    @staticmethod
+    def summarize(
+            start_date: date,
+            end_date: date,
+            member_id: Optional[int] = None,
+            status: str = 'COMPLETED'
+    ) -> Dict[str, Dict]:
+        """Count and total per transaction type over a date range (inclusive), read from the rollups."""
+        # Rows emptied by status changes stay behind with a zero count
+        rows = DailyTransactionRollup.objects.filter(
+            date__gte=start_date, date__lte=end_date, status=status, count__gt=0
+        )
+        if member_id is not None:
+            rows = rows.filter(member_id=member_id)
+
+        return {
+            row['transaction_type']: {'count': row['count'], 'total': row['total']}
+            for row in rows.values('transaction_type').annotate(
+                count=Sum('count'), total=Sum('total')
+            ).order_by()
+        }
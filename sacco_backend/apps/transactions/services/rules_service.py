@@ -0,0 +1,93 @@
+# apps/transactions/services/rules_service.py
+from dataclasses import dataclass
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from shared.utils.versioned_cache import VersionedCache
+from ..models import TransactionFee, TransactionLimit
+
+
+@dataclass(frozen=True)
+class FeeRule:
+    fixed_amount: Decimal
+    percentage: Decimal
+    min_amount: Decimal
+    max_amount: Optional[Decimal]
+
+
+@dataclass(frozen=True)
+class LimitRule:
+    limit_type: str
+    amount: Decimal
+
+
+@dataclass(frozen=True)
+class TransactionRules:
+    fee: Optional[FeeRule]
+    limits: Tuple[LimitRule, ...]
+
+    def limit(self, limit_type: str) -> Optional[Decimal]:
+        """The tightest limit of the given type, if any."""
+        amounts = [rule.amount for rule in self.limits if rule.limit_type == limit_type]
+        return min(amounts) if amounts else None
+
+
+@dataclass(frozen=True)
+class RuleTable:
+    # Fees are keyed by (transaction_type, payment_method), limits by (transaction_type, member_type)
+    fees: Mapping[Tuple[str, str], FeeRule]
+    limits: Mapping[Tuple[str, str], Tuple[LimitRule, ...]]
+
+
+def _load_rules() -> RuleTable:
+    fees = {}
+    for fee in TransactionFee.objects.order_by('id'):
+        # The oldest rule wins if a combination was entered twice
+        fees.setdefault((fee.transaction_type, fee.payment_method), FeeRule(
+            fixed_amount=fee.fixed_amount,
+            percentage=fee.percentage,
+            min_amount=fee.min_amount,
+            max_amount=fee.max_amount
+        ))
+
+    limits = {}
+    for limit in TransactionLimit.objects.order_by('id'):
+        limits.setdefault((limit.transaction_type, limit.member_type), []).append(
+            LimitRule(limit_type=limit.limit_type, amount=limit.amount)
+        )
+
+    return RuleTable(
+        fees=MappingProxyType(fees),
+        limits=MappingProxyType({key: tuple(rules) for key, rules in limits.items()})
+    )
+
+
+class TransactionRulesService:
+    """Serves fee and limit rules from an immutable, process-local rule table.
+
+    The table is rebuilt only after a TransactionFee or TransactionLimit row changes,
+    so fee and limit checks cost no queries while posting.
+    """
+
+    _cache = VersionedCache('transaction_rules', _load_rules)
+
+    @staticmethod
+    def get_table() -> RuleTable:
+        return TransactionRulesService._cache.get()
+
+    @staticmethod
+    def get_rules(transaction_type: str, payment_method: str, member_type: str) -> TransactionRules:
+        table = TransactionRulesService.get_table()
+        return TransactionRules(
+            fee=table.fees.get((transaction_type, payment_method)),
+            limits=table.limits.get((transaction_type, member_type), ())
+        )
+
+    @staticmethod
+    def get_fee_rule(transaction_type: str, payment_method: str) -> Optional[FeeRule]:
+        return TransactionRulesService.get_table().fees.get((transaction_type, payment_method))
+
+    @staticmethod
+    def invalidate() -> None:
+        TransactionRulesService._cache.invalidate()
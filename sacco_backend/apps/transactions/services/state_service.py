@@ -0,0 +1,144 @@
+# apps/transactions/services/state_service.py
+from typing import Iterable, List, Optional
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+
+from .outbox_service import OutboxService
+from .reversal_service import ReversalService
+from .rollup_service import TransactionRollupService
+from ..models import Transaction
+
+
+class TransitionConflict(Exception):
+    pass
+
+
+class TransactionStateService:
+    """Status changes as conditional UPDATEs on (status, version).
+
+    A transition only matches rows still in its source status, and, when the caller
+    passes the version it read, still at that version; the same statement bumps the
+    version. Two approvers racing on one transaction both send the UPDATE and exactly
+    one of them matches the row, so nothing is read or locked beforehand and nothing
+    is applied twice.
+    """
+
+    # action -> (from status, to status)
+    TRANSITIONS = {
+        'approve': ('PENDING', 'COMPLETED'),
+        'reject': ('PENDING', 'FAILED'),
+        'reverse': ('COMPLETED', 'REVERSED'),
+    }
+    # Types an action never applies to. A reversal is undone by a new posting, not reversed again;
+    # loan postings also move instalments and loan balances, which the ledger legs alone can't restore
+    EXCLUDED_TYPES = {'reverse': ('REVERSAL', 'LOAN_DISBURSEMENT', 'LOAN_REPAYMENT')}
+    BATCH_SIZE = 1000
+    # Backends that can report which rows an UPDATE matched in the same statement
+    RETURNING_VENDORS = ('postgresql', 'sqlite')
+
+    @staticmethod
+    def transition(
+            transaction_id: int,
+            action: str,
+            user=None,
+            reason: Optional[str] = None,
+            version: Optional[int] = None
+    ) -> Transaction:
+        """Apply action to one transaction; raises TransitionConflict if it is no longer eligible."""
+        changed = TransactionStateService.bulk_transition([transaction_id], action, user, reason, version)
+        if not changed:
+            source = TransactionStateService.TRANSITIONS[action][0]
+            raise TransitionConflict(
+                f"Only {source.lower()} transactions can be {TransactionStateService._past_tense(action)}"
+                + (", and this one has changed since it was read" if version is not None else "")
+            )
+        return changed[0]
+
+    @staticmethod
+    @transaction.atomic
+    def bulk_transition(
+            transaction_ids: Iterable[int],
+            action: str,
+            user=None,
+            reason: Optional[str] = None,
+            version: Optional[int] = None
+    ) -> List[Transaction]:
+        """Apply action to every listed transaction still eligible for it and return those changed.
+
+        Ineligible ids (wrong status, stale version, unknown) are skipped, not errors.
+        """
+        if action not in TransactionStateService.TRANSITIONS:
+            raise ValueError(f"Unknown transaction action: {action}")
+        source, target = TransactionStateService.TRANSITIONS[action]
+
+        values = {'status': target, 'version': F('version') + 1, 'updated_at': timezone.now(), 'updated_by': user}
+        if target == 'COMPLETED':
+            values['processed_date'] = values['updated_at']
+        if action == 'reject':
+            values['description'] = f"Rejected: {reason or 'No reason provided'}"
+
+        excluded = Q(transaction_type__in=TransactionStateService.EXCLUDED_TYPES.get(action, ()))
+        if action == 'reverse':
+            # A fee journalled on its deposit or withdrawal is only reversed with it
+            excluded |= ReversalService.journalled_on_parent()
+        ids = sorted(set(transaction_ids))
+        changed_ids = []
+        for start in range(0, len(ids), TransactionStateService.BATCH_SIZE):
+            changed_ids += TransactionStateService._update(
+                ids[start:start + TransactionStateService.BATCH_SIZE], source, values, version, excluded
+            )
+        changed = list(Transaction.objects.filter(id__in=changed_ids).order_by('id'))
+        if not changed:
+            return []
+
+        rolled_up = changed
+        if action == 'reverse':
+            # A transfer leg takes its other leg and its fee with it; each is compensated from its own legs
+            linked_ids = TransactionStateService._update(
+                ReversalService.linked_transaction_ids(changed), source, values
+            )
+            compensated = changed + list(Transaction.objects.filter(id__in=linked_ids).order_by('id'))
+            # A deposit's or withdrawal's fee is refunded with it, so its FEE record goes too
+            fee_ids = TransactionStateService._update(ReversalService.fee_transaction_ids(compensated), source, values)
+            rolled_up = compensated + list(Transaction.objects.filter(id__in=fee_ids))
+            ReversalService.compensate(compensated, reason, user)
+        else:
+            OutboxService.enqueue(changed, event_types=('NOTIFICATION',))
+        TransactionRollupService.record(rolled_up, previous_status=source)
+        return changed
+
+    @staticmethod
+    def _update(
+            ids: List[int],
+            source: str,
+            values: dict,
+            version: Optional[int] = None,
+            excluded: Optional[Q] = None
+    ) -> List[int]:
+        """Move the rows among ids still in source status (and at version); returns the ids moved."""
+        if not ids:
+            return []
+        rows = Transaction.objects.filter(id__in=ids, status=source)
+        if version is not None:
+            rows = rows.filter(version=version)
+        if excluded is not None:
+            rows = rows.exclude(excluded)
+
+        if connection.vendor not in TransactionStateService.RETURNING_VENDORS:
+            # One statement per row, so the row count tells which ones matched
+            return [pk for pk in ids if rows.filter(id=pk).update(**values)]
+
+        # QuerySet.update() only returns a count; the same UPDATE with RETURNING names the rows
+        query = rows.query.chain(UpdateQuery)
+        query.add_update_values(values)
+        sql, params = query.get_compiler(rows.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{sql} RETURNING {connection.ops.quote_name(Transaction._meta.pk.column)}", params)
+            return sorted(row[0] for row in cursor.fetchall())
+
+    @staticmethod
+    def _past_tense(action: str) -> str:
+        return {'approve': 'approved', 'reject': 'rejected', 'reverse': 'reversed'}[action]
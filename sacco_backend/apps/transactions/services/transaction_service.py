@@ -1,17 +1,23 @@
 from decimal import Decimal
+from typing import List, Optional
 
 from django.db import transaction
-from datetime import datetime
-import uuid
-
+from django.db.models import F
 from django.utils import timezone
 
-from shared.services.ledger_service import LedgerService
+from shared.services.ledger_service import Journal, LedgerService
+from shared.services.reference_service import ReferenceService
+from shared.utils.date_utils import as_date, month_start
 from .fees_calculator import FeesCalculator
-from ..models import Transaction, TransactionFee, TransactionLimit
+from .limit_counter_service import LimitCounterService
+from .outbox_service import OutboxService
+from .rollup_service import TransactionRollupService
+from .rules_service import TransactionRulesService
+from ..models import Transaction
 
 from ...members.models import Member
-from ...notifications.services.notification_service import NotificationService
+from ...savings.models import SavingsAccount
+from ...savings.services.transaction_service import SavingsTransactionService
 
 
 class TransactionService:
@@ -24,160 +30,165 @@ class TransactionService:
             payment_method: str,
             **kwargs
     ) -> Transaction:
-        # Validate transaction limits
-        TransactionService._validate_limits(member_id, transaction_type, amount)
+        member = Member.objects.only('id', 'membership_type', 'savings_account_id').get(id=member_id)
 
-        # Calculate fees
-        fee = TransactionService._calculate_fee(transaction_type, payment_method, amount)
+        # Validate transaction limits, reserving the amount against the running ones
+        reserved = TransactionService._validate_limits(member, transaction_type, payment_method, amount)
 
-        # Create transaction
-        _transaction = Transaction.objects.create(
+        _transaction = Transaction(
             transaction_ref=TransactionService._generate_reference(),
-            member_id=member_id,
+            member=member,
             transaction_type=transaction_type,
             amount=amount,
             payment_method=payment_method,
-            # fee_amount=fee,
             **kwargs
         )
 
-        # Process based on type
-        if transaction_type == 'DEPOSIT':
-            TransactionService._process_deposit(_transaction)
-        elif transaction_type == 'WITHDRAWAL':
-            TransactionService._process_withdrawal(_transaction)
+        # Process based on type; deposits and withdrawals are written already completed
+        try:
+            if transaction_type == 'DEPOSIT':
+                posted = TransactionService._process_deposit(_transaction)
+            elif transaction_type == 'WITHDRAWAL':
+                posted = TransactionService._process_withdrawal(_transaction)
+            else:
+                _transaction.save()
+                posted = [_transaction]
+                # Not completed yet, so not counted yet
+                LimitCounterService.release(reserved, amount)
+        except Exception:
+            LimitCounterService.release(reserved, amount)
+            raise
 
-        NotificationService.send_transaction_notification(_transaction)
+        TransactionRollupService.record(posted)
+        # Notification and screening run after commit, outside the locked region
+        OutboxService.enqueue([_transaction])
         return _transaction
 
     @staticmethod
-    def _generate_reference() -> str:
-        return f"TXN{datetime.now().strftime('%Y%m%d')}{uuid.uuid4().hex[:8].upper()}"
+    def get_transaction_summary(user, start_date=None, end_date=None) -> dict:
+        """Completed transaction counts and totals per type for the user's member, from the daily rollups.
+
+        Dates are inclusive and default to the current month.
+        """
+        try:
+            member_id = Member.objects.values_list('id', flat=True).get(user=user)
+        except Member.DoesNotExist:
+            raise ValueError("No member profile found for this user")
+
+        end_date = as_date(end_date) if end_date else timezone.localdate()
+        start_date = as_date(start_date) if start_date else month_start(end_date)
+        by_type = TransactionRollupService.summarize(start_date, end_date, member_id=member_id)
+
+        def total(transaction_type):
+            return by_type.get(transaction_type, {}).get('total') or Decimal('0')
+
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'by_type': by_type,
+            'total_deposits': total('DEPOSIT'),
+            'total_withdrawals': total('WITHDRAWAL'),
+            'total_fees': total('FEE'),
+            'transaction_count': sum(row['count'] for row in by_type.values())
+        }
 
     @staticmethod
-    def _validate_limits(member_id: int, transaction_type: str, amount: Decimal):
-        member = Member.objects.get(id=member_id)
-        limits = TransactionLimit.objects.filter(
-            transaction_type=transaction_type,
-            member_type=member.membership_type
-        )
+    def _generate_reference() -> str:
+        return ReferenceService.generate('TRANSACTION')
 
-        for limit in limits:
-            if limit.limit_type == 'SINGLE' and amount > limit.amount:
-                raise ValueError(f"Amount exceeds single transaction limit of {limit.amount}")
-            # Add other limit validations
+    @staticmethod
+    def _validate_limits(member: Member, transaction_type: str, payment_method: str, amount: Decimal) -> List[str]:
+        """Check the limits and reserve amount against the DAILY and MONTHLY counters.
+
+        Returns the reserved counter keys; the caller releases them if the posting fails.
+        """
+        rules = TransactionRulesService.get_rules(transaction_type, payment_method, member.membership_type)
+
+        single = rules.limit('SINGLE')
+        if single is not None and amount > single:
+            raise ValueError(f"Amount exceeds single transaction limit of {single}")
+        limits = {
+            period: rules.limit(period)
+            for period in LimitCounterService.PERIODS if rules.limit(period) is not None
+        }
+        return LimitCounterService.reserve(member.id, transaction_type, amount, limits)
 
     @staticmethod
     def _calculate_fee(transaction_type: str, payment_method: str, amount: Decimal) -> Decimal:
-        try:
-            fee_structure = TransactionFee.objects.get(
-                transaction_type=transaction_type,
-                payment_method=payment_method
-            )
-
-            percentage_fee = amount * (fee_structure.percentage / 100)
-            total_fee = fee_structure.fixed_amount + percentage_fee
-
-            if fee_structure.max_amount:
-                total_fee = min(total_fee, fee_structure.max_amount)
-
-            return max(total_fee, fee_structure.min_amount)
-        except TransactionFee.DoesNotExist:
+        fee_structure = TransactionRulesService.get_fee_rule(transaction_type, payment_method)
+        if fee_structure is None:
             return Decimal('0')
 
-    @staticmethod
-    def _process_deposit(_transaction: Transaction) -> Transaction:
-        try:
-            with transaction.atomic():
-                # Calculate fees
-                fee = FeesCalculator.calculate_deposit_fee(
-                    _transaction.amount,
-                    _transaction.payment_method,
-                    _transaction.member.membership_type
-                )
-
-                # Update savings account
-                savings_account = _transaction.member.savings_account
-                savings_account.balance += (_transaction.amount - fee)
-                savings_account.save()
-
-                # Record fee transaction if applicable
-                if fee > 0:
-                    Transaction.objects.create(
-                        transaction_ref=f"FEE-{_transaction.transaction_ref}",
-                        member=_transaction.member,
-                        transaction_type='FEE',
-                        amount=fee,
-                        payment_method='INTERNAL',
-                        status='COMPLETED',
-                        description=f"Fee for deposit {_transaction.transaction_ref}",
-                        source_account=_transaction.source_account
-                    )
-
-                # Update transaction status
-                _transaction.status = 'COMPLETED'
-                _transaction.processed_date = timezone.now()
-                _transaction.save()
+        percentage_fee = amount * (fee_structure.percentage / 100)
+        total_fee = fee_structure.fixed_amount + percentage_fee
 
-                # Create ledger entries
-                LedgerService.create_deposit_entries(_transaction, fee)
+        if fee_structure.max_amount:
+            total_fee = min(total_fee, fee_structure.max_amount)
 
-                return _transaction
+        return max(total_fee, fee_structure.min_amount)
 
-        except Exception as e:
-            _transaction.status = 'FAILED'
-            _transaction.description = f"Failed: {str(e)}"
-            _transaction.save()
-            raise
+    @staticmethod
+    def _process_deposit(_transaction: Transaction) -> List[Transaction]:
+        fee = FeesCalculator.calculate_deposit_fee(
+            _transaction.amount,
+            _transaction.payment_method,
+            _transaction.member.membership_type
+        )
+        if not TransactionService._move_balance(_transaction.member, _transaction.amount - fee):
+            raise ValueError("Member has no savings account")
+        return TransactionService._post(_transaction, fee, LedgerService.add_deposit_legs)
 
     @staticmethod
-    def _process_withdrawal(_transaction: Transaction) -> Transaction:
-        try:
-            with transaction.atomic():
-                # Calculate fees
-                fee = FeesCalculator.calculate_withdrawal_fee(
-                    _transaction.amount,
-                    _transaction.payment_method,
-                    _transaction.member.membership_type
-                )
-
-                total_deduction = _transaction.amount + fee
-                savings_account = _transaction.member.savings_account
-
-                # Check balance (including minimum balance requirement)
-                available_balance = savings_account.balance - savings_account.minimum_balance
-                if available_balance < total_deduction:
-                    raise ValueError("Insufficient funds including fees and minimum balance requirement")
-
-                # Update savings account
-                savings_account.balance -= total_deduction
-                savings_account.save()
-
-                # Record fee transaction
-                if fee > 0:
-                    Transaction.objects.create(
-                        transaction_ref=f"FEE-{_transaction.transaction_ref}",
-                        member=_transaction.member,
-                        transaction_type='FEE',
-                        amount=fee,
-                        payment_method='INTERNAL',
-                        status='COMPLETED',
-                        description=f"Fee for withdrawal {_transaction.transaction_ref}",
-                        source_account=_transaction.source_account
-                    )
-
-                # Update transaction status
-                _transaction.status = 'COMPLETED'
-                _transaction.processed_date = timezone.now()
-                _transaction.save()
+    def _process_withdrawal(_transaction: Transaction) -> List[Transaction]:
+        fee = FeesCalculator.calculate_withdrawal_fee(
+            _transaction.amount,
+            _transaction.payment_method,
+            _transaction.member.membership_type
+        )
+        total_deduction = _transaction.amount + fee
+        # The balance check is part of the update, so it holds against concurrent postings
+        if not TransactionService._move_balance(_transaction.member, -total_deduction, required=total_deduction):
+            raise ValueError("Insufficient funds including fees and minimum balance requirement")
+        return TransactionService._post(_transaction, fee, LedgerService.add_withdrawal_legs)
 
-                # Create ledger entries
-                LedgerService.create_withdrawal_entries(_transaction, fee)
+    @staticmethod
+    def _move_balance(member: Member, delta: Decimal, required: Optional[Decimal] = None) -> bool:
+        """Add delta to the member's savings balance in one conditional UPDATE.
 
-                return _transaction
+        With ``required``, the row only changes if at least that much sits above the
+        minimum balance. Returns False when no row was updated.
+        """
+        accounts = SavingsAccount.objects.filter(id=member.savings_account_id)
+        if required is not None:
+            accounts = accounts.filter(balance__gte=F('minimum_balance') + required)
+        return accounts.update(balance=F('balance') + delta) == 1
 
-        except Exception as e:
-            _transaction.status = 'FAILED'
-            _transaction.description = f"Failed: {str(e)}"
-            _transaction.save()
-            raise
+    @staticmethod
+    def _post(_transaction: Transaction, fee: Decimal, add_legs) -> List[Transaction]:
+        """Insert the completed transaction and its fee in one statement, then record and journal both."""
+        _transaction.status = 'COMPLETED'
+        _transaction.processed_date = timezone.now()
+        posted = [_transaction]
+        if fee > 0:
+            posted.append(Transaction(
+                transaction_ref=ReferenceService.generate('FEE'),
+                member=_transaction.member,
+                transaction_type='FEE',
+                amount=fee,
+                payment_method='INTERNAL',
+                status='COMPLETED',
+                processed_date=_transaction.processed_date,
+                description=f"Fee for {_transaction.transaction_type.lower()} {_transaction.transaction_ref}",
+                source_account=_transaction.source_account
+            ))
+        Transaction.objects.bulk_create(posted)
+
+        # The fee comes out of the same account, as a charge of its own in the savings history
+        account_id = _transaction.member.savings_account_id
+        SavingsTransactionService.record_movements(
+            [(account_id, _transaction.transaction_type, _transaction.amount, _transaction.transaction_ref)]
+            + [(account_id, 'CHARGE', fee_transaction.amount, fee_transaction.transaction_ref)
+               for fee_transaction in posted[1:]]
+        )
+        add_legs(Journal(), _transaction, fee).post()
+        return posted
@@ -0,0 +1,185 @@
+# apps/transactions/services/transfer_service.py
+import logging
+import random
+import time
+from decimal import Decimal
+from typing import Dict, Optional
+
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from apps.members.models import Member
+from apps.savings.models import SavingsAccount
+from apps.savings.services.transaction_service import SavingsTransactionService
+from shared.services.ledger_service import Journal, LedgerService
+from shared.services.reference_service import ReferenceService
+from .limit_counter_service import LimitCounterService
+from .outbox_service import OutboxService
+from .rollup_service import TransactionRollupService
+from .transaction_service import TransactionService
+from ..models import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+class TransferService:
+    """Moves money between two members' savings accounts.
+
+    Both accounts are locked in ascending id order, like every other posting that
+    touches several savings accounts, so two transfers between the same pair in
+    opposite directions queue instead of deadlocking. The ledger's balance rows are
+    always taken after the savings rows, again in a fixed order. Both legs, the fee
+    and the journal are written with bulk statements in one database transaction, and
+    the whole transfer is replayed if the database still reports a serialization
+    failure or deadlock.
+    """
+
+    MAX_ATTEMPTS = 5
+    # Seconds; the upper bound of the random back-off doubles with each attempt
+    RETRY_DELAY = 0.02
+    # Serialization failure and deadlock detected: the database rolled the transfer back
+    RETRYABLE_SQLSTATES = ('40001', '40P01')
+
+    @staticmethod
+    def process_transfer(
+            source_member_id: int,
+            destination_member_id: int,
+            amount: Decimal,
+            description: Optional[str] = None,
+            payment_method: str = 'INTERNAL',
+            initiated_by=None
+    ) -> Dict[str, Transaction]:
+        """Transfer ``amount`` and return the {'debit', 'credit'} transactions (plus 'fee' when charged)."""
+        if source_member_id == destination_member_id:
+            raise ValueError("Cannot transfer to the same member")
+        if amount <= 0:
+            raise ValueError("Transfer amount must be greater than 0")
+
+        attempt = 1
+        while True:
+            try:
+                return TransferService._post_transfer(
+                    source_member_id, destination_member_id, amount, description, payment_method, initiated_by
+                )
+            except OperationalError as e:
+                # Inside a caller's transaction the rollback took the caller's work too; only it can retry
+                if (connection.in_atomic_block or attempt >= TransferService.MAX_ATTEMPTS
+                        or not TransferService._is_retryable(e)):
+                    raise
+                logger.info("Retrying transfer %s -> %s after: %s", source_member_id, destination_member_id, e)
+                time.sleep(random.uniform(0, TransferService.RETRY_DELAY * 2 ** attempt))
+                attempt += 1
+
+    @staticmethod
+    def _is_retryable(error: OperationalError) -> bool:
+        cause = error.__cause__
+        sqlstate = getattr(cause, 'pgcode', None) or getattr(cause, 'sqlstate', None)
+        return sqlstate in TransferService.RETRYABLE_SQLSTATES
+
+    @staticmethod
+    @transaction.atomic
+    def _post_transfer(
+            source_member_id: int,
+            destination_member_id: int,
+            amount: Decimal,
+            description: Optional[str],
+            payment_method: str,
+            initiated_by
+    ) -> Dict[str, Transaction]:
+        members = Member.objects.only('id', 'membership_type', 'savings_account_id').in_bulk(
+            [source_member_id, destination_member_id]
+        )
+        if len(members) != 2:
+            raise ValueError("Member not found")
+        source, destination = members[source_member_id], members[destination_member_id]
+        if source.savings_account_id is None or destination.savings_account_id is None:
+            raise ValueError("Both members need a savings account to transfer")
+
+        reserved = TransactionService._validate_limits(source, 'TRANSFER', payment_method, amount)
+        try:
+            return TransferService._write_transfer(
+                source, destination, amount, description, payment_method, initiated_by
+            )
+        except Exception:
+            LimitCounterService.release(reserved, amount)
+            raise
+
+    @staticmethod
+    def _write_transfer(
+            source: Member,
+            destination: Member,
+            amount: Decimal,
+            description: Optional[str],
+            payment_method: str,
+            initiated_by
+    ) -> Dict[str, Transaction]:
+        fee = TransactionService._calculate_fee('TRANSFER', payment_method, amount)
+
+        accounts = {
+            account.id: account
+            for account in SavingsAccount.objects.select_for_update().filter(
+                id__in=[source.savings_account_id, destination.savings_account_id]
+            ).only('id', 'account_number', 'balance', 'minimum_balance', 'status').order_by('id')
+        }
+        source_account = accounts[source.savings_account_id]
+        destination_account = accounts[destination.savings_account_id]
+        if source_account.status != 'ACTIVE' or destination_account.status != 'ACTIVE':
+            raise ValueError("Both savings accounts must be active")
+        if source_account.balance - source_account.minimum_balance < amount + fee:
+            raise ValueError("Insufficient funds including fees and minimum balance requirement")
+
+        now = timezone.now()
+        posting = {
+            'payment_method': payment_method,
+            'status': 'COMPLETED',
+            'processed_date': now,
+            'source_account': source_account.account_number,
+            'destination_account': destination_account.account_number,
+            'created_by': initiated_by
+        }
+        debit = Transaction(
+            transaction_ref=ReferenceService.generate('TRANSACTION'),
+            member_id=source.id,
+            transaction_type='TRANSFER',
+            amount=amount,
+            description=description or f"Transfer to {destination_account.account_number}",
+            **posting
+        )
+        credit = Transaction(
+            transaction_ref=ReferenceService.generate('TRANSACTION'),
+            member_id=destination.id,
+            transaction_type='TRANSFER',
+            amount=amount,
+            description=description or f"Transfer from {source_account.account_number}",
+            **posting
+        )
+        transactions = {'debit': debit, 'credit': credit}
+        if fee > 0:
+            transactions['fee'] = Transaction(
+                transaction_ref=ReferenceService.generate('FEE'),
+                member_id=source.id,
+                transaction_type='FEE',
+                amount=fee,
+                description=f"Fee for transfer {debit.transaction_ref}",
+                **dict(posting, payment_method='INTERNAL')
+            )
+        Transaction.objects.bulk_create(transactions.values())
+
+        source_account.balance -= amount + fee
+        destination_account.balance += amount
+        SavingsAccount.objects.bulk_update([source_account, destination_account], ['balance'])
+        movements = [
+            (source_account.id, 'TRANSFER_OUT', amount, debit.transaction_ref),
+            (destination_account.id, 'TRANSFER_IN', amount, credit.transaction_ref)
+        ]
+        if 'fee' in transactions:
+            movements.append((source_account.id, 'CHARGE', fee, transactions['fee'].transaction_ref))
+        SavingsTransactionService.record_movements(
+            movements, balances={account.id: account.balance for account in (source_account, destination_account)}
+        )
+
+        LedgerService.add_transfer_legs(Journal(), debit, credit, transactions.get('fee')).post()
+        TransactionRollupService.record(transactions.values())
+        OutboxService.enqueue([debit])
+        OutboxService.enqueue([credit], event_types=('NOTIFICATION',))
+        return transactions
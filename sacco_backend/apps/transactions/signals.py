@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import TransactionFee, TransactionLimit
+from .services.rules_service import TransactionRulesService
+
+
+@receiver(post_save, sender=TransactionFee)
+@receiver(post_delete, sender=TransactionFee)
+@receiver(post_save, sender=TransactionLimit)
+@receiver(post_delete, sender=TransactionLimit)
+def transaction_rules_changed(sender, instance, **kwargs):
+    # Other processes must not reload before the change is visible to them
+    transaction.on_commit(TransactionRulesService.invalidate)
@@ -0,0 +1,62 @@
+# apps/transactions/tasks.py
+from datetime import timedelta
+
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.transactions.services.archive_service import TransactionArchiveService
+from apps.transactions.services.limit_counter_service import LimitCounterService
+from apps.transactions.services.outbox_service import OutboxService
+from apps.transactions.services.reversal_service import ReversalService
+from apps.transactions.services.rollup_service import TransactionRollupService
+from shared.services.idempotency_service import IdempotencyService
+
+
+@shared_task
+def reconcile_limit_counters():
+    return LimitCounterService.reconcile()
+
+
+@shared_task
+def rebuild_transaction_rollups(days: int = 1):
+    """Recompute the rollups of the last ``days`` closed days, picking up rows written outside the services."""
+    yesterday = timezone.localdate() - timedelta(days=1)
+    return TransactionRollupService.rebuild(yesterday - timedelta(days=days - 1), yesterday)
+
+
+@shared_task
+def archive_transactions(limit=None):
+    """Sweep closed-period transactions that nothing references (leg-less fees, failed postings) to the archive."""
+    return TransactionArchiveService.archive(limit=limit)
+
+
+@shared_task
+def process_outbox_events(event_ids):
+    return OutboxService.process(event_ids)
+
+
+@shared_task
+def process_pending_outbox_events():
+    """Sweep up outbox events that were never dispatched or are due a retry."""
+    return OutboxService.process_pending()
+
+
+@shared_task(bind=True)
+def reverse_transactions(self, transaction_ids=None, filters=None, reason=None, user_id=None):
+    """Bulk-reverse transactions; the running summary is published as the task's PROGRESS state."""
+    user = get_user_model().objects.filter(id=user_id).first() if user_id else None
+    return ReversalService.reverse_batch(
+        transaction_ids=transaction_ids,
+        filters=filters,
+        reason=reason,
+        user=user,
+        progress=lambda summary: self.update_state(state='PROGRESS', meta=summary)
+    )
+
+
+@shared_task
+def purge_idempotency_keys():
+    """Delete idempotency keys whose claim lapsed or whose stored response expired."""
+    return IdempotencyService.purge_expired()
+
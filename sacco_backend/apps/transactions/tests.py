@@ -1,14 +1,55 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connection
+from django.db.models import Q, Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 from decimal import Decimal
-from datetime import date
-from unittest.mock import patch
+import csv
+import io
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest import skipUnless
+from unittest.mock import AsyncMock, patch
 
 from apps.authentication.models import Role
+from apps.integrations.models import IntegrationProvider, PaymentTransaction
+from apps.ledger.models import LedgerEntry
+from apps.ledger.services.reconciliation_service import ReconciliationService
+from apps.loans.models import Loan, LoanRepayment
 from apps.members.models import Member
-from apps.transactions.models import Transaction, TransactionFee
+from apps.transactions.models import (
+    ArchivedTransaction, DailyTransactionRollup, IdempotencyKey, OutboxEvent, Transaction, TransactionFee,
+    TransactionLimit
+)
+from apps.transactions.services.archive_service import TransactionArchiveService
+from apps.transactions.services.checkoff_service import CheckoffImportService
+from apps.transactions.services.fees_calculator import FeesCalculator
+from apps.transactions.services.limit_counter_service import LimitCounterService
+from apps.transactions.services.outbox_service import OutboxService
+from apps.transactions.services.rollup_service import TransactionRollupService
+from apps.transactions.services.reversal_service import ReversalService
+from apps.transactions.services.rules_service import TransactionRulesService
+from apps.transactions.services.state_service import TransactionStateService, TransitionConflict
 from apps.transactions.services.transaction_service import TransactionService
-from apps.savings.models import SavingsAccount
+from apps.transactions.services.transfer_service import TransferService
+from apps.transactions.views import TransactionViewSet
+from integrations.payment_gateway.services import PaymentGatewayService
+from apps.savings.models import SavingsAccount, SavingsTransaction
+from shared.services.idempotency_service import IdempotencyConflict, IdempotencyService, idempotent
+from shared.services.ledger_service import LedgerService
+from shared.services.reference_service import ReferenceService, is_valid_reference, luhn_check_digit
 
 User = get_user_model()
 
@@ -75,11 +116,19 @@ class TransactionWorkflowTest(TestCase):
             fixed_amount=Decimal('0'),
             percentage=Decimal('0'),
         )
+        # The rule table outlives each test's rolled-back data
+        TransactionRulesService.invalidate()
+        self.addCleanup(TransactionRulesService.invalidate)
 
         # Mock notification service
-        self.notification_patcher = patch('apps.transactions.services.transaction_service.NotificationService')
+        self.notification_patcher = patch('apps.transactions.services.outbox_service.NotificationService')
         self.mock_notification_service = self.notification_patcher.start()
 
+        # No broker in tests; outbox events are processed explicitly where needed
+        dispatch_patcher = patch('apps.transactions.tasks.process_outbox_events.delay')
+        dispatch_patcher.start()
+        self.addCleanup(dispatch_patcher.stop)
+
         # Mock ledger service
         self.ledger_patcher = patch('apps.transactions.services.transaction_service.LedgerService')
         self.mock_ledger_service = self.ledger_patcher.start()
@@ -111,7 +160,11 @@ class TransactionWorkflowTest(TestCase):
         self.savings_account.refresh_from_db()
         self.assertEqual(self.savings_account.balance, Decimal('150000'))  # 100000 + 50000
 
-        # Check notification was sent
+        # Check notification is queued in the outbox and sent from there
+        self.mock_notification_service.send_transaction_notification.assert_not_called()
+        OutboxService.process(OutboxEvent.objects.filter(
+            transaction=transaction, event_type='NOTIFICATION'
+        ).values_list('id', flat=True))
         self.mock_notification_service.send_transaction_notification.assert_called_once()
 
     def test_withdrawal_transaction(self):
@@ -137,7 +190,11 @@ class TransactionWorkflowTest(TestCase):
         self.savings_account.refresh_from_db()
         self.assertEqual(self.savings_account.balance, Decimal('69000'))  # 100000 - 30000 - 1000 (fee)
 
-        # Check notification was sent
+        # Check notification is queued in the outbox and sent from there
+        self.mock_notification_service.send_transaction_notification.assert_not_called()
+        OutboxService.process(OutboxEvent.objects.filter(
+            transaction=transaction, event_type='NOTIFICATION'
+        ).values_list('id', flat=True))
         self.mock_notification_service.send_transaction_notification.assert_called_once()
 
     def test_withdrawal_exceeding_balance(self):
@@ -177,4 +234,1018 @@ class TransactionWorkflowTest(TestCase):
 
         # Check savings account was updated with amount + fee
         self.savings_account.refresh_from_db()
-        self.assertEqual(self.savings_account.balance, Decimal('79000'))  # 100000 - 20000 - 1000
\ No newline at end of file
+        self.assertEqual(self.savings_account.balance, Decimal('79000'))  # 100000 - 20000 - 1000
+
+    def test_deposit_and_withdrawal_stay_within_query_budget(self):
+        # Member, balance update, both transactions, savings balance read and history, three ledger
+        # statements, rollups, outbox, plus the savepoint and release of create_transaction's
+        # atomic block inside the test's
+        budget = 12
+        self.ledger_patcher.stop()
+        references = iter(range(10 ** 6))
+        with patch.object(ReferenceService, 'generate', side_effect=lambda kind: f"TEST{next(references)}"):
+            # Warm the rule table, chart of accounts and ledger balance rows
+            for transaction_type in ('DEPOSIT', 'WITHDRAWAL'):
+                TransactionService.create_transaction(
+                    member_id=self.member.id, transaction_type=transaction_type,
+                    amount=Decimal('1000'), payment_method='CASH'
+                )
+            for transaction_type in ('DEPOSIT', 'WITHDRAWAL'):
+                with self.assertNumQueries(budget):
+                    TransactionService.create_transaction(
+                        member_id=self.member.id, transaction_type=transaction_type,
+                        amount=Decimal('1000'), payment_method='CASH'
+                    )
+
+            # A rejected withdrawal stops at the conditional balance update and rolls back
+            with self.assertNumQueries(5), self.assertRaisesMessage(ValueError, 'Insufficient funds'):
+                TransactionService.create_transaction(
+                    member_id=self.member.id, transaction_type='WITHDRAWAL',
+                    amount=Decimal('89001'), payment_method='CASH'
+                )
+
+        self.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('98000'))
+        self.assertEqual(Transaction.objects.filter(transaction_type='FEE', status='COMPLETED').count(), 2)
+        self.assertFalse(Transaction.objects.exclude(status='COMPLETED').exists())
+        self.assertEqual(
+            LedgerEntry.objects.filter(account_code='4000').aggregate(total=Sum('amount'))['total'], Decimal('2000')
+        )
+
+    def test_rules_served_from_cache_until_changed(self):
+        TransactionRulesService.get_table()
+        with self.assertNumQueries(0):
+            rules = TransactionRulesService.get_rules('WITHDRAWAL', 'CASH', 'INDIVIDUAL')
+        self.assertEqual(rules.fee.fixed_amount, Decimal('1000'))
+        self.assertEqual(rules.limits, ())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionLimit.objects.create(
+                transaction_type='WITHDRAWAL',
+                limit_type='SINGLE',
+                amount=Decimal('25000'),
+                member_type='INDIVIDUAL'
+            )
+
+        rules = TransactionRulesService.get_rules('WITHDRAWAL', 'CASH', 'INDIVIDUAL')
+        self.assertEqual(rules.limit('SINGLE'), Decimal('25000'))
+        with self.assertRaises(ValueError):
+            TransactionService.create_transaction(
+                member_id=self.member.id,
+                transaction_type='WITHDRAWAL',
+                amount=Decimal('30000'),
+                payment_method='CASH'
+            )
+
+    def test_cached_rules_expire_without_a_signal(self):
+        # A change the cache never hears about, e.g. made while another process held the only version counter
+        TransactionRulesService.get_table()
+        TransactionFee.objects.filter(transaction_type='WITHDRAWAL').update(fixed_amount=Decimal('1500'))
+
+        self.assertEqual(TransactionRulesService.get_fee_rule('WITHDRAWAL', 'CASH').fixed_amount, Decimal('1000'))
+        with override_settings(VERSIONED_CACHE_MAX_AGE=-1):
+            self.assertEqual(TransactionRulesService.get_fee_rule('WITHDRAWAL', 'CASH').fixed_amount, Decimal('1500'))
+
+    def test_daily_limit_uses_running_counter(self):
+        self.addCleanup(caches[settings.TRANSACTION_LIMIT_CACHE].clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionLimit.objects.create(
+                transaction_type='DEPOSIT',
+                limit_type='DAILY',
+                amount=Decimal('60000'),
+                member_type='INDIVIDUAL'
+            )
+
+        self.assertEqual(LimitCounterService.get_total(self.member.id, 'DEPOSIT', 'DAILY'), Decimal('0'))
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionService.create_transaction(
+                member_id=self.member.id,
+                transaction_type='DEPOSIT',
+                amount=Decimal('40000'),
+                payment_method='CASH'
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(LimitCounterService.get_total(self.member.id, 'DEPOSIT', 'DAILY'), Decimal('40000'))
+
+        with self.assertRaises(ValueError):
+            TransactionService.create_transaction(
+                member_id=self.member.id,
+                transaction_type='DEPOSIT',
+                amount=Decimal('25000'),
+                payment_method='CASH'
+            )
+
+        # Writes that bypass the counter are corrected by reconciliation
+        Transaction.objects.filter(member=self.member).update(amount=Decimal('10000'))
+        LimitCounterService.reconcile()
+        self.assertEqual(LimitCounterService.get_total(self.member.id, 'DEPOSIT', 'MONTHLY'), Decimal('10000'))
+        self.assertEqual(LimitCounterService.get_total(self.member.id, 'DEPOSIT', 'DAILY'), Decimal('10000'))
+
+    def test_limit_reservations_are_released_and_reconciled(self):
+        self.ledger_patcher.stop()
+        self.addCleanup(caches[settings.TRANSACTION_LIMIT_CACHE].clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionLimit.objects.create(
+                transaction_type='WITHDRAWAL',
+                limit_type='DAILY',
+                amount=Decimal('50000'),
+                member_type='INDIVIDUAL'
+            )
+
+        def withdraw(amount):
+            with self.captureOnCommitCallbacks(execute=True):
+                return TransactionService.create_transaction(
+                    member_id=self.member.id, transaction_type='WITHDRAWAL', amount=amount, payment_method='CASH'
+                )
+
+        def used():
+            return LimitCounterService.get_total(self.member.id, 'WITHDRAWAL', 'DAILY')
+
+        withdrawal = withdraw(Decimal('40000'))
+        self.assertEqual(used(), Decimal('40000'))
+
+        # Refused by the limit, and by the balance after reserving: neither keeps its reservation
+        with self.assertRaisesMessage(ValueError, 'daily limit'):
+            withdraw(Decimal('20000'))
+        SavingsAccount.objects.filter(id=self.savings_account.id).update(balance=Decimal('15000'))
+        with self.assertRaisesMessage(ValueError, 'Insufficient funds'):
+            withdraw(Decimal('9000'))
+        self.assertEqual(used(), Decimal('40000'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionStateService.transition(withdrawal.id, 'reverse')
+        self.assertEqual(used(), Decimal('0'))
+
+        # A posting rolled back by its caller leaves no row behind; reconciliation takes it back out
+        key = LimitCounterService._key(self.member.id, 'WITHDRAWAL', 'DAILY', timezone.localdate())
+        caches[settings.TRANSACTION_LIMIT_CACHE].incr(key, 700000)
+        self.assertEqual(LimitCounterService.reconcile(), 1)
+        self.assertEqual(used(), Decimal('0'))
+
+    def test_incoming_transfers_do_not_count_against_the_recipient(self):
+        self.addCleanup(caches[settings.TRANSACTION_LIMIT_CACHE].clear)
+        other = self._create_member('04', Decimal('20000'))
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionLimit.objects.create(
+                transaction_type='TRANSFER', limit_type='DAILY', amount=Decimal('30000'), member_type='INDIVIDUAL'
+            )
+
+        def used(member):
+            return LimitCounterService.get_total(member.id, 'TRANSFER', 'DAILY')
+
+        # Seeded before and reseeded after the transfer, the recipient's counter stays at what they sent
+        self.assertEqual(used(other), Decimal('0'))
+        with self.captureOnCommitCallbacks(execute=True):
+            transfer = TransferService.process_transfer(self.member.id, other.id, Decimal('25000'))
+        caches[settings.TRANSACTION_LIMIT_CACHE].clear()
+        self.assertEqual((used(self.member), used(other)), (Decimal('25000'), Decimal('0')))
+        LimitCounterService.reconcile()
+        self.assertEqual((used(self.member), used(other)), (Decimal('25000'), Decimal('0')))
+
+        # Having received 25000, the recipient can still send up to its own limit
+        with self.captureOnCommitCallbacks(execute=True):
+            TransferService.process_transfer(other.id, self.member.id, Decimal('30000'))
+        self.assertEqual(used(other), Decimal('30000'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionStateService.transition(transfer['credit'].id, 'reverse')
+        self.assertEqual((used(self.member), used(other)), (Decimal('0'), Decimal('30000')))
+
+    def test_checkoff_import(self):
+        loan = Loan.objects.create(
+            reference='LN2024CHK001',
+            member=self.member,
+            loan_type='PERSONAL',
+            amount=Decimal('20000'),
+            interest_rate=Decimal('12'),
+            term_months=2,
+            status='DISBURSED',
+            total_amount_payable=Decimal('21000'),
+            total_interest=Decimal('1000'),
+            outstanding_balance=Decimal('21000')
+        )
+        for month, due_date in enumerate([date(2024, 2, 1), date(2024, 3, 1)], start=1):
+            LoanRepayment.objects.create(
+                loan=loan,
+                reference=f'RPCHK001-{month:02d}',
+                due_date=due_date,
+                amount=Decimal('10500'),
+                principal_component=Decimal('10000'),
+                interest_component=Decimal('500')
+            )
+
+        upload = io.BytesIO(
+            b"Member_Number,savings_amount,loan_amount,loan_reference\n"
+            b"M2024TEST001,5000,12000,\n"
+            b"M9999UNKNOWN,1000,,\n"
+            b"M2024TEST001,abc,,\n"
+            b"M2024TEST001,,20000,LN2024CHK001\n"
+        )
+        results = io.StringIO()
+        summary = CheckoffImportService.import_file(upload, 'payroll.csv', results)
+
+        self.assertEqual((summary['posted'], summary['rejected'], summary['failed']), (1, 3, 0))
+        rows = list(csv.DictReader(io.StringIO(results.getvalue())))
+        self.assertEqual([row['status'] for row in rows], ['POSTED', 'REJECTED', 'REJECTED', 'REJECTED'])
+        self.assertIn('exceeds', rows[3]['error'])
+
+        self.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('105000'))
+
+        first, second = LoanRepayment.objects.filter(loan=loan).order_by('due_date')
+        self.assertEqual((first.status, first.amount_paid), ('COMPLETED', Decimal('10500')))
+        self.assertEqual((second.status, second.amount_paid), ('PENDING', Decimal('1500')))
+        loan.refresh_from_db()
+        self.assertEqual(loan.outstanding_balance, Decimal('9000'))
+        self.assertEqual(loan.next_payment_date, date(2024, 3, 1))
+
+        repayment = Transaction.objects.get(transaction_ref=rows[0]['loan_transaction_ref'])
+        legs = dict(LedgerEntry.objects.filter(transaction=repayment).values_list('account_code', 'amount'))
+        # Second instalment's 1500 pays its 500 interest first
+        self.assertEqual(legs, {'1000': Decimal('12000'), '1100': Decimal('11000'), '4100': Decimal('1000')})
+
+        # References come from the reference sequences; the batch is found by its own one
+        self.assertTrue(summary['batch'].startswith('CHK') and is_valid_reference(summary['batch']))
+        refs = set(Transaction.objects.filter(external_reference=summary['batch']).values_list(
+            'transaction_ref', flat=True
+        ))
+        self.assertEqual(refs, {rows[0]['savings_transaction_ref'], rows[0]['loan_transaction_ref']})
+        self.assertTrue(all(ref.startswith('TXN') and is_valid_reference(ref) for ref in refs))
+
+    def test_idempotency_key_replays_response(self):
+        calls = []
+
+        class DepositView(APIView):
+            @idempotent('tests.deposit')
+            def post(self, request):
+                calls.append(request.data['amount'])
+                return Response({'count': len(calls)}, status=201)
+
+        factory = APIRequestFactory()
+        view = DepositView.as_view()
+
+        def post(data, key):
+            request = factory.post('/deposit/', data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+            force_authenticate(request, user=self.user)
+            return view(request)
+
+        first = post({'amount': '100'}, 'key-1')
+        replay = post({'amount': '100'}, 'key-1')
+        self.assertEqual((first.status_code, replay.status_code), (201, 201))
+        self.assertEqual(replay.data, {'count': 1})
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(len(calls), 1)
+
+        self.assertEqual(post({'amount': '999'}, 'key-1').status_code, 409)
+        self.assertEqual(post({'amount': '100'}, 'key-2').data, {'count': 2})
+
+    def test_idempotent_request_commits_with_its_postings(self):
+        calls = []
+
+        class FeeView(APIView):
+            @idempotent('tests.fee')
+            def post(self, request):
+                calls.append(TransactionFee.objects.create(
+                    transaction_type='TRANSFER', payment_method='INTERNAL', fixed_amount=Decimal('500')
+                ))
+                if len(calls) == 1:
+                    # Dies after its posting, before the response is stored
+                    raise RuntimeError("worker lost")
+                return Response({'fee': calls[-1].fixed_amount}, status=201)
+
+        factory = APIRequestFactory()
+        view = FeeView.as_view()
+
+        def post():
+            request = factory.post('/fee/', {'amount': '500'}, format='json', HTTP_IDEMPOTENCY_KEY='fee-1')
+            force_authenticate(request, user=self.user)
+            return view(request)
+
+        with self.assertRaises(RuntimeError):
+            post()
+        # Neither the posting nor the claim outlived the failed attempt, so the retry runs once
+        self.assertFalse(TransactionFee.objects.filter(transaction_type='TRANSFER').exists())
+        self.assertEqual(post().status_code, 201)
+        replay = post()
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.data, {'fee': Decimal('500')})
+        self.assertEqual(TransactionFee.objects.filter(transaction_type='TRANSFER').count(), 1)
+
+    def test_idempotent_deposit_and_transfer_endpoints(self):
+        other = self._create_member('02', Decimal('20000'))
+        factory = APIRequestFactory()
+
+        def post(action, url, data, key):
+            request = factory.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+            force_authenticate(request, user=self.user)
+            response = TransactionViewSet.as_view({'post': action})(request)
+            # A retry may land on another worker: nothing it needs may live in this process's cache
+            caches['default'].clear()
+            return response
+
+        deposit = {'member': self.member.id, 'transaction_type': 'DEPOSIT', 'amount': '5000', 'payment_method': 'CASH'}
+        first = post('create', '/transactions/', deposit, 'deposit-1')
+        replay = post('create', '/transactions/', deposit, 'deposit-1')
+        self.assertEqual((first.status_code, replay.status_code), (201, 201))
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.data['transaction_ref'], first.data['transaction_ref'])
+        self.assertEqual(post('create', '/transactions/', dict(deposit, amount='6000'), 'deposit-1').status_code, 409)
+
+        transfer = {'source_member_id': self.member.id, 'destination_member_id': other.id, 'amount': '25000'}
+        first = post('transfer', '/transactions/transfer/', transfer, 'transfer-1')
+        replay = post('transfer', '/transactions/transfer/', transfer, 'transfer-1')
+        self.assertEqual((first.status_code, replay.status_code), (200, 200))
+        self.assertEqual(replay.data['debit_transaction']['id'], first.data['debit_transaction']['id'])
+
+        self.savings_account.refresh_from_db()
+        other.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('80000'))
+        self.assertEqual(other.savings_account.balance, Decimal('45000'))
+        self.assertEqual(Transaction.objects.filter(transaction_type__in=['DEPOSIT', 'TRANSFER']).count(), 3)
+
+    def test_idempotent_payment_initiation(self):
+        gateway = AsyncMock(return_value={'provider_reference': 'PRV-1', 'status': 'PENDING'})
+        initiate = async_to_sync(PaymentGatewayService.initiate_payment)
+        with patch.object(PaymentGatewayService, '_initiate_payment', gateway):
+            first = initiate(Decimal('1500'), 'MPESA', idempotency_key='pay-1', phone_number='+256700000000')
+            replay = initiate(Decimal('1500'), 'MPESA', idempotency_key='pay-1', phone_number='+256700000000')
+            with self.assertRaises(IdempotencyConflict):
+                initiate(Decimal('2500'), 'MPESA', idempotency_key='pay-1', phone_number='+256700000000')
+
+        self.assertEqual(replay, first)
+        self.assertEqual(gateway.await_count, 1)
+
+    def test_lapsed_payment_claim_is_recovered_not_replayed(self):
+        gateway = AsyncMock(return_value={'provider_reference': 'PRV-2', 'status': 'PENDING'})
+        initiate = async_to_sync(PaymentGatewayService.initiate_payment)
+        provider = IntegrationProvider.objects.create(name='MPESA', provider_type='PAYMENT', config={})
+
+        def lapsed_claim(key, reference):
+            IdempotencyKey.objects.create(
+                key=IdempotencyService.record_key('payments.initiate', 'MPESA', key),
+                fingerprint=IdempotencyService.fingerprint({'amount': Decimal('1500'), 'payment_method': 'MPESA'}),
+                resource=reference,
+                expires_at=timezone.now() - timedelta(seconds=1)
+            )
+
+        with patch.object(PaymentGatewayService, '_initiate_payment', gateway):
+            # The worker died after the gateway accepted the payment: its outcome is completed, not posted again
+            lapsed_claim('pay-2', 'PAY-DONE')
+            PaymentTransaction.objects.create(
+                provider=provider, internal_reference='PAY-DONE', provider_reference='PRV-1', amount=Decimal('1500'),
+                status='PENDING'
+            )
+            self.assertEqual(
+                initiate(Decimal('1500'), 'MPESA', idempotency_key='pay-2'),
+                {'provider_reference': 'PRV-1', 'status': 'PENDING'}
+            )
+
+            # It died before the gateway answered: nobody can tell, so nothing is retried
+            lapsed_claim('pay-3', 'PAY-UNKNOWN')
+            PaymentTransaction.objects.create(
+                provider=provider, internal_reference='PAY-UNKNOWN', amount=Decimal('1500'), status='INITIATED'
+            )
+            with self.assertRaises(IdempotencyConflict):
+                initiate(Decimal('1500'), 'MPESA', idempotency_key='pay-3')
+
+            # It died before creating the payment: the retry takes the claim over
+            lapsed_claim('pay-4', 'PAY-NEVER')
+            self.assertEqual(initiate(Decimal('1500'), 'MPESA', idempotency_key='pay-4')['provider_reference'], 'PRV-2')
+
+        self.assertEqual(gateway.await_count, 1)
+        self.assertTrue(IdempotencyKey.objects.get(
+            key=IdempotencyService.record_key('payments.initiate', 'MPESA', 'pay-2')
+        ).completed)
+
+    def _create_member(self, suffix, balance):
+        user = User.objects.create_user(
+            email=f'member{suffix}@example.com', password='testpass123', first_name='Other', last_name=suffix,
+            role=self.role, phone_number=f'+2567000000{suffix}', national_id=f'TEST{suffix}'
+        )
+        member = Member.objects.create(
+            user=user, member_number=f'M2024TEST{suffix}', date_of_birth=date(1990, 1, 1), marital_status='SINGLE',
+            employment_status='EMPLOYED', occupation='Teacher', monthly_income=Decimal('500000'),
+            physical_address='Test Address', city='Kampala', district='Central', national_id=f'TEST{suffix}',
+            membership_number=f'SACCOM2024TEST{suffix}', membership_type='INDIVIDUAL'
+        )
+        member.savings_account = SavingsAccount.objects.create(
+            member=member, account_number=f'SAV20240000{suffix}', account_type='REGULAR', balance=balance,
+            interest_rate=Decimal('3.50'), status='ACTIVE', minimum_balance=Decimal('10000')
+        )
+        member.save()
+        return member
+
+    def test_transfer_between_members(self):
+        other = self._create_member('02', Decimal('20000'))
+        TransactionFee.objects.create(transaction_type='TRANSFER', payment_method='INTERNAL', fixed_amount=Decimal('500'))
+        TransactionRulesService.invalidate()
+
+        transfer = TransferService.process_transfer(self.member.id, other.id, Decimal('25000'), initiated_by=self.user)
+
+        self.savings_account.refresh_from_db()
+        other.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('74500'))
+        self.assertEqual(other.savings_account.balance, Decimal('45000'))
+        self.assertEqual((transfer['debit'].member_id, transfer['credit'].member_id), (self.member.id, other.id))
+        self.assertEqual(transfer['fee'].amount, Decimal('500'))
+
+        legs = LedgerEntry.objects.filter(transaction__in=transfer.values())
+        totals = {
+            (row['account_code'], row['entry_type']): row['total']
+            for row in legs.values('account_code', 'entry_type').annotate(total=Sum('amount'))
+        }
+        self.assertEqual(totals[('2900', 'DEBIT')], totals[('2900', 'CREDIT')])
+        self.assertEqual(totals[('2000', 'DEBIT')] - totals[('2000', 'CREDIT')], Decimal('500'))
+        self.assertEqual(totals[('4000', 'CREDIT')], Decimal('500'))
+
+        with self.assertRaisesMessage(ValueError, 'Insufficient funds'):
+            TransferService.process_transfer(other.id, self.member.id, Decimal('40000'))
+        with self.assertRaises(ValueError):
+            TransferService.process_transfer(other.id, other.id, Decimal('100'))
+
+    def test_every_posting_path_keeps_the_savings_history(self):
+        self.ledger_patcher.stop()
+        other = self._create_member('02', Decimal('20000'))
+        TransactionFee.objects.create(transaction_type='TRANSFER', payment_method='INTERNAL', fixed_amount=Decimal('500'))
+        TransactionRulesService.invalidate()
+        # Opening balances, as account opening records them
+        for account in (self.savings_account, other.savings_account):
+            SavingsTransaction.objects.create(
+                account=account, transaction_type='DEPOSIT', amount=account.balance, balance_after=account.balance,
+                reference=f"OPEN-{account.account_number}"
+            )
+
+        deposit = TransactionService.create_transaction(
+            member_id=self.member.id, transaction_type='DEPOSIT', amount=Decimal('5000'), payment_method='CASH'
+        )
+        TransactionService.create_transaction(
+            member_id=self.member.id, transaction_type='WITHDRAWAL', amount=Decimal('3000'), payment_method='CASH'
+        )
+        TransferService.process_transfer(self.member.id, other.id, Decimal('25000'))
+        CheckoffImportService.import_file(
+            io.BytesIO(b"member_number,savings_amount\nM2024TEST02,7000\n"), 'payroll.csv', io.StringIO()
+        )
+        TransactionStateService.transition(deposit.id, 'reverse', reason='Posted twice')
+
+        history = list(SavingsTransaction.objects.filter(account=self.savings_account).order_by('id').values_list(
+            'transaction_type', 'amount', 'balance_after'
+        ))
+        self.assertEqual(history, [
+            ('DEPOSIT', Decimal('100000'), Decimal('100000')),
+            ('DEPOSIT', Decimal('5000'), Decimal('105000')),
+            ('WITHDRAWAL', Decimal('3000'), Decimal('102000')),
+            ('CHARGE', Decimal('1000'), Decimal('101000')),
+            ('TRANSFER_OUT', Decimal('25000'), Decimal('76000')),
+            ('CHARGE', Decimal('500'), Decimal('75500')),
+            ('REVERSAL_DEBIT', Decimal('5000'), Decimal('70500')),
+        ])
+
+        run = ReconciliationService.run()
+        self.assertFalse(run.breaks.filter(break_type__in=['CHAIN', 'ACCOUNT_BALANCE']).exists())
+        other.savings_account.refresh_from_db()
+        self.assertEqual(other.savings_account.balance, Decimal('52000'))
+
+    def test_transfer_retries_deadlocks(self):
+        other = self._create_member('02', Decimal('20000'))
+        deadlock = OperationalError('deadlock detected')
+        deadlock.__cause__ = type('TransactionRollbackError', (Exception,), {'pgcode': '40P01'})()
+        post = TransferService._post_transfer
+        attempts = []
+
+        def flaky_post(*args):
+            attempts.append(args)
+            if len(attempts) < 3:
+                raise deadlock
+            return post(*args)
+
+        # Outside a caller's transaction the whole transfer is replayed
+        with patch.object(TransferService, '_post_transfer', side_effect=flaky_post), \
+                patch('apps.transactions.services.transfer_service.connection', SimpleNamespace(in_atomic_block=False)), \
+                patch('apps.transactions.services.transfer_service.time.sleep'):
+            TransferService.process_transfer(self.member.id, other.id, Decimal('1000'))
+        self.assertEqual(len(attempts), 3)
+
+        other.savings_account.refresh_from_db()
+        self.assertEqual(other.savings_account.balance, Decimal('21000'))
+
+        with patch.object(TransferService, '_post_transfer', side_effect=OperationalError('disk full')) as attempt, \
+                patch('apps.transactions.services.transfer_service.connection', SimpleNamespace(in_atomic_block=False)):
+            with self.assertRaises(OperationalError):
+                TransferService.process_transfer(self.member.id, other.id, Decimal('1000'))
+        self.assertEqual(attempt.call_count, 1)
+
+    def test_side_effects_run_from_outbox_after_commit(self):
+        with patch('apps.transactions.tasks.process_outbox_events.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            deposit = TransactionService.create_transaction(
+                member_id=self.member.id, transaction_type='DEPOSIT', amount=Decimal('50000'), payment_method='CASH'
+            )
+            delay.assert_not_called()
+
+        event_ids = delay.call_args[0][0]
+        self.assertEqual(len(event_ids), 3)
+
+        # A failing side effect is retried later and leaves the posting alone
+        self.mock_notification_service.send_transaction_notification.side_effect = RuntimeError('SMS gateway down')
+        with patch.object(OutboxService, 'MAX_ATTEMPTS', 2), \
+                patch('apps.transactions.services.outbox_service.FraudDetectionService.analyze_transaction',
+                      new_callable=AsyncMock) as analyze, \
+                patch('apps.transactions.services.outbox_service.ComplianceService.check_aml_compliance',
+                      new_callable=AsyncMock) as check_aml, \
+                self.assertLogs('apps.transactions.services.outbox_service', 'ERROR'):
+            self.assertEqual(OutboxService.process(event_ids), 2)
+            self.assertEqual(OutboxService.process(event_ids), 0)
+        analyze.assert_awaited_once_with(deposit)
+        check_aml.assert_awaited_once_with(deposit)
+
+        notification = OutboxEvent.objects.get(event_type='NOTIFICATION')
+        self.assertEqual((notification.status, notification.attempts), ('FAILED', 2))
+        self.assertEqual(notification.last_error, 'SMS gateway down')
+        deposit.refresh_from_db()
+        self.assertEqual(deposit.status, 'COMPLETED')
+
+    def test_rollups_track_transactions(self):
+        for amount in ('50000', '20000'):
+            TransactionService.create_transaction(
+                member_id=self.member.id, transaction_type='DEPOSIT', amount=Decimal(amount), payment_method='CASH'
+            )
+        TransactionService.create_transaction(
+            member_id=self.member.id, transaction_type='WITHDRAWAL', amount=Decimal('5000'), payment_method='CASH'
+        )
+
+        summary = TransactionService.get_transaction_summary(self.user)
+        self.assertEqual(summary['by_type']['DEPOSIT'], {'count': 2, 'total': Decimal('70000')})
+        self.assertEqual(summary['total_withdrawals'], Decimal('5000'))
+        self.assertEqual(summary['total_fees'], Decimal('1000'))
+        self.assertEqual(summary['transaction_count'], 4)
+
+        # A status change moves the transaction between rollups
+        withdrawal = Transaction.objects.get(transaction_type='WITHDRAWAL')
+        Transaction.objects.filter(id=withdrawal.id).update(status='REVERSED')
+        withdrawal.status = 'REVERSED'
+        TransactionRollupService.record([withdrawal], previous_status='COMPLETED')
+        self.assertNotIn('WITHDRAWAL', TransactionService.get_transaction_summary(self.user)['by_type'])
+
+        incremental = set(DailyTransactionRollup.objects.exclude(count=0).values_list(
+            'date', 'transaction_type', 'payment_method', 'status', 'count', 'total'
+        ))
+        today = timezone.localdate()
+        self.assertEqual(TransactionRollupService.rebuild(today, today), 3)
+        rebuilt = set(DailyTransactionRollup.objects.values_list(
+            'date', 'transaction_type', 'payment_method', 'status', 'count', 'total'
+        ))
+        self.assertEqual(rebuilt, incremental)
+
+    def test_fee_quotes_match_calculator_exactly(self):
+        rules = [
+            ('TRANSFER', 'MOBILE_MONEY', '150', '1.25', '500', '2500'),
+            ('TRANSFER', 'BANK_TRANSFER', '0', '0.33', '0', None),
+            ('LOAN_REPAYMENT', 'MOBILE_MONEY', '75.5', '2.5', '100', '0'),
+            ('FEE', 'CHEQUE', '10', '0', '250', '200'),
+        ]
+        for transaction_type, payment_method, fixed, percentage, minimum, maximum in rules:
+            TransactionFee.objects.create(
+                transaction_type=transaction_type, payment_method=payment_method, fixed_amount=Decimal(fixed),
+                percentage=Decimal(percentage), min_amount=Decimal(minimum),
+                max_amount=Decimal(maximum) if maximum is not None else None
+            )
+        TransactionRulesService.invalidate()
+        TransactionRulesService.get_table()
+
+        rng = random.Random(20)
+        keys = [rule[:2] for rule in rules] + [('WITHDRAWAL', 'CASH'), ('DEPOSIT', 'CASH')]
+        amounts = [Decimal(rng.randint(1, 10 ** rng.randint(1, 10))).scaleb(-2) for _ in range(400)]
+        amounts += [Decimal('0.01'), Decimal('2'), Decimal('5000.00'), Decimal('99999999.99'), Decimal('121.20')]
+        quotes = [
+            (amount, transaction_type, payment_method, member_type)
+            for amount in amounts
+            for transaction_type, payment_method in keys
+            for member_type in ('REGULAR', 'PREMIUM', 'GOLD', 'CORPORATE')
+        ]
+
+        with self.assertNumQueries(0):
+            quoted = FeesCalculator.quote_fees(quotes)
+        for quote, fee in zip(quotes, quoted):
+            expected = FeesCalculator.calculate_transaction_fee(quote[1], quote[2], quote[0], quote[3])
+            self.assertEqual(
+                {key: value.as_tuple() for key, value in fee.items()},
+                {key: value.as_tuple() for key, value in expected.items()},
+                quote
+            )
+
+        self.assertEqual(FeesCalculator.quote_fees([(Decimal('10'), 'INTEREST', 'CASH', 'REGULAR')]), [None])
+
+    def test_fee_quote_endpoint(self):
+        factory = APIRequestFactory()
+        request = factory.post('/transactions/fee-quote/', {'quotes': [
+            {'amount': '30000', 'transaction_type': 'WITHDRAWAL', 'payment_method': 'CASH', 'member_type': 'GOLD'},
+            {'amount': '10', 'transaction_type': 'INTEREST', 'payment_method': 'CASH'},
+        ]}, format='json')
+        force_authenticate(request, user=self.user)
+        response = TransactionViewSet.as_view({'post': 'fee_quote'})(request)
+
+        self.assertEqual(response.status_code, 200)
+        gold, missing = response.data['quotes']
+        self.assertEqual((gold['amount'], gold['total_fee']), ('30000.00', '250.0000'))
+        self.assertIn('No fee defined', missing['error'])
+
+    def test_status_transitions_are_conditional(self):
+        pending = [
+            Transaction.objects.create(
+                transaction_ref=f'TXN-PENDING-{i}', member=self.member, transaction_type='INTEREST',
+                amount=Decimal('100'), payment_method='INTERNAL'
+            )
+            for i in range(3)
+        ]
+        TransactionRollupService.record(pending)
+
+        approved = TransactionStateService.transition(pending[0].id, 'approve', user=self.user, version=0)
+        self.assertEqual((approved.status, approved.version), ('COMPLETED', 1))
+        self.assertIsNotNone(approved.processed_date)
+        # A second approver, or one holding the version it read before, gets nothing applied
+        with self.assertRaisesMessage(TransitionConflict, 'Only pending transactions can be approved'):
+            TransactionStateService.transition(pending[0].id, 'approve', user=self.user)
+        with self.assertRaises(TransitionConflict):
+            TransactionStateService.transition(pending[1].id, 'reject', version=1)
+
+        changed = TransactionStateService.bulk_transition(
+            [transaction.id for transaction in pending], 'reject', user=self.user, reason='Duplicate'
+        )
+        self.assertEqual([transaction.id for transaction in changed], [pending[1].id, pending[2].id])
+        self.assertEqual({transaction.description for transaction in changed}, {'Rejected: Duplicate'})
+        with self.assertRaises(ValueError):
+            TransactionStateService.bulk_transition([pending[0].id], 'complete')
+
+        rollups = {
+            row.status: row.count for row in DailyTransactionRollup.objects.filter(transaction_type='INTEREST')
+        }
+        self.assertEqual(rollups, {'PENDING': 0, 'COMPLETED': 1, 'FAILED': 2})
+
+    def test_reversal_compensates_balance_ledger_and_fee(self):
+        self.ledger_patcher.stop()
+        withdrawal = TransactionService.create_transaction(
+            member_id=self.member.id, transaction_type='WITHDRAWAL', amount=Decimal('30000'), payment_method='CASH'
+        )
+        fee = Transaction.objects.get(transaction_type='FEE')
+
+        reversed_withdrawal = TransactionStateService.transition(withdrawal.id, 'reverse', reason='Teller error')
+        self.assertEqual(reversed_withdrawal.status, 'REVERSED')
+        fee.refresh_from_db()
+        self.assertEqual(fee.status, 'REVERSED')
+        self.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('100000'))
+
+        reversal = withdrawal.reversal
+        self.assertEqual((reversal.transaction_type, reversal.amount), ('REVERSAL', Decimal('30000')))
+        self.assertIn('Teller error', reversal.description)
+        net = {
+            row['account_code']: row['net']
+            for row in LedgerEntry.objects.values('account_code').annotate(
+                net=Sum('amount', filter=Q(entry_type='DEBIT')) - Sum('amount', filter=Q(entry_type='CREDIT'))
+            )
+        }
+        self.assertEqual(net, {'1000': Decimal('0'), '2000': Decimal('0'), '4000': Decimal('0')})
+
+        with self.assertRaises(TransitionConflict):
+            TransactionStateService.transition(withdrawal.id, 'reverse')
+        self.assertEqual(Transaction.objects.filter(transaction_type='REVERSAL').count(), 1)
+        summary = TransactionRollupService.summarize(timezone.localdate(), timezone.localdate())
+        self.assertEqual(set(summary), {'REVERSAL'})
+
+    def _ledger_net(self):
+        return {
+            row['account_code']: row['net']
+            for row in LedgerEntry.objects.values('account_code').annotate(
+                net=Sum('amount', filter=Q(entry_type='DEBIT')) - Sum('amount', filter=Q(entry_type='CREDIT'))
+            )
+        }
+
+    def test_transfer_reversal_takes_both_legs_and_its_fee(self):
+        other = self._create_member('03', Decimal('20000'))
+        TransactionFee.objects.create(transaction_type='TRANSFER', payment_method='INTERNAL', fixed_amount=Decimal('500'))
+        TransactionRulesService.invalidate()
+        transfer = TransferService.process_transfer(self.member.id, other.id, Decimal('25000'))
+
+        # The fee has legs of its own, so it can be refunded alone
+        TransactionStateService.transition(transfer['fee'].id, 'reverse', reason='Fee waived')
+        self.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('75000'))
+        self.assertEqual(self._ledger_net()['2900'], Decimal('0'))
+
+        # Reversing the credit leg takes the debit leg with it
+        TransactionStateService.transition(transfer['credit'].id, 'reverse', reason='Wrong account')
+        self.assertEqual(
+            set(Transaction.objects.filter(transaction_type__in=['TRANSFER', 'FEE']).values_list('status', flat=True)),
+            {'REVERSED'}
+        )
+        self.assertEqual(Transaction.objects.filter(transaction_type='REVERSAL').count(), 3)
+        self.savings_account.refresh_from_db()
+        other.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('100000'))
+        self.assertEqual(other.savings_account.balance, Decimal('20000'))
+        self.assertEqual(self._ledger_net(), {'2000': Decimal('0'), '2900': Decimal('0'), '4000': Decimal('0')})
+        self.assertEqual(
+            list(SavingsTransaction.objects.filter(account=other.savings_account).order_by('id').values_list(
+                'transaction_type', 'amount'
+            )),
+            [('TRANSFER_IN', Decimal('25000')), ('REVERSAL_DEBIT', Decimal('25000'))]
+        )
+
+    def test_fee_journalled_on_its_withdrawal_is_only_reversed_with_it(self):
+        self.ledger_patcher.stop()
+        withdrawal = TransactionService.create_transaction(
+            member_id=self.member.id, transaction_type='WITHDRAWAL', amount=Decimal('30000'), payment_method='CASH'
+        )
+        fee = Transaction.objects.get(transaction_type='FEE')
+
+        with self.assertRaises(TransitionConflict):
+            TransactionStateService.transition(fee.id, 'reverse')
+        fee.refresh_from_db()
+        self.assertEqual(fee.status, 'COMPLETED')
+        self.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('69000'))
+
+        TransactionStateService.transition(withdrawal.id, 'reverse')
+        fee.refresh_from_db()
+        self.assertEqual(fee.status, 'REVERSED')
+        self.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('100000'))
+        self.assertEqual(self._ledger_net()['2000'], Decimal('0'))
+
+    def test_bulk_reversal_in_chunks(self):
+        self.ledger_patcher.stop()
+        other = self._create_member('02', Decimal('20000'))
+        TransactionFee.objects.create(transaction_type='DEPOSIT', payment_method='MOBILE_MONEY', fixed_amount=Decimal('100'))
+        TransactionRulesService.invalidate()
+        for member in (self.member, other, self.member):
+            TransactionService.create_transaction(
+                member_id=member.id, transaction_type='DEPOSIT', amount=Decimal('5000'), payment_method='MOBILE_MONEY'
+            )
+        repayment = Transaction.objects.create(
+            transaction_ref='TXN-REPAYMENT', member=self.member, transaction_type='LOAN_REPAYMENT',
+            amount=Decimal('700'), payment_method='MOBILE_MONEY', status='COMPLETED'
+        )
+
+        progress = []
+        with patch.object(ReversalService, 'CHUNK_SIZE', 2):
+            summary = ReversalService.reverse_batch(
+                filters={'payment_method': 'MOBILE_MONEY', 'created_at__gte': timezone.now() - timedelta(hours=1)},
+                reason='Provider outage', progress=progress.append
+            )
+
+        self.assertEqual(summary, {'selected': 4, 'processed': 4, 'reversed': 3, 'skipped': 1, 'failed': 0})
+        self.assertEqual([update['processed'] for update in progress], [2, 4])
+        self.savings_account.refresh_from_db()
+        other.savings_account.refresh_from_db()
+        self.assertEqual(self.savings_account.balance, Decimal('100000'))
+        self.assertEqual(other.savings_account.balance, Decimal('20000'))
+        self.assertEqual(
+            set(Transaction.objects.filter(transaction_type='DEPOSIT').values_list('status', flat=True)), {'REVERSED'}
+        )
+        # The fees were refunded with their deposits
+        self.assertEqual(
+            set(Transaction.objects.filter(transaction_type='FEE').values_list('status', flat=True)), {'REVERSED'}
+        )
+        repayment.refresh_from_db()
+        self.assertEqual(repayment.status, 'COMPLETED')
+        self.assertEqual(Transaction.objects.filter(transaction_type='REVERSAL').count(), 3)
+
+        # Running it again finds nothing left to reverse
+        summary = ReversalService.reverse_batch(filters={'payment_method': 'MOBILE_MONEY'})
+        self.assertEqual((summary['selected'], summary['reversed']), (1, 0))
+        with self.assertRaises(ValueError):
+            ReversalService.reverse_batch(filters={'amount__gt': 0})
+
+    def test_bulk_transition_endpoint(self):
+        pending = Transaction.objects.create(
+            transaction_ref='TXN-PENDING', member=self.member, transaction_type='INTEREST',
+            amount=Decimal('100'), payment_method='INTERNAL'
+        )
+        factory = APIRequestFactory()
+        view = TransactionViewSet.as_view({'post': 'bulk_transition'})
+
+        request = factory.post('/transactions/bulk-transition/', {'action': 'approve', 'ids': [pending.id]}, format='json')
+        force_authenticate(request, user=self.user)
+        self.assertEqual(view(request).status_code, 403)
+
+        staff = User.objects.create_user(
+            email='staff@example.com', password='testpass123', first_name='Staff', last_name='User',
+            role=Role.objects.create(name='STAFF'), phone_number='+256700000099', national_id='STAFF1'
+        )
+        request = factory.post(
+            '/transactions/bulk-transition/', {'action': 'approve', 'ids': [pending.id, pending.id + 1000]}, format='json'
+        )
+        force_authenticate(request, user=staff)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'transitioned': [pending.id], 'skipped': [pending.id + 1000]})
+
+        request = factory.post(f'/transactions/{pending.id}/approve/', {'version': 0}, format='json')
+        force_authenticate(request, user=staff)
+        response = TransactionViewSet.as_view({'post': 'approve'})(request, pk=pending.id)
+        self.assertEqual(response.status_code, 409)
+
+    def test_transactions_cannot_be_edited_or_deleted_in_place(self):
+        pending = Transaction.objects.create(
+            transaction_ref='TXN-PENDING', member=self.member, transaction_type='INTEREST',
+            amount=Decimal('100'), payment_method='INTERNAL'
+        )
+        factory = APIRequestFactory()
+        view = TransactionViewSet.as_view({'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'})
+        change = {'amount': '999999', 'status': 'COMPLETED'}
+
+        for request in (
+            factory.put(f'/transactions/{pending.id}/', change, format='json'),
+            factory.patch(f'/transactions/{pending.id}/', change, format='json'),
+            factory.delete(f'/transactions/{pending.id}/')
+        ):
+            force_authenticate(request, user=self.user)
+            self.assertEqual(view(request, pk=pending.id).status_code, 405)
+
+        pending.refresh_from_db()
+        self.assertEqual((pending.amount, pending.status), (Decimal('100'), 'PENDING'))
+
+    def test_history_pages_by_keyset(self):
+        ids = [
+            Transaction.objects.create(
+                transaction_ref=f'TXNPAGE{i}', member=self.member, transaction_type='DEPOSIT',
+                amount=Decimal('100'), payment_method='CASH', status='COMPLETED'
+            ).id
+            for i in range(5)
+        ]
+        # Rows sharing a timestamp must still be served exactly once
+        Transaction.objects.filter(id__in=ids[1:4]).update(created_at=Transaction.objects.get(id=ids[1]).created_at)
+        expected = list(Transaction.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        factory = APIRequestFactory()
+        view = TransactionViewSet.as_view({'get': 'list'})
+        seen, url = [], '/transactions/?page_size=2'
+        while url:
+            request = factory.get(url)
+            force_authenticate(request, user=self.user)
+            response = view(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(response.data['results'][0]['member_name'], 'Test Member')
+
+        request = factory.get('/transactions/?cursor=bogus')
+        force_authenticate(request, user=self.user)
+        self.assertEqual(view(request).status_code, 404)
+
+
+    def test_closed_periods_move_to_archive_and_stay_readable(self):
+        self.ledger_patcher.stop()
+        TransactionFee.objects.filter(transaction_type='DEPOSIT').update(fixed_amount=Decimal('100'))
+        TransactionRulesService.invalidate()
+        for _ in range(2):
+            TransactionService.create_transaction(
+                member_id=self.member.id, transaction_type='DEPOSIT', amount=Decimal('5000'), payment_method='CASH'
+            )
+        recent = TransactionService.create_transaction(
+            member_id=self.member.id, transaction_type='DEPOSIT', amount=Decimal('5000'), payment_method='CASH'
+        )
+        old_day = TransactionArchiveService.boundary() - timedelta(days=40)
+        Transaction.objects.exclude(id__gte=recent.id).update(created_at=old_day)
+        expected = list(Transaction.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        # Only the old fee records move: the deposits are referenced by their ledger legs
+        self.assertEqual(TransactionArchiveService.archive(), 2)
+        self.assertEqual(
+            set(ArchivedTransaction.objects.values_list('transaction_type', flat=True)), {'FEE'}
+        )
+        self.assertEqual(Transaction.objects.count(), 4)
+        self.assertEqual(TransactionArchiveService.archive(), 0)
+
+        factory = APIRequestFactory()
+        view = TransactionViewSet.as_view({'get': 'list'})
+        seen, url = [], '/transactions/?page_size=2'
+        while url:
+            request = factory.get(url)
+            force_authenticate(request, user=self.user)
+            response = view(request)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+
+        # A range inside the hot months reads the hot table alone
+        request = factory.get(f'/transactions/?start_date={timezone.localdate().isoformat()}')
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertFalse(any(ArchivedTransaction._meta.db_table in query['sql'] for query in queries))
+
+        archived = ArchivedTransaction.objects.first()
+        request = factory.get(f'/transactions/{archived.id}/')
+        force_authenticate(request, user=self.user)
+        response = TransactionViewSet.as_view({'get': 'retrieve'})(request, pk=archived.id)
+        self.assertEqual((response.status_code, response.data['transaction_type']), (200, 'FEE'))
+
+        day = timezone.localdate(old_day)
+        TransactionRollupService.rebuild(day, day)
+        self.assertEqual(TransactionRollupService.summarize(day, day)['FEE'], {'count': 2, 'total': Decimal('200')})
+
+
+class ReferenceServiceTest(TestCase):
+    def test_references_are_monotonic_and_check_digited(self):
+        self.assertEqual(luhn_check_digit('7992739871'), '3')
+
+        first = ReferenceService.generate('TRANSACTION')
+        second = ReferenceService.generate('TRANSACTION')
+        self.assertRegex(first, r'^TXN\d{13}$')
+        self.assertGreater(second, first)
+        self.assertTrue(is_valid_reference(first))
+        self.assertFalse(is_valid_reference(first[:-1] + str((int(first[-1]) + 1) % 10)))
+
+        # Each sequence counts on its own
+        self.assertEqual(ReferenceService.generate('FEE'), ReferenceService.format('FEE', 1, ReferenceService.DIGITS))
+        self.assertRegex(ReferenceService.generate_account_number('FIX'), r'^FIX\d{11}$')
+
+
+@skipUnless(os.environ.get('SACCO_BENCHMARK'), 'Set SACCO_BENCHMARK=1 to run the benchmarks')
+class TransferConcurrencyBenchmark(TransactionTestCase):
+    """Many members transferring to each other at once from parallel connections.
+
+    Needs PostgreSQL; size it with SACCO_BENCHMARK_MEMBERS, _TRANSFERS and _WORKERS.
+    """
+    MEMBERS = int(os.environ.get('SACCO_BENCHMARK_MEMBERS', 2000))
+    TRANSFERS = int(os.environ.get('SACCO_BENCHMARK_TRANSFERS', 20000))
+    WORKERS = int(os.environ.get('SACCO_BENCHMARK_WORKERS', 32))
+    OPENING_BALANCE = Decimal('100000')
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('Row-level locking needs PostgreSQL')
+        dispatch_patcher = patch('apps.transactions.tasks.process_outbox_events.delay')
+        dispatch_patcher.start()
+        self.addCleanup(dispatch_patcher.stop)
+
+        role = Role.objects.create(name='MEMBER')
+        users = User.objects.bulk_create([
+            User(
+                email=f'bench{i}@example.com', first_name='Bench', last_name=str(i), role=role,
+                phone_number=f'+256{i:09d}', national_id=f'BENCH{i}'
+            )
+            for i in range(self.MEMBERS)
+        ])
+        members = Member.objects.bulk_create([
+            Member(
+                user=user, member_number=f'MB{i:08d}', date_of_birth=date(1990, 1, 1), marital_status='SINGLE',
+                employment_status='EMPLOYED', occupation='Bench', monthly_income=Decimal('500000'),
+                physical_address='Bench', city='Kampala', district='Central', national_id=f'BENCH{i}',
+                membership_number=f'SACCOMB{i:08d}', membership_type='INDIVIDUAL'
+            )
+            for i, user in enumerate(users)
+        ])
+        accounts = SavingsAccount.objects.bulk_create([
+            SavingsAccount(
+                member=member, account_number=f'SAVB{i:010d}', account_type='REGULAR',
+                balance=self.OPENING_BALANCE, interest_rate=Decimal('3.50'), status='ACTIVE',
+                minimum_balance=Decimal('0')
+            )
+            for i, member in enumerate(members)
+        ])
+        for member, account in zip(members, accounts):
+            member.savings_account = account
+        Member.objects.bulk_update(members, ['savings_account'])
+        self.member_ids = [member.id for member in members]
+        TransactionRulesService.invalidate()
+
+    def test_concurrent_transfers_do_not_deadlock(self):
+        errors, declined, done = [], [], []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                for _ in range(self.TRANSFERS // self.WORKERS):
+                    source, destination = rng.sample(self.member_ids, 2)
+                    try:
+                        TransferService.process_transfer(source, destination, Decimal(rng.randint(1, 5000)))
+                        done.append(1)
+                    except ValueError:
+                        declined.append(1)
+                    except OperationalError as e:
+                        errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(self.WORKERS)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        sys.stderr.write(
+            f"\n{len(done)} transfers ({len(declined)} declined) among {self.MEMBERS} members "
+            f"with {self.WORKERS} workers in {elapsed:.1f}s: {len(done) / elapsed:.0f}/s\n"
+        )
+        self.assertEqual(errors, [])
+        total = SavingsAccount.objects.aggregate(total=Sum('balance'))['total']
+        self.assertEqual(total, self.OPENING_BALANCE * self.MEMBERS)
+        self.assertEqual(LedgerService.get_current_balance(LedgerService.ACCOUNT_CODES['TRANSFER_CLEARING']), 0)
@@ -1,31 +1,64 @@
+import io
 from decimal import Decimal
 
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from apps.transactions.models import Transaction, TransactionFee, TransactionLimit
+from apps.members.models import Member
+from apps.transactions.models import ArchivedTransaction, Transaction, TransactionFee, TransactionLimit
+from apps.transactions.pagination import KeysetPagination
 from apps.transactions.serializers import (
     TransactionSerializer, 
+    TransactionCreateSerializer,
+    ArchivedTransactionSerializer,
+    TransactionListSerializer, 
+    FeeQuoteRequestSerializer, 
     TransactionFeeSerializer, 
     TransactionLimitSerializer,
-    TransferSerializer
+    TransferSerializer,
+    TransitionSerializer,
+    BulkTransitionSerializer
 )
+from apps.transactions.services.archive_service import TransactionArchiveService
+from apps.transactions.services.checkoff_service import CheckoffImportService
+from apps.transactions.services.fees_calculator import FeesCalculator
+from apps.transactions.services.state_service import TransactionStateService, TransitionConflict
 from apps.transactions.services.transaction_service import TransactionService
+from apps.transactions.services.transfer_service import TransferService
+from shared.services.idempotency_service import idempotent
 
 
 class TransactionViewSet(viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
+    # No PUT/PATCH/DELETE: status changes go through TransactionStateService (approve, reject,
+    # reverse) and posted amounts are corrected by reversal, never edited in place
+    http_method_names = ['get', 'post', 'head', 'options']
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return TransactionListSerializer
+        if self.action == 'create':
+            return TransactionCreateSerializer
+        return TransactionSerializer
 
     def get_queryset(self):
-        if self.request.user.role.name in ['STAFF', 'ADMIN']:
-            queryset = Transaction.objects.all()
-        else:
-            queryset = Transaction.objects.filter(member__user=self.request.user)
-        
+        return self._history(Transaction.objects.all())
+
+    def _history(self, queryset):
+        """Scope a hot or archived transaction queryset to the user and the request's filters."""
+        if self.request.user.role.name not in ['STAFF', 'ADMIN']:
+            queryset = queryset.filter(member__user=self.request.user)
+
         # Filter by status if provided
         status_filter = self.request.query_params.get('status')
         if status_filter:
@@ -38,16 +71,40 @@ class TransactionViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(created_at__gte=start_date)
         if end_date:
             queryset = queryset.filter(created_at__lte=end_date)
-            
-        return queryset
 
+        if self.action == 'list':
+            # History rows: only the listed columns, with the member's name from one join
+            return queryset.values(
+                *TransactionListSerializer.LIST_FIELDS,
+                member_name=Concat('member__user__first_name', Value(' '), 'member__user__last_name')
+            )
+        return queryset.select_related('member__user')
+
+    def list(self, request, *args, **kwargs):
+        querysets = [self.get_queryset()]
+        # Leg-less fees and failed postings of closed periods may be archived; ranges within the hot months
+        # never touch the archive
+        if TransactionArchiveService.covers(request.query_params.get('start_date')):
+            querysets.append(self._history(ArchivedTransaction.objects.all()))
+        page = self.paginate_queryset(querysets)
+        return self.get_paginated_response(TransactionListSerializer(page, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = get_object_or_404(self._history(ArchivedTransaction.objects.all()), pk=kwargs['pk'])
+            return Response(ArchivedTransactionSerializer(archived).data)
+
+    @idempotent('transactions.create')
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         # Add request user context
         transaction_data = serializer.validated_data.copy()
-        transaction_data['initiated_by'] = request.user
+        transaction_data['member_id'] = transaction_data.pop('member').id
+        transaction_data['created_by'] = request.user
 
         try:
             transaction = TransactionService.create_transaction(**transaction_data)
@@ -61,74 +118,130 @@ class TransactionViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Approve a pending transaction."""
-        transaction = self.get_object()
-        
-        if transaction.status != 'PENDING':
-            return Response(
-                {'error': 'Only pending transactions can be approved'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        try:
-            approved_transaction = TransactionService.approve_transaction(transaction.id, request.user)
-            return Response(TransactionSerializer(approved_transaction).data)
-        except ValueError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._transition(request, 'approve')
 
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
         """Reject a pending transaction."""
-        transaction = self.get_object()
-        reason = request.data.get('reason', 'No reason provided')
-        
-        if transaction.status != 'PENDING':
-            return Response(
-                {'error': 'Only pending transactions can be rejected'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        try:
-            rejected_transaction = TransactionService.reject_transaction(transaction.id, reason, request.user)
-            return Response(TransactionSerializer(rejected_transaction).data)
-        except ValueError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._transition(request, 'reject')
 
     @action(detail=True, methods=['post'])
     def reverse(self, request, pk=None):
         """Reverse a completed transaction."""
+        return self._transition(request, 'reverse')
+
+    def _transition(self, request, action_name):
+        if request.user.role.name not in ['STAFF', 'ADMIN']:
+            return Response({'error': 'Not permitted to change transaction status'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = TransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         transaction = self.get_object()
-        reason = request.data.get('reason', 'No reason provided')
-        
-        if transaction.status != 'COMPLETED':
-            return Response(
-                {'error': 'Only completed transactions can be reversed'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         try:
-            reversed_transaction = TransactionService.reverse_transaction(transaction.id, reason, request.user)
-            return Response(TransactionSerializer(reversed_transaction).data)
-        except ValueError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            changed = TransactionStateService.transition(
+                transaction.id,
+                action_name,
+                user=request.user,
+                reason=serializer.validated_data.get('reason'),
+                version=serializer.validated_data.get('version')
+            )
+        except TransitionConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(TransactionSerializer(changed).data)
+
+    @action(detail=False, methods=['post'], url_path='bulk-transition')
+    def bulk_transition(self, request):
+        """Approve, reject or reverse many transactions at once; ineligible ones are reported as skipped."""
+        if request.user.role.name not in ['STAFF', 'ADMIN']:
+            return Response({'error': 'Not permitted to change transaction status'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        changed = TransactionStateService.bulk_transition(
+            ids,
+            serializer.validated_data['action'],
+            user=request.user,
+            reason=serializer.validated_data.get('reason')
+        )
+        changed_ids = {_transaction.id for _transaction in changed}
+        return Response({
+            'transitioned': sorted(changed_ids),
+            'skipped': sorted(set(ids) - changed_ids)
+        })
 
     @action(detail=False, methods=['post'])
+    @idempotent('transactions.transfer')
     def transfer(self, request):
         """Process inter-member transfer."""
         serializer = TransferSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
+        transfer_data = serializer.validated_data
+        if request.user.role.name not in ['STAFF', 'ADMIN'] and not Member.objects.filter(
+                id=transfer_data['source_member_id'], user=request.user).exists():
+            return Response({'error': 'You can only transfer from your own account'}, status=status.HTTP_403_FORBIDDEN)
+
         try:
-            transfer_data = serializer.validated_data
             transfer_data['initiated_by'] = request.user
             
-            transactions = TransactionService.process_transfer(**transfer_data)
-            return Response({
+            transactions = TransferService.process_transfer(**transfer_data)
+            data = {
                 'debit_transaction': TransactionSerializer(transactions['debit']).data,
                 'credit_transaction': TransactionSerializer(transactions['credit']).data
-            })
+            }
+            if 'fee' in transactions:
+                data['fee_transaction'] = TransactionSerializer(transactions['fee']).data
+            return Response(data)
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def checkoff(self, request):
+        """Import a payroll check-off file (CSV or XLSX) and return the per-line results as CSV."""
+        if request.user.role.name not in ['STAFF', 'ADMIN']:
+            return Response({'error': 'Not permitted to import check-off files'}, status=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'A check-off file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = io.StringIO()
+        try:
+            summary = CheckoffImportService.import_file(upload, upload.name, results, initiated_by=request.user)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = HttpResponse(results.getvalue(), content_type='text/csv')
+        filename = f"checkoff_results_{timezone.now().strftime('%Y%m%d%H%M%S')}.csv"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        for key in ('batch', 'lines', 'posted', 'rejected', 'failed'):
+            response[f'X-Checkoff-{key.title()}'] = summary[key]
+        return response
+
+    @action(detail=False, methods=['post'], url_path='fee-quote')
+    def fee_quote(self, request):
+        """Quote the fees for one or many (amount, type, method, member type) requests before posting."""
+        serializer = FeeQuoteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        quotes = serializer.validated_data['quotes']
+        fees = FeesCalculator.quote_fees([
+            (quote['amount'], quote['transaction_type'], quote['payment_method'], quote['member_type'])
+            for quote in quotes
+        ])
+
+        results = []
+        for quote, fee in zip(quotes, fees):
+            # Decimals as strings so clients see exactly what posting will charge
+            result = dict(quote, amount=str(quote['amount']))
+            if fee is None:
+                result['error'] = f"No fee defined for {quote['transaction_type']} via {quote['payment_method']}"
+            else:
+                result.update({key: str(value) for key, value in fee.items()})
+            results.append(result)
+        return Response({'quotes': results})
+
     @action(detail=False, methods=['get'])
     def limits(self, request):
         """Get transaction limits for current user."""
@@ -143,6 +143,30 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Ledger
+# Hot accounts split into N sub-ledger buckets so concurrent postings don't queue on one
+# balance row, e.g. {'1000': 8, '2000': 8, '2900': 8, '4000': 8}. Reads sum the buckets.
+LEDGER_SHARDED_ACCOUNTS = {}
+
+# Reference data cached per process (fee rules and limits, chart of accounts): a copy is
+# reloaded after this many seconds even if no change was signalled through the cache
+VERSIONED_CACHE_MAX_AGE = 5 * 60
+
+# Transactions
+# Cache alias holding the per-member DAILY/MONTHLY limit counters. It must be shared (e.g.
+# Redis) when running several workers: a local-memory cache counts per process, and
+# `check --deploy` reports it.
+TRANSACTION_LIMIT_CACHE = 'default'
+
+# Idempotency keys: how long, in seconds, a stored response can be replayed. Keys are kept in
+# the database (IdempotencyKey), so every worker sees them
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Whole months of transaction history kept on the hot table, besides the current one; older
+# rows that nothing references (leg-less fees, failed postings) are swept into ArchivedTransaction.
+# Posted transactions stay on the hot table, see TransactionArchiveService
+TRANSACTION_HOT_MONTHS = 12
+
 # Authentication Security
 MAX_LOGIN_ATTEMPTS = 5
 ACCOUNT_LOCK_MINUTES = 15
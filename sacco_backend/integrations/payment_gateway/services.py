@@ -1,14 +1,76 @@
 from decimal import Decimal
+from typing import Optional
 
-from django.utils import timezone
+from asgiref.sync import sync_to_async
 
 from apps.integrations.models import IntegrationProvider, PaymentTransaction
 from integrations.payment_gateway.factory import PaymentGatewayFactory
+from shared.services.idempotency_service import IdempotencyConflict, IdempotencyService
+from shared.services.reference_service import ReferenceService
 
 
 class PaymentGatewayService:
     @staticmethod
-    async def initiate_payment(amount: Decimal, payment_method: str, **kwargs) -> dict:
+    async def initiate_payment(
+            amount: Decimal,
+            payment_method: str,
+            idempotency_key: Optional[str] = None,
+            **kwargs
+    ) -> dict:
+        """Start a gateway payment. A repeated ``idempotency_key`` returns the first call's result."""
+        if not idempotency_key:
+            return await PaymentGatewayService._initiate_payment(amount, payment_method, **kwargs)
+
+        record_key = IdempotencyService.record_key('payments.initiate', payment_method, idempotency_key)
+        fingerprint = IdempotencyService.fingerprint({'amount': amount, 'payment_method': payment_method, **kwargs})
+        # The gateway call can't share a transaction with the claim, so the claim names the
+        # payment it is about to create; the key store is a table, and the ORM can't be
+        # called from the event loop directly
+        reference = await sync_to_async(ReferenceService.generate)('PAYMENT')
+        stored = await sync_to_async(IdempotencyService.begin)(
+            record_key, fingerprint, resource=reference, recover=PaymentGatewayService._recover
+        )
+        if stored is not None:
+            return stored
+
+        try:
+            result = await PaymentGatewayService._initiate_payment(
+                amount, payment_method, internal_reference=reference, **kwargs
+            )
+        except BaseException:
+            await sync_to_async(PaymentGatewayService._release)(record_key, reference)
+            raise
+        await sync_to_async(IdempotencyService.complete)(record_key, fingerprint, result)
+        return result
+
+    @staticmethod
+    def _recover(reference: str) -> Optional[dict]:
+        """What became of the payment an unfinished claim named: its result, or None if it never reached the gateway."""
+        payment = PaymentTransaction.objects.filter(internal_reference=reference).first()
+        if payment is None or payment.status == 'FAILED':
+            return None
+        if payment.provider_reference is None:
+            raise IdempotencyConflict(
+                f"Payment {reference} may have reached the gateway; confirm it with the provider before retrying"
+            )
+        return {'provider_reference': payment.provider_reference, 'status': payment.status}
+
+    @staticmethod
+    def _release(record_key: str, reference: str) -> None:
+        # A payment that may have reached the gateway keeps its claim, for recovery once it lapses
+        try:
+            if PaymentGatewayService._recover(reference) is None:
+                IdempotencyService.release(record_key)
+        except IdempotencyConflict:
+            pass
+
+    @staticmethod
+    async def _initiate_payment(
+            amount: Decimal,
+            payment_method: str,
+            internal_reference: Optional[str] = None,
+            **kwargs
+    ) -> dict:
         provider = IntegrationProvider.objects.get(
             provider_type='PAYMENT',
             name=payment_method
@@ -16,13 +78,19 @@ class PaymentGatewayService:
 
         transaction = PaymentTransaction.objects.create(
             provider=provider,
-            internal_reference=f"PG{timezone.now().strftime('%Y%m%d%H%M%S')}",
+            internal_reference=internal_reference or ReferenceService.generate('PAYMENT'),
             amount=amount,
             status='INITIATED'
         )
 
         gateway = PaymentGatewayFactory.get_gateway(payment_method)
-        result = await gateway.initiate_payment(transaction, **kwargs)
+        try:
+            result = await gateway.initiate_payment(transaction, **kwargs)
+        except Exception:
+            # The gateway refused or never answered: treated as not initiated, so it may be retried
+            transaction.status = 'FAILED'
+            transaction.save()
+            raise
 
         transaction.provider_reference = result.get('provider_reference')
         transaction.status = 'PENDING'
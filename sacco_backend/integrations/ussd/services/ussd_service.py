@@ -9,6 +9,7 @@ from apps.members.models import Member
 from apps.notifications.services.notification_service import NotificationService
 from apps.transactions.models import Transaction
 from apps.transactions.services.transaction_service import TransactionService
+from apps.transactions.services.transfer_service import TransferService
 
 
 class USSDService:
@@ -195,18 +196,18 @@ Next Payment: {active_loan.next_payment_date}"""
         """Process money transfer between members"""
         try:
             recipient = Member.objects.filter(
-                phone_number=recipient_phone
+                user__phone_number=recipient_phone
             ).first()
 
             if not recipient:
                 return "Recipient not found"
 
-            result = TransactionService.create_transaction(
+            TransferService.process_transfer(
                 sender.id,
-                'TRANSFER',
+                recipient.id,
                 amount,
-                'INTERNAL',
-                destination_member=recipient.id
+                payment_method='INTERNAL',
+                initiated_by=sender.user
             )
 
             return f"Successfully sent UGX {amount:,.2f} to {recipient_phone}"
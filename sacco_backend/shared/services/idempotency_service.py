@@ -0,0 +1,190 @@
+# shared/services/idempotency_service.py
+import hashlib
+import json
+from datetime import timedelta
+from decimal import Decimal
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.transactions.models import IdempotencyKey
+
+
+class IdempotencyConflict(Exception):
+    """The key is in use by a request that is still running, or by one with a different payload."""
+
+
+class IdempotencyService:
+    """Remembers the outcome of requests by client-supplied idempotency key.
+
+    Keys are IdempotencyKey rows under a SHA-256 digest of (scope, caller, key). A request
+    claims its key by inserting the row, so the unique constraint decides between two
+    workers racing on the same key, whichever processes they run in. The row then stores
+    a digest of the payload and the result, and is replayed until it expires after
+    ``IDEMPOTENCY_KEY_TTL`` seconds.
+
+    Where the work is database writes, the claim, the writes and the result are one
+    transaction (see ``idempotent``): a request that dies leaves no claim and nothing
+    posted, and a duplicate waits on the claim's row until the first commits. Work that
+    can't share a transaction (a gateway call) commits its claim first, naming the
+    ``resource`` it is about to create; a claim left unfinished is only taken over once
+    ``recover`` has confirmed that resource was never posted.
+    """
+
+    # An unfinished committed claim is checked for recovery after this many seconds
+    LOCK_TIMEOUT = 60
+    # Marks an encoded Decimal in a stored result, so a replay returns the same types
+    DECIMAL_TAG = '__decimal__'
+
+    @staticmethod
+    def _digest(*parts: Any) -> str:
+        return hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+    @staticmethod
+    def record_key(scope: str, owner: Any, key: str) -> str:
+        return IdempotencyService._digest(scope, owner, key)
+
+    @staticmethod
+    def fingerprint(payload: Any) -> str:
+        return IdempotencyService._digest(json.dumps(payload, sort_keys=True, default=str))
+
+    @staticmethod
+    def encode(value: Any) -> Any:
+        """A result as JSON-safe data, amounts kept as tagged decimal strings."""
+        if isinstance(value, Decimal):
+            return {IdempotencyService.DECIMAL_TAG: str(value)}
+        if isinstance(value, dict):
+            return {key: IdempotencyService.encode(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [IdempotencyService.encode(item) for item in value]
+        return value
+
+    @staticmethod
+    def decode(value: Any) -> Any:
+        if isinstance(value, dict):
+            if set(value) == {IdempotencyService.DECIMAL_TAG}:
+                return Decimal(value[IdempotencyService.DECIMAL_TAG])
+            return {key: IdempotencyService.decode(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [IdempotencyService.decode(item) for item in value]
+        return value
+
+    @staticmethod
+    def begin(
+            record_key: str,
+            fingerprint: str,
+            resource: Optional[str] = None,
+            recover: Optional[Callable[[str], Optional[Any]]] = None
+    ) -> Optional[Any]:
+        """Claim a key for a new request.
+
+        Returns the stored result if the key has completed before, or None once the key is
+        claimed. Raises IdempotencyConflict if it is taken by a running request or was used
+        with a different payload.
+
+        ``recover(resource)`` is asked about an unfinished claim older than LOCK_TIMEOUT:
+        it returns the result if the claimed resource was posted after all (the key is
+        completed with it), None if it never was (the key is taken over), or raises
+        IdempotencyConflict if that can't be told.
+        """
+        now = timezone.now()
+        IdempotencyKey.objects.filter(key=record_key, completed=True, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    key=record_key,
+                    fingerprint=fingerprint,
+                    resource=resource,
+                    expires_at=now + timedelta(seconds=IdempotencyService.LOCK_TIMEOUT)
+                )
+            return None
+        except IntegrityError:
+            stored = IdempotencyKey.objects.filter(key=record_key).first()
+
+        if stored is not None and stored.fingerprint != fingerprint:
+            raise IdempotencyConflict("This idempotency key was already used with a different request")
+        if stored is not None and stored.completed:
+            return IdempotencyService.decode(stored.result)
+        if stored is None or recover is None or stored.expires_at > now:
+            raise IdempotencyConflict("A request with this idempotency key is still being processed")
+
+        result = recover(stored.resource)
+        if result is not None:
+            IdempotencyService.complete(record_key, fingerprint, result)
+            return result
+        # Nothing was posted under the lapsed claim; take it over unless another retry got there first
+        taken = IdempotencyKey.objects.filter(key=record_key, completed=False, expires_at=stored.expires_at).update(
+            resource=resource,
+            expires_at=now + timedelta(seconds=IdempotencyService.LOCK_TIMEOUT)
+        )
+        if not taken:
+            raise IdempotencyConflict("A request with this idempotency key is still being processed")
+        return None
+
+    @staticmethod
+    def complete(record_key: str, fingerprint: str, result: Any) -> None:
+        IdempotencyKey.objects.filter(key=record_key, fingerprint=fingerprint, completed=False).update(
+            completed=True,
+            result=IdempotencyService.encode(result),
+            expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        )
+
+    @staticmethod
+    def release(record_key: str) -> None:
+        """Free a claimed key without storing a result, so the request can be retried.
+
+        Only for a caller that knows its request posted nothing.
+        """
+        IdempotencyKey.objects.filter(key=record_key, completed=False).delete()
+
+    @staticmethod
+    def purge_expired() -> int:
+        """Delete results past their TTL; returns how many went.
+
+        Unfinished claims stay until a retry recovers them.
+        """
+        deleted, _ = IdempotencyKey.objects.filter(completed=True, expires_at__lte=timezone.now()).delete()
+        return deleted
+
+
+def idempotent(scope: str):
+    """Make a DRF view method replay its response for a repeated ``Idempotency-Key`` header.
+
+    The claim, everything the view writes and the stored response commit in one
+    transaction, so a retry either replays a response whose postings exist or runs
+    afresh. Only successful (2xx) responses are stored; anything else gives up the
+    claim so the client can retry. A posting that would retry itself on a deadlock
+    fails the request instead, which the client retries with the same key. Requests
+    without the header run as usual.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get('Idempotency-Key')
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+
+            record_key = IdempotencyService.record_key(scope, request.user.pk, key)
+            fingerprint = IdempotencyService.fingerprint(request.data)
+            with transaction.atomic():
+                try:
+                    stored = IdempotencyService.begin(record_key, fingerprint)
+                except IdempotencyConflict as e:
+                    return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+                if stored is not None:
+                    response_status, data = stored
+                    return Response(data, status=response_status, headers={'Idempotent-Replayed': 'true'})
+
+                response = view_method(self, request, *args, **kwargs)
+                if status.is_success(response.status_code) and isinstance(response, Response):
+                    IdempotencyService.complete(record_key, fingerprint, (response.status_code, response.data))
+                else:
+                    IdempotencyService.release(record_key)
+            return response
+        return wrapper
+    return decorator
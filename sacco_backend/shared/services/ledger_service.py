@@ -1,222 +1,489 @@
-from datetime import date
+from datetime import date, datetime, time, timedelta
 # shared/services/ledger_service.py
+from collections import defaultdict
 from decimal import Decimal
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
 
-from apps.ledger.models import LedgerEntry
+from apps.ledger.models import AccountBalance, AccountBalanceCheckpoint, LedgerEntry
+from apps.ledger.services.chart_service import ChartOfAccountsService
 from apps.loans.models import LoanRepayment, Loan
 from apps.transactions.models import Transaction
 
 
+class Journal:
+    """Collects ledger legs for one or many transactions and posts them in a single bulk insert.
+
+    Legs are checked to balance (debits equal credits) per transaction before anything is written.
+    """
+
+    def __init__(self):
+        self.entries: List[LedgerEntry] = []
+
+    def debit(self, _transaction: Transaction, account_code: str, amount: Decimal, description: str) -> 'Journal':
+        return self.add(_transaction, account_code, 'DEBIT', amount, description)
+
+    def credit(self, _transaction: Transaction, account_code: str, amount: Decimal, description: str) -> 'Journal':
+        return self.add(_transaction, account_code, 'CREDIT', amount, description)
+
+    def add(
+            self,
+            _transaction: Transaction,
+            account_code: str,
+            entry_type: str,
+            amount: Decimal,
+            description: str
+    ) -> 'Journal':
+        if amount < 0:
+            raise ValueError(f"Ledger amounts must be positive, got {amount} for {account_code}")
+        if amount > 0:
+            self.entries.append(LedgerEntry(
+                transaction=_transaction,
+                account_code=account_code,
+                entry_type=entry_type,
+                amount=amount,
+                description=description
+            ))
+        return self
+
+    def validate(self) -> None:
+        totals = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+        for entry in self.entries:
+            totals[entry.transaction_id][0 if entry.entry_type == 'DEBIT' else 1] += entry.amount
+
+        for transaction_id, (debits, credits) in totals.items():
+            if debits != credits:
+                raise ValueError(
+                    f"Unbalanced journal for transaction {transaction_id}: debits {debits} != credits {credits}"
+                )
+
+    def post(self) -> List[LedgerEntry]:
+        self.validate()
+        if not self.entries:
+            return []
+        # Validated up front, so the caller's transaction needs no savepoint around the writes
+        with transaction.atomic(savepoint=False):
+            return LedgerService._post_entries(self.entries)
+
+
 class LedgerService:
     ACCOUNT_CODES = {
         'CASH': '1000',
         'SAVINGS': '2000',
         'FEES_INCOME': '4000',
         'LOAN_RECEIVABLE': '1100',
-        'INTEREST_INCOME': '4100'
+        'INTEREST_INCOME': '4100',
+        'INTEREST_EXPENSE': '5100',
+        'TRANSFER_CLEARING': '2900'
     }
 
+    BULK_BATCH_SIZE = 1000
+
     @staticmethod
     @transaction.atomic
     def create_deposit_entries(_transaction: Transaction, fee: Decimal) -> None:
-        # Get current balances
-        cash_balance = LedgerService._get_account_balance(LedgerService.ACCOUNT_CODES['CASH'])
-        savings_balance = LedgerService._get_account_balance(LedgerService.ACCOUNT_CODES['SAVINGS'])
-        fees_balance = LedgerService._get_account_balance(LedgerService.ACCOUNT_CODES['FEES_INCOME'])
-
-        # Debit cash/bank account
-        LedgerEntry.objects.create(
-            transaction=_transaction,
-            account_code=LedgerService.ACCOUNT_CODES['CASH'],
-            entry_type='DEBIT',
-            amount=_transaction.amount,
-            balance_after=cash_balance + _transaction.amount,
-            description=f"Cash deposit {_transaction.transaction_ref}"
-        )
-
-        # Credit member savings account
-        net_amount = _transaction.amount - fee
-        LedgerEntry.objects.create(
-            transaction=_transaction,
-            account_code=LedgerService.ACCOUNT_CODES['SAVINGS'],
-            entry_type='CREDIT',
-            amount=net_amount,
-            balance_after=savings_balance + net_amount,
-            description=f"Savings deposit {_transaction.transaction_ref}"
-        )
-
-        if fee > 0:
-            LedgerEntry.objects.create(
-                transaction=_transaction,
-                account_code=LedgerService.ACCOUNT_CODES['FEES_INCOME'],
-                entry_type='CREDIT',
-                amount=fee,
-                balance_after=fees_balance + fee,
-                description=f"Deposit fee {_transaction.transaction_ref}"
-            )
+        LedgerService.add_deposit_legs(Journal(), _transaction, fee).post()
 
     @staticmethod
     @transaction.atomic
     def create_withdrawal_entries(_transaction: Transaction, fee: Decimal) -> None:
-        # Get current balances
-        cash_balance = LedgerService._get_account_balance(LedgerService.ACCOUNT_CODES['CASH'])
-        savings_balance = LedgerService._get_account_balance(LedgerService.ACCOUNT_CODES['SAVINGS'])
-        fees_balance = LedgerService._get_account_balance(LedgerService.ACCOUNT_CODES['FEES_INCOME'])
-
-        # Credit cash/bank account
-        LedgerEntry.objects.create(
-            transaction=_transaction,
-            account_code=LedgerService.ACCOUNT_CODES['CASH'],
-            entry_type='CREDIT',
-            amount=_transaction.amount,
-            balance_after=cash_balance - _transaction.amount,
-            description=f"Cash withdrawal {_transaction.transaction_ref}"
+        LedgerService.add_withdrawal_legs(Journal(), _transaction, fee).post()
+
+    @staticmethod
+    def add_deposit_legs(journal: Journal, _transaction: Transaction, fee: Decimal) -> Journal:
+        # Debit cash/bank account, credit member savings net of the fee
+        return journal.debit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['CASH'],
+            _transaction.amount,
+            f"Cash deposit {_transaction.transaction_ref}"
+        ).credit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['SAVINGS'],
+            _transaction.amount - fee,
+            f"Savings deposit {_transaction.transaction_ref}"
+        ).credit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['FEES_INCOME'],
+            fee,
+            f"Deposit fee {_transaction.transaction_ref}"
         )
 
-        # Debit member savings account
-        total_amount = _transaction.amount + fee
-        LedgerEntry.objects.create(
-            transaction=_transaction,
-            account_code=LedgerService.ACCOUNT_CODES['SAVINGS'],
-            entry_type='DEBIT',
-            amount=total_amount,
-            balance_after=savings_balance - total_amount,
-            description=f"Savings withdrawal {_transaction.transaction_ref}"
+    @staticmethod
+    def add_withdrawal_legs(journal: Journal, _transaction: Transaction, fee: Decimal) -> Journal:
+        # Credit cash/bank account, debit member savings including the fee
+        return journal.credit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['CASH'],
+            _transaction.amount,
+            f"Cash withdrawal {_transaction.transaction_ref}"
+        ).debit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['SAVINGS'],
+            _transaction.amount + fee,
+            f"Savings withdrawal {_transaction.transaction_ref}"
+        ).credit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['FEES_INCOME'],
+            fee,
+            f"Withdrawal fee {_transaction.transaction_ref}"
         )
 
-        if fee > 0:
-            LedgerEntry.objects.create(
-                transaction=_transaction,
-                account_code=LedgerService.ACCOUNT_CODES['FEES_INCOME'],
-                entry_type='CREDIT',
-                amount=fee,
-                balance_after=fees_balance + fee,
-                description=f"Withdrawal fee {_transaction.transaction_ref}"
+    @staticmethod
+    def _post_entries(entries: List[LedgerEntry]) -> List[LedgerEntry]:
+        """Insert ledger legs in bulk and move the matching AccountBalance rows in the same transaction.
+
+        Running balances and hash-chain links are assigned in memory, in leg order, from the
+        locked balance rows.
+        Must be called inside an atomic block; the rows stay locked until it commits,
+        so concurrent postings to the same account see each other's running balance.
+        """
+        for entry in entries:
+            entry.bucket = LedgerService._bucket_for(entry.account_code, entry.transaction_id)
+
+        balances = LedgerService._lock_account_balances((entry.account_code, entry.bucket) for entry in entries)
+        # Looked up once per account rather than per leg; each lookup is a shared-cache read
+        debit_normal = {code: ChartOfAccountsService.is_debit_normal(code) for code, _ in balances}
+
+        for entry in entries:
+            account = balances[(entry.account_code, entry.bucket)]
+            if entry.entry_type == 'DEBIT':
+                account.debit_total += entry.amount
+            else:
+                account.credit_total += entry.amount
+            on_normal_side = (entry.entry_type == 'DEBIT') == debit_normal[entry.account_code]
+            account.balance += entry.amount if on_normal_side else -entry.amount
+
+            entry.balance_after = account.balance
+            entry.previous_hash = account.last_hash
+            entry.entry_hash = entry.compute_hash()
+            account.last_hash = entry.entry_hash
+
+        LedgerEntry.objects.bulk_create(entries, batch_size=LedgerService.BULK_BATCH_SIZE)
+
+        now = timezone.now()
+        for account in balances.values():
+            account.updated_at = now
+        AccountBalance.objects.bulk_update(
+            balances.values(),
+            ['balance', 'debit_total', 'credit_total', 'last_hash', 'updated_at']
+        )
+        return entries
+
+    @staticmethod
+    def _bucket_for(account_code: str, transaction_id: int) -> int:
+        """Sub-ledger bucket a posting lands in; always 0 unless the account is sharded."""
+        buckets = settings.LEDGER_SHARDED_ACCOUNTS.get(account_code, 1)
+        return transaction_id % buckets if buckets > 1 else 0
+
+    @staticmethod
+    def _lock_account_balances(keys: Iterable[Tuple[str, int]]) -> Dict[Tuple[str, int], AccountBalance]:
+        """Lock the (account code, bucket) balance rows, creating any that are missing.
+
+        Rows are locked in (account code, bucket) order so postings touching the same
+        accounts always acquire them in the same sequence and cannot deadlock each other.
+        """
+        keys = sorted(set(keys))
+        lookup = Q()
+        for code, bucket in keys:
+            lookup |= Q(account_code=code, bucket=bucket)
+
+        balances = {
+            (account.account_code, account.bucket): account
+            for account in AccountBalance.objects.select_for_update().filter(lookup).order_by('account_code', 'bucket')
+        }
+
+        missing = [key for key in keys if key not in balances]
+        if missing:
+            AccountBalance.objects.bulk_create(
+                [AccountBalance(account_code=code, bucket=bucket) for code, bucket in missing],
+                ignore_conflicts=True
             )
+            return LedgerService._lock_account_balances(keys)
+
+        return balances
 
     @staticmethod
-    def _get_account_balance(account_code: str) -> Decimal:
-        """Get the current balance for an account code."""
-        latest_entry = LedgerEntry.objects.filter(
-            account_code=account_code
-        ).order_by('-created_at').first()
-        
-        return latest_entry.balance_after if latest_entry else Decimal('0')
+    def get_current_balance(account_code: str) -> Decimal:
+        """Current running balance of an account (summed over its buckets), read from the balance table."""
+        balance = AccountBalance.objects.filter(account_code=account_code).aggregate(total=Sum('balance'))['total']
+        return balance or Decimal('0')
 
     @staticmethod
     @transaction.atomic
     def create_loan_disbursement_entries(loan: 'Loan') -> None:
-        LedgerEntry.objects.create(
-            transaction=loan.disbursement_transaction,
-            account_code=LedgerService.ACCOUNT_CODES['LOAN_RECEIVABLE'],
-            entry_type='DEBIT',
-            amount=loan.amount,
-            description=f"Loan disbursement - {loan.reference}"
-        )
-
-        LedgerEntry.objects.create(
-            transaction=loan.disbursement_transaction,
-            account_code=LedgerService.ACCOUNT_CODES['CASH'],
-            entry_type='CREDIT',
-            amount=loan.amount,
-            description=f"Loan disbursement - {loan.reference}"
-        )
+        Journal().debit(
+            loan.disbursement_transaction,
+            LedgerService.ACCOUNT_CODES['LOAN_RECEIVABLE'],
+            loan.amount,
+            f"Loan disbursement - {loan.reference}"
+        ).credit(
+            loan.disbursement_transaction,
+            LedgerService.ACCOUNT_CODES['CASH'],
+            loan.amount,
+            f"Loan disbursement - {loan.reference}"
+        ).post()
 
     @staticmethod
     @transaction.atomic
     def create_loan_repayment_entries(repayment: 'LoanRepayment') -> None:
-        LedgerEntry.objects.create(
-            transaction=repayment.transaction,
-            account_code=LedgerService.ACCOUNT_CODES['CASH'],
-            entry_type='DEBIT',
-            amount=repayment.amount,
-            description=f"Loan repayment - {repayment.reference}"
+        LedgerService.add_loan_repayment_legs(
+            Journal(),
+            repayment.transaction,
+            repayment.principal_component,
+            repayment.interest_component,
+            repayment.reference
+        ).post()
+
+    @staticmethod
+    def add_loan_repayment_legs(
+            journal: Journal,
+            _transaction: Transaction,
+            principal: Decimal,
+            interest: Decimal,
+            reference: str
+    ) -> Journal:
+        # Debit cash/bank account, credit the loan with the principal and income with the interest
+        return journal.debit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['CASH'],
+            principal + interest,
+            f"Loan repayment - {reference}"
+        ).credit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['LOAN_RECEIVABLE'],
+            principal,
+            f"Loan principal repayment - {reference}"
+        ).credit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['INTEREST_INCOME'],
+            interest,
+            f"Loan interest payment - {reference}"
         )
 
-        LedgerEntry.objects.bulk_create([
-            LedgerEntry(
-                transaction=repayment.transaction,
-                account_code=LedgerService.ACCOUNT_CODES['LOAN_RECEIVABLE'],
-                entry_type='CREDIT',
-                amount=repayment.principal_component,
-                description=f"Loan principal repayment - {repayment.reference}"
-            ),
-            LedgerEntry(
-                transaction=repayment.transaction,
-                account_code=LedgerService.ACCOUNT_CODES['INTEREST_INCOME'],
-                entry_type='CREDIT',
-                amount=repayment.interest_component,
-                description=f"Loan interest payment - {repayment.reference}"
+    @staticmethod
+    def add_transfer_legs(
+            journal: Journal,
+            debit_transaction: Transaction,
+            credit_transaction: Transaction,
+            fee_transaction: Optional[Transaction] = None
+    ) -> Journal:
+        # Each side balances against the clearing account, which nets to zero once both are posted
+        journal.debit(
+            debit_transaction,
+            LedgerService.ACCOUNT_CODES['SAVINGS'],
+            debit_transaction.amount,
+            f"Transfer out {debit_transaction.transaction_ref}"
+        ).credit(
+            debit_transaction,
+            LedgerService.ACCOUNT_CODES['TRANSFER_CLEARING'],
+            debit_transaction.amount,
+            f"Transfer out {debit_transaction.transaction_ref}"
+        ).debit(
+            credit_transaction,
+            LedgerService.ACCOUNT_CODES['TRANSFER_CLEARING'],
+            credit_transaction.amount,
+            f"Transfer in {credit_transaction.transaction_ref}"
+        ).credit(
+            credit_transaction,
+            LedgerService.ACCOUNT_CODES['SAVINGS'],
+            credit_transaction.amount,
+            f"Transfer in {credit_transaction.transaction_ref}"
+        )
+        if fee_transaction is not None:
+            journal.debit(
+                fee_transaction,
+                LedgerService.ACCOUNT_CODES['SAVINGS'],
+                fee_transaction.amount,
+                f"Transfer fee {fee_transaction.transaction_ref}"
+            ).credit(
+                fee_transaction,
+                LedgerService.ACCOUNT_CODES['FEES_INCOME'],
+                fee_transaction.amount,
+                f"Transfer fee {fee_transaction.transaction_ref}"
             )
-        ])
+        return journal
+
+    @staticmethod
+    def add_interest_legs(journal: Journal, _transaction: Transaction) -> Journal:
+        # Interest paid on savings is an expense of the society, credited to member savings
+        return journal.debit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['INTEREST_EXPENSE'],
+            _transaction.amount,
+            f"Savings interest {_transaction.transaction_ref}"
+        ).credit(
+            _transaction,
+            LedgerService.ACCOUNT_CODES['SAVINGS'],
+            _transaction.amount,
+            f"Savings interest {_transaction.transaction_ref}"
+        )
 
     @staticmethod
     def get_account_balance(account_code: str, as_of_date: Optional[date] = None) -> Decimal:
-        """Calculate account balance as of specified date"""
+        """Calculate account balance (debits less credits) at the close of the specified date.
+
+        Starts from the nearest balance checkpoint and sums only the entries after it in the database.
+        """
+        checkpoints = AccountBalanceCheckpoint.objects.filter(account_code=account_code)
         query = LedgerEntry.objects.filter(account_code=account_code)
 
         if as_of_date:
-            query = query.filter(created_at__lte=as_of_date)
+            checkpoints = checkpoints.filter(period_end__lte=as_of_date)
+            query = query.filter(created_at__lt=LedgerService._day_end(as_of_date))
 
         balance = Decimal('0')
-        for entry in query.iterator():
-            if entry.entry_type == 'DEBIT':
-                balance += entry.amount
-            else:
-                balance -= entry.amount
+        checkpoint = checkpoints.order_by('-period_end').first()
+        if checkpoint:
+            balance = checkpoint.closing_balance
+            query = query.filter(created_at__gte=LedgerService._day_end(checkpoint.period_end))
 
-        return balance
+        totals = query.aggregate(
+            debits=Sum('amount', filter=Q(entry_type='DEBIT')),
+            credits=Sum('amount', filter=Q(entry_type='CREDIT'))
+        )
+        return balance + (totals['debits'] or Decimal('0')) - (totals['credits'] or Decimal('0'))
 
     @staticmethod
-    def generate_trial_balance(start_date: date, end_date: date) -> dict:
-        """Generate trial balance for specified period"""
-        accounts = {}
+    @transaction.atomic
+    def create_balance_checkpoints(period_end: date) -> int:
+        """Snapshot cumulative debit/credit totals of every account at the close of ``period_end``.
 
-        # Get all entries within date range
-        entries = LedgerEntry.objects.filter(
-            created_at__range=[start_date, end_date]
-        ).select_related('transaction')
+        Builds on the previous checkpoint, so only that day's (or the gap's) entries are aggregated.
+        Re-running for the same date overwrites the earlier snapshot.
+        """
+        previous = AccountBalanceCheckpoint.objects.filter(
+            period_end__lt=period_end
+        ).order_by('-period_end').values_list('period_end', flat=True).first()
 
-        # Calculate totals for each account
-        for entry in entries:
-            if entry.account_code not in accounts:
-                accounts[entry.account_code] = {
-                    'account_name': LedgerService.ACCOUNT_CODES.get(entry.account_code, 'Unknown'),
-                    'debit_total': Decimal('0'),
-                    'credit_total': Decimal('0'),
-                    'net_balance': Decimal('0')
-                }
+        totals = {}
+        entries = LedgerEntry.objects.filter(created_at__lt=LedgerService._day_end(period_end))
+        if previous:
+            for checkpoint in AccountBalanceCheckpoint.objects.filter(period_end=previous):
+                totals[checkpoint.account_code] = [checkpoint.debit_total, checkpoint.credit_total]
+            entries = entries.filter(created_at__gte=LedgerService._day_end(previous))
 
-            if entry.entry_type == 'DEBIT':
-                accounts[entry.account_code]['debit_total'] += entry.amount
-                accounts[entry.account_code]['net_balance'] += entry.amount
-            else:
-                accounts[entry.account_code]['credit_total'] += entry.amount
-                accounts[entry.account_code]['net_balance'] -= entry.amount
+        movements = entries.values('account_code').annotate(
+            debits=Sum('amount', filter=Q(entry_type='DEBIT')),
+            credits=Sum('amount', filter=Q(entry_type='CREDIT'))
+        )
+        for row in movements:
+            account_totals = totals.setdefault(row['account_code'], [Decimal('0'), Decimal('0')])
+            account_totals[0] += row['debits'] or Decimal('0')
+            account_totals[1] += row['credits'] or Decimal('0')
+
+        AccountBalanceCheckpoint.objects.bulk_create(
+            [
+                AccountBalanceCheckpoint(
+                    account_code=code,
+                    period_end=period_end,
+                    debit_total=debits,
+                    credit_total=credits
+                )
+                for code, (debits, credits) in totals.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['account_code', 'period_end'],
+            update_fields=['debit_total', 'credit_total']
+        )
+        return len(totals)
+
+    @staticmethod
+    def create_checkpoints_through(period_end: date) -> int:
+        """Create daily checkpoints for every day from the last checkpoint up to ``period_end``."""
+        last = AccountBalanceCheckpoint.objects.order_by('-period_end').values_list('period_end', flat=True).first()
+        if last:
+            day = last + timedelta(days=1)
+        else:
+            first_entry = LedgerEntry.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            if not first_entry:
+                return 0
+            day = timezone.localtime(first_entry).date()
+
+        created = 0
+        while day <= period_end:
+            LedgerService.create_balance_checkpoints(day)
+            created += 1
+            day += timedelta(days=1)
+        return created
+
+    @staticmethod
+    def _day_end(day: date) -> datetime:
+        """First instant after ``day`` in the project time zone."""
+        return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+    @staticmethod
+    def generate_trial_balance(start_date: date, end_date: date, rollup: bool = False) -> dict:
+        """Generate trial balance for specified period (both dates inclusive).
+
+        Period movements are the difference between cumulative totals at the close of
+        ``end_date`` and at the close of the day before ``start_date``, each read from the
+        nearest period-close checkpoint plus one grouped aggregation over the remainder.
+        With ``rollup``, parent accounts in the chart also get a row carrying the sum of
+        their sub-accounts; the grand totals still count every posting once.
+        """
+        closing = LedgerService._cumulative_totals(end_date)
+        opening = LedgerService._cumulative_totals(start_date - timedelta(days=1))
+
+        movements = {}
+        for code in closing:
+            debit_total = closing[code][0] - opening.get(code, (Decimal('0'), Decimal('0')))[0]
+            credit_total = closing[code][1] - opening.get(code, (Decimal('0'), Decimal('0')))[1]
+            if debit_total or credit_total:
+                movements[code] = [debit_total, credit_total]
+
+        rows = ChartOfAccountsService.rollup(movements) if rollup else movements
+        accounts = []
+        for code in sorted(rows):
+            debit_total, credit_total = rows[code]
+            account = ChartOfAccountsService.get_account(code)
+            accounts.append({
+                'account_code': code,
+                'account_name': account['name'] if account else 'Unknown',
+                'parent_code': account['parent_code'] if account else None,
+                'debit_total': debit_total,
+                'credit_total': credit_total,
+                'net_balance': debit_total - credit_total
+            })
 
         # Calculate totals
-        total_debits = sum(acc['debit_total'] for acc in accounts.values())
-        total_credits = sum(acc['credit_total'] for acc in accounts.values())
-        net_balance = sum(acc['net_balance'] for acc in accounts.values())
+        total_debits = sum((debits for debits, _ in movements.values()), Decimal('0'))
+        total_credits = sum((credits for _, credits in movements.values()), Decimal('0'))
 
         return {
-            'accounts': [
-                {
-                    'account_code': code,
-                    **account_data
-                }
-                for code, account_data in accounts.items()
-            ],
+            'accounts': accounts,
             'totals': {
                 'total_debits': total_debits,
                 'total_credits': total_credits,
-                'net_balance': net_balance
+                'net_balance': total_debits - total_credits
             },
             'period': {
                 'start_date': start_date,
                 'end_date': end_date
             }
         }
+
+    @staticmethod
+    def _cumulative_totals(as_of_date: date) -> Dict[str, List[Decimal]]:
+        """Cumulative [debits, credits] per account at the close of ``as_of_date``."""
+        totals = {}
+        entries = LedgerEntry.objects.filter(created_at__lt=LedgerService._day_end(as_of_date))
+
+        period_end = AccountBalanceCheckpoint.objects.filter(
+            period_end__lte=as_of_date
+        ).order_by('-period_end').values_list('period_end', flat=True).first()
+        if period_end:
+            for checkpoint in AccountBalanceCheckpoint.objects.filter(period_end=period_end):
+                totals[checkpoint.account_code] = [checkpoint.debit_total, checkpoint.credit_total]
+            entries = entries.filter(created_at__gte=LedgerService._day_end(period_end))
+
+        movements = entries.order_by().values('account_code', 'entry_type').annotate(total=Sum('amount'))
+        for row in movements:
+            account_totals = totals.setdefault(row['account_code'], [Decimal('0'), Decimal('0')])
+            account_totals[0 if row['entry_type'] == 'DEBIT' else 1] += row['total']
+
+        return totals
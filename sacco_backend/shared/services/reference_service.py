@@ -0,0 +1,141 @@
+# shared/services/reference_service.py
+import os
+import threading
+from typing import Dict, List, Tuple
+
+from django.db import connection, transaction
+
+from apps.transactions.models import ReferenceSequence
+
+
+def luhn_check_digit(digits: str) -> str:
+    """Luhn (mod 10) check digit for a string of digits."""
+    total = 0
+    for position, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_reference(reference: str) -> bool:
+    """Whether the digits of a generated reference end in a correct check digit."""
+    digits = ''.join(char for char in reference if char.isdigit())
+    return len(digits) > 1 and luhn_check_digit(digits[:-1]) == digits[-1]
+
+
+class ReferenceService:
+    """Hands out monotonic, type-prefixed references ending in a Luhn check digit.
+
+    On PostgreSQL every sequence below is a database sequence stepping by BLOCK_SIZE:
+    one nextval() reserves a block that the process then hands out from memory, so most
+    references cost no query. Sequences ignore rollbacks, so an aborted caller leaves a
+    gap, never a duplicate. Other databases take one value at a time from a
+    ReferenceSequence row inside the caller's transaction.
+
+    Adding a sequence needs a migration creating it (see transactions 0002).
+    """
+
+    BLOCK_SIZE = 100
+    DIGITS = 12
+
+    # kind -> (prefix, sequence)
+    KINDS = {
+        'TRANSACTION': ('TXN', 'transaction'),
+        'FEE': ('FEE', 'fee'),
+        'REVERSAL': ('REV', 'transaction'),
+        # Interest credits carry the same reference on the Transaction and the SavingsTransaction
+        'INTEREST': ('INT', 'transaction'),
+        # Check-off batches; their transactions carry the batch reference as external_reference
+        'CHECKOFF': ('CHK', 'transaction'),
+        'PAYMENT': ('PAY', 'payment'),
+        'SAVINGS_TRANSACTION': ('SVT', 'savings_transaction'),
+        # Account lifecycle entries keep a readable prefix but share the savings sequence
+        'ACCOUNT_OPENING': ('INIT', 'savings_transaction'),
+        'ACCOUNT_FREEZE': ('FREEZE', 'savings_transaction'),
+        'ACCOUNT_UNFREEZE': ('UNFREEZE', 'savings_transaction'),
+        'ACCOUNT_CLOSURE': ('CLOSE', 'savings_transaction'),
+    }
+    ACCOUNT_SEQUENCE = 'savings_account'
+    ACCOUNT_DIGITS = 10
+
+    _lock = threading.Lock()
+    # sequence -> (next value, end of block); only valid in the process that reserved it
+    _blocks: Dict[str, Tuple[int, int]] = {}
+    _pid = None
+
+    @staticmethod
+    def sequence_name(sequence: str) -> str:
+        return f"reference_seq_{sequence}"
+
+    @staticmethod
+    def generate(kind: str) -> str:
+        prefix, sequence = ReferenceService.KINDS[kind]
+        return ReferenceService.format(prefix, ReferenceService.next_value(sequence), ReferenceService.DIGITS)
+
+    @staticmethod
+    def generate_many(kind: str, count: int) -> List[str]:
+        """``count`` references of one kind, reserved together for a bulk insert."""
+        prefix, sequence = ReferenceService.KINDS[kind]
+        return [
+            ReferenceService.format(prefix, value, ReferenceService.DIGITS)
+            for value in ReferenceService.next_values(sequence, count)
+        ]
+
+    @staticmethod
+    def generate_account_number(prefix: str) -> str:
+        value = ReferenceService.next_value(ReferenceService.ACCOUNT_SEQUENCE)
+        return ReferenceService.format(prefix, value, ReferenceService.ACCOUNT_DIGITS)
+
+    @staticmethod
+    def format(prefix: str, value: int, digits: int) -> str:
+        number = str(value).zfill(digits)
+        return f"{prefix}{number}{luhn_check_digit(number)}"
+
+    @staticmethod
+    def next_value(sequence: str) -> int:
+        return ReferenceService.next_values(sequence, 1)[0]
+
+    @staticmethod
+    def next_values(sequence: str, count: int) -> List[int]:
+        if count <= 0:
+            return []
+        if connection.vendor != 'postgresql':
+            return ReferenceService._next_counter_values(sequence, count)
+
+        with ReferenceService._lock:
+            if ReferenceService._pid != os.getpid():
+                # A forked worker must not reuse blocks reserved by its parent
+                ReferenceService._blocks = {}
+                ReferenceService._pid = os.getpid()
+
+            next_value, end = ReferenceService._blocks.get(sequence, (0, 0))
+            values = list(range(next_value, min(end, next_value + count)))
+            next_value += len(values)
+            if len(values) < count:
+                # One round trip for however many blocks the rest needs; they need not be adjacent
+                blocks = -(-(count - len(values)) // ReferenceService.BLOCK_SIZE)
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT nextval(%s) FROM generate_series(1, %s)",
+                        [ReferenceService.sequence_name(sequence), blocks]
+                    )
+                    starts = sorted(row[0] for row in cursor.fetchall())
+                for start in starts:
+                    values += range(start, start + ReferenceService.BLOCK_SIZE)
+                end = starts[-1] + ReferenceService.BLOCK_SIZE
+                # Whatever is left over lies in the last block
+                next_value = end - (len(values) - count)
+            ReferenceService._blocks[sequence] = (next_value, end)
+            return values[:count]
+
+    @staticmethod
+    @transaction.atomic
+    def _next_counter_values(sequence: str, count: int) -> List[int]:
+        counter, _ = ReferenceSequence.objects.select_for_update().get_or_create(name=sequence)
+        counter.last_value += count
+        counter.save(update_fields=['last_value'])
+        return list(range(counter.last_value - count + 1, counter.last_value + 1))
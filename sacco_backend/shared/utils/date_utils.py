@@ -1,4 +1,7 @@
-from datetime import timedelta, date
+from datetime import timedelta, date, datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 
 def calculate_age(date_of_birth: date) -> int:
@@ -73,4 +76,21 @@ def is_valid_date(year: int, month: int, day: int) -> bool:
         return False
     if day < 1 or day > days_in_month(year, month):
         return False
-    return True
\ No newline at end of file
+    return True
+
+
+def month_start(date_to_check: date, offset: int = 0) -> date:
+    """First day of the month ``offset`` months away from ``date_to_check``'s month."""
+    years, month_index = divmod(date_to_check.month - 1 + offset, 12)
+    return date(date_to_check.year + years, month_index + 1, 1)
+
+def as_date(value) -> date:
+    """A date from a date, a datetime (its local date) or an ISO 8601 string; ValueError otherwise."""
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    if isinstance(value, date):
+        return value
+    parsed = parse_date(str(value)) or parse_datetime(str(value))
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value}")
+    return as_date(parsed)
@@ -0,0 +1,61 @@
+import threading
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class VersionedCache:
+    """Process-local copy of slowly changing reference data.
+
+    The data is loaded once per process and reused until the version counter kept in
+    the default Django cache moves on; ``invalidate()`` bumps that counter so every
+    process sharing that cache reloads on its next read. A read therefore costs one
+    cache lookup and no database query.
+
+    Only a shared cache backend (Redis in production) carries the counter across
+    processes; with a local-memory cache other processes never see the bump. Either way
+    a copy older than ``VERSIONED_CACHE_MAX_AGE`` seconds is reloaded, which bounds how
+    stale any process can be.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.version_key = f'versioned_cache:{name}'
+        self._lock = threading.Lock()
+        self._version = None
+        self._data = None
+        self._loaded_at = 0.0
+
+    def get(self) -> Any:
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, self._new_version(), timeout=None)
+            version = cache.get(self.version_key)
+
+        if version != self._version or self._expired():
+            with self._lock:
+                if version != self._version or self._expired():
+                    # Read the version before loading, so a change made meanwhile triggers another reload
+                    self._data = self.loader()
+                    self._version = version
+                    self._loaded_at = time.monotonic()
+        return self._data
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._loaded_at > settings.VERSIONED_CACHE_MAX_AGE
+
+    def invalidate(self) -> None:
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            # No version stored yet, or it was evicted
+            cache.set(self.version_key, self._new_version(), timeout=None)
+        self._version = None
+
+    @staticmethod
+    def _new_version() -> int:
+        # Time-based, so a counter lost to eviction never restarts at a version a process already holds
+        return time.time_ns()